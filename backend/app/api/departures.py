@@ -2,25 +2,108 @@
 API endpoints for departure information
 """
 from fastapi import APIRouter, HTTPException, Path, Query, Depends
-from typing import List, Optional
+from typing import List, Optional, Union
+import asyncio
 import logging
 
-from app.services.bvg_client import get_bvg_client, BVGClient
-from app.models.transport import DeparturesResponse, Departure, TransportLine, Station
+from app.services.bvg_client import get_bvg_client, parse_products, BVGClient
+from app.services.departure_timeline import departure_key, get_timelines
+from app.services.station_store import get_station_store
+from app.api.stations import build_station
+from app.exceptions import ServiceUnavailableException
+from app.utils.deadline import run_with_deadline
+from app.models.transport import DeparturesDeltaResponse, DeparturesResponse, Departure, TransportLine, Station
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/departures/{station_id}", response_model=DeparturesResponse)
+def build_departures(departures_data) -> List[Departure]:
+    """Convert raw BVG departures into Departure models, skipping malformed entries"""
+    departures = []
+    seen = {}  # key -> times used, so exact duplicates still get distinct IDs
+    
+    # Handle different response structures from BVG API
+    if isinstance(departures_data, list):
+        for dep in departures_data:
+            try:
+                # Skip if dep is not a dict
+                if not isinstance(dep, dict):
+                    logger.warning("Skipping non-dict departure: %s", type(dep))
+                    continue
+                
+                # Extract line information safely
+                line_data = dep.get('line', {})
+                if not isinstance(line_data, dict):
+                    line_data = {}
+                
+                product_data = line_data.get('product', {})
+                if not isinstance(product_data, dict):
+                    product_data = {}
+                
+                line = TransportLine(
+                    name=line_data.get('name', 'Unknown'),
+                    type=product_data.get('short', 'unknown')
+                )
+                
+                key = departure_key(dep)
+                seen[key] = seen.get(key, 0) + 1
+                if seen[key] > 1:
+                    key = f"{key}#{seen[key]}"
+                
+                # Create departure
+                departure = Departure(
+                    id=key,
+                    line=line,
+                    direction=dep.get('direction', 'Unknown'),
+                    when=dep.get('when', ''),
+                    delay=dep.get('delay'),
+                    platform=dep.get('platform')
+                )
+                
+                departures.append(departure)
+                
+            except Exception as e:
+                logger.warning("Failed to process departure: %s - %s", e, type(dep))
+                continue
+    
+    return departures
+
+@router.get("/departures/{station_id}", response_model=Union[DeparturesDeltaResponse, DeparturesResponse])
 async def get_departures(
     station_id: str = Path(..., description="Station ID"),
     duration: int = Query(60, ge=10, le=240, description="Duration in minutes to fetch departures"),
+    products: Optional[str] = Query(None, description="Comma-separated products (suburban, subway, tram, bus, ferry, express, regional)"),
+    since: Optional[int] = Query(None, ge=0, description="Version of the last response; only changes after it are returned"),
     bvg_client: BVGClient = Depends(get_bvg_client)
 ):
-    """Get live departures for a station"""
+    """
+    Get live departures for a station
+    
+    Responses carry a ``version``. Refreshing with ``?since=<version>`` returns only
+    the departures added, changed or removed since then, or a full response when
+    that version is no longer known.
+    """
+    try:
+        product_filter = parse_products(products)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Producto no válido: {products}")
+    
     try:
         # Call BVG API with correct method name
-        results = bvg_client.get_departures(station_id, duration=duration)
+        stale = False
+        try:
+            results = await run_with_deadline(
+                bvg_client.get_departures, station_id, duration=duration, products=product_filter
+            )
+        except ServiceUnavailableException as e:
+            # Upstream is degraded or throttled: answer immediately with the last known data
+            if e.stale_data is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="El servicio de BVG no está disponible en este momento. Por favor, intenta de nuevo en unos segundos.",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            results, stale = e.stale_data, True
         
         if results is None:
             raise HTTPException(
@@ -32,62 +115,49 @@ async def get_departures(
             raise HTTPException(status_code=404, detail="Estación no encontrada")
         
         # Convert to our models
-        departures = []
-        
-        # Handle different response structures from BVG API
-        departures_data = results.get('departures', [])
-        if isinstance(departures_data, list):
-            for dep in departures_data:
-                try:
-                    # Skip if dep is not a dict
-                    if not isinstance(dep, dict):
-                        logger.warning(f"Skipping non-dict departure: {type(dep)}")
-                        continue
-                    
-                    # Extract line information safely
-                    line_data = dep.get('line', {})
-                    if not isinstance(line_data, dict):
-                        line_data = {}
-                    
-                    product_data = line_data.get('product', {})
-                    if not isinstance(product_data, dict):
-                        product_data = {}
-                    
-                    line = TransportLine(
-                        name=line_data.get('name', 'Unknown'),
-                        type=product_data.get('short', 'unknown')
-                    )
-                    
-                    # Create departure
-                    departure = Departure(
-                        line=line,
-                        direction=dep.get('direction', 'Unknown'),
-                        when=dep.get('when', ''),
-                        delay=dep.get('delay'),
-                        platform=dep.get('platform')
-                    )
-                    
-                    departures.append(departure)
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to process departure: {e} - {type(dep)}")
-                    continue
+        departures = build_departures(results.get('departures', []))
         
         # Create station info
         station_data = results.get('stop', {})
         if not isinstance(station_data, dict):
             station_data = {}
-            
-        station = Station(
-            id=station_id,
-            name=station_data.get('name', f'Station {station_id}'),
-            type='stop'
-        )
+        
+        store = get_station_store()
+        record = await asyncio.to_thread(store.get, station_id) if store is not None else None
+        if record is not None:
+            station = build_station(record)
+        else:
+            station = Station(
+                id=station_id,
+                name=station_data.get('name', f'Station {station_id}'),
+                type='stop'
+            )
+        
+        # Stale data would move the timeline backwards, so it is only ever sent in full
+        version = None
+        if not stale:
+            timelines = get_timelines()
+            timeline = timelines.get(f"{station_id}:{','.join(product_filter or [])}:{duration}")
+            version = timeline.update({departure.id: departure for departure in departures})
+            if since is not None:
+                delta = timeline.delta(since)
+                if delta is not None:
+                    timelines.deltas += 1
+                    return DeparturesDeltaResponse(
+                        station=station,
+                        since=since,
+                        version=version,
+                        realtimeDataUpdatedAt=results.get('realtimeDataUpdatedAt'),
+                        **delta
+                    )
+                timelines.fallbacks += 1
         
         response = DeparturesResponse(
             station=station,
             departures=departures,
-            realtimeDataUpdatedAt=results.get('realtimeDataUpdatedAt')
+            realtimeDataUpdatedAt=results.get('realtimeDataUpdatedAt'),
+            stale=stale,
+            version=version
         )
         
         return response
@@ -2,9 +2,12 @@
 API endpoints for vehicle radar (real-time vehicle positions)
 """
 from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
 import logging
 
-from app.services.bvg_client import get_bvg_client, BVGClient
+from app.services.bvg_client import get_bvg_client, parse_products, BVGClient
+from app.exceptions import ServiceUnavailableException
+from app.utils.deadline import run_with_deadline
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -17,6 +20,7 @@ async def get_vehicles_radar(
     east: float = Query(..., description="East longitude boundary"),
     duration: int = Query(30, ge=10, le=120, description="Duration in seconds"),
     results: int = Query(50, ge=1, le=256, description="Maximum number of vehicles"),
+    products: Optional[str] = Query(None, description="Comma-separated products (suburban, subway, tram, bus, ferry, express, regional)"),
     client: BVGClient = Depends(get_bvg_client)
 ):
     """
@@ -29,19 +33,37 @@ async def get_vehicles_radar(
     - east: 13.45
     """
     try:
-        logger.info(f"Getting radar data for bounds: N={north}, S={south}, W={west}, E={east}")
+        product_filter = parse_products(products)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Producto no válido: {products}")
+    
+    try:
+        logger.info("Getting radar data for bounds: N=%s, S=%s, W=%s, E=%s", north, south, west, east)
         
         # Call BVG API radar
-        data = client.get_radar(
-            north=north,
-            south=south,
-            west=west,
-            east=east,
-            duration=duration,
-            frames=1,  # Solo necesitamos 1 frame para posición actual
-            results=results,
-            polylines=False  # No necesitamos polylines para el mapa
-        )
+        stale = False
+        try:
+            data = await run_with_deadline(
+                client.get_radar,
+                north=north,
+                south=south,
+                west=west,
+                east=east,
+                duration=duration,
+                frames=1,  # Solo necesitamos 1 frame para posición actual
+                results=results,
+                polylines=False,  # No necesitamos polylines para el mapa
+                products=product_filter
+            )
+        except ServiceUnavailableException as e:
+            # Upstream is degraded or throttled: answer immediately with the last known data
+            if e.stale_data is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="El servicio de radar BVG no está disponible en este momento.",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            data, stale = e.stale_data, True
         
         if data is None:
             raise HTTPException(
@@ -66,6 +88,7 @@ async def get_vehicles_radar(
         return {
             'vehicles': vehicles,
             'count': len(vehicles),
+            'stale': stale,
             'bounds': {
                 'north': north,
                 'south': south,
@@ -1,12 +1,18 @@
 """
 API endpoints for station search and information
 """
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
+import asyncio
 import logging
 
+from app.config import get_settings
 from app.services.bvg_client import get_bvg_client, BVGClient
-from app.models.transport import Station, StationSearchResponse, Location
+from app.services.station_store import get_station_store, station_record
+from app.models.transport import Station, StationLookupResponse, StationSearchResponse, Location
+from app.exceptions import ServiceUnavailableException
+from app.utils.autocomplete import SearchDebouncer
+from app.utils.deadline import run_with_deadline
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,6 +26,32 @@ FEATURED_STATIONS = [
     {"id": "900000100004", "name": "S Hackescher Markt", "type": "regional_hub"},
 ]
 
+# Only the last query of a typing burst per session goes to BVG
+search_debouncer = SearchDebouncer(get_settings().search_debounce_ms / 1000)
+
+# Most station IDs accepted by one batch lookup
+MAX_LOOKUP_IDS = 100
+
+def build_station(record: dict) -> Station:
+    """Convert a station store record into the Station model"""
+    location = record.get("location")
+    return Station(
+        id=record["id"],
+        name=record["name"],
+        location=Location(**location) if location else None,
+        type="stop",
+        products=record.get("products")
+    )
+
+def search_session(request: Request) -> Optional[str]:
+    """
+    Identify who is typing from the X-Session-Id header (one per browser tab)
+    
+    Without it no session is assumed: users behind one NAT or proxy would
+    otherwise supersede each other's queries.
+    """
+    return request.headers.get("x-session-id") or None
+
 @router.get("/stations/all")
 async def get_all_stations():
     """Get all available stations"""
@@ -32,14 +64,35 @@ async def get_all_stations():
 
 @router.get("/stations/search")
 async def search_stations(
+    request: Request,
     q: str = Query(..., description="Search query for station name", min_length=2),
     limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
     bvg_client: BVGClient = Depends(get_bvg_client)
 ):
     """Search for stations by name"""
     try:
+        results = None
+        session = search_session(request)
+        if session is not None and not await search_debouncer.settle(session):
+            # A newer query from this session is on its way: answer from cache or not at all
+            results = await run_with_deadline(bvg_client.cached_stations, q, limit)
+            if results is None:
+                return StationSearchResponse(stations=[], query=q, superseded=True)
+        
         # Call BVG API with correct method name
-        results = bvg_client.search_stations(q, results=limit)
+        stale = False
+        try:
+            if results is None:
+                results = await run_with_deadline(bvg_client.search_stations, q, results=limit)
+        except ServiceUnavailableException as e:
+            # Upstream is degraded or throttled: answer immediately with the last known data
+            if e.stale_data is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="El servicio de BVG no está disponible en este momento. Por favor, intenta de nuevo en unos segundos.",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            results, stale = e.stale_data, True
         
         if results is None:
             raise HTTPException(
@@ -50,10 +103,12 @@ async def search_stations(
         # Convert to our Station model
         stations = []
         for result in results:
+            record = station_record(result)
             station = Station(
                 id=result.get('id', ''),
                 name=result.get('name', ''),
-                type=result.get('type', 'stop')
+                type=result.get('type', 'stop'),
+                products=record["products"] if record else None
             )
             
             # Add location if available
@@ -65,7 +120,7 @@ async def search_stations(
             
             stations.append(station)
         
-        return StationSearchResponse(stations=stations, query=q)
+        return StationSearchResponse(stations=stations, query=q, stale=stale)
         
     except HTTPException:
         raise
@@ -93,21 +148,41 @@ async def get_featured_stations():
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/stations/lookup", response_model=StationLookupResponse)
+async def lookup_stations(
+    ids: str = Query(..., description=f"Comma-separated station IDs (at most {MAX_LOOKUP_IDS})")
+):
+    """Get the stored metadata of several stations at once, without upstream calls"""
+    station_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not station_ids or len(station_ids) > MAX_LOOKUP_IDS:
+        raise HTTPException(status_code=400, detail=f"Indica entre 1 y {MAX_LOOKUP_IDS} IDs de estación")
+    
+    store = get_station_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="El almacén de estaciones no está disponible")
+    
+    records = await asyncio.to_thread(store.get_many, station_ids)
+    return StationLookupResponse(
+        stations=[build_station(records[i]) for i in station_ids if i in records],
+        missing=[i for i in station_ids if i not in records]
+    )
+
 @router.get("/stations/{station_id}")
 async def get_station_info(station_id: str):
     """Get information about a specific station"""
     try:
-        # Return basic station structure
-        # In a real app, this might query a database of stations
-        station = Station(
+        store = get_station_store()
+        record = await asyncio.to_thread(store.get, station_id) if store is not None else None
+        if record is not None:
+            return build_station(record)
+        
+        # Not seen in any search or departures response yet: placeholder
+        return Station(
             id=station_id,
             name=f"Station {station_id}",
             type="stop"
         )
         
-        return station
-        
     except Exception as e:
         logger.error(f"Failed to get station info for {station_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
-
@@ -26,7 +26,39 @@ class Settings(BaseSettings):
     # API Configuration
     bvg_api_base_url: str = "https://v6.bvg.transport.rest"
     api_timeout: int = 10  # seconds
+
+    # Upstream Circuit Breaker
+    circuit_breaker_failure_threshold: int = 5  # consecutive failures before opening
+    circuit_breaker_recovery_timeout: int = 30  # seconds before a half-open probe
+    stale_cache_ttl: int = 3600  # keep last-known-good payloads for 1 hour
+    
+    # Upstream (outbound) rate limiting, shared across workers via Redis
+    upstream_rate_limit_requests: int = 100  # BVG budget per window
+    upstream_rate_limit_window: int = 60  # window in seconds
+    upstream_rate_limit_burst: int = 50  # token bucket capacity
+    upstream_queue_timeout: float = 3.0  # seconds a call may wait for a slot
+    
+    bvg_lean_profiles: bool = True  # ask BVG to omit payload sections we never use
+    # Incremental parsing costs ~4x the CPU of a full parse and only saves memory above ~1 MiB:
+    # turn it on for memory-bound deployments only (needs ijson)
+    bvg_stream_parsing: bool = False
+    bvg_stream_min_bytes: int = 2097152  # bodies smaller than this are parsed in full
+    bvg_prewarm_connections: int = 2  # TLS connections opened at startup (0 = off)
+    
+    # Record upstream responses to gzip NDJSON segments (for scripts/bvg_standin.py)
+    bvg_record_dir: str | None = None
     
+    # Station metadata store (SQLite), filled from search and departures responses
+    station_store_path: str | None = "data/stations.db"  # empty disables the store
+    station_store_cache_size: int = 20000  # stations kept in memory
+    station_stops_file: str | None = None  # bulk-loaded at startup (GTFS stops.txt, CSV, JSON or NDJSON)
+    
+    # Search-as-you-type: reuse complete result sets of shorter prefixes, debounce per session
+    autocomplete_enabled: bool = True
+    autocomplete_min_chars: int = 2  # shortest prefix whose results are reused
+    autocomplete_ttl: int = 300  # seconds a result set is kept
+    search_debounce_ms: int = 150  # queries this close together in a session wait (0 = off)
+
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
@@ -44,12 +76,77 @@ class Settings(BaseSettings):
     redis_db: int = 0
     redis_password: str | None = None
     cache_ttl: int = 300  # 5 minutes default cache TTL
+    # Adaptive TTL bounds per endpoint (seconds)
+    cache_ttl_departures_min: int = 60  # the old fixed TTL: busy boards never refresh more often
+    cache_ttl_departures_max: int = 180
+    cache_ttl_search_min: int = 300
+    cache_ttl_search_max: int = 3600
+    cache_negative_ttl: int = 60  # unknown station IDs, empty searches
+    cache_error_ttl: int = 5  # upstream 5xx/timeouts (0 = don't cache errors)
+    cache_reconnect_interval: int = 30  # seconds between Redis retries while in-memory
+    
+    # Multi-worker cache coherence
+    cache_bus: str = "auto"  # auto (on when workers > 1), redis, unix, off
+    cache_bus_socket_dir: str = "/tmp/berlin-transport-cache-bus"
+    cache_l1_ttl: int = 5  # seconds a Redis value is kept in a worker's L1
+    
+    # Shared-memory cache for several workers on one host without Redis
+    cache_shared_memory: str = "auto"  # auto (on when workers > 1), on, off
+    cache_shm_path: str | None = None  # default: /dev/shm/berlin-transport-cache
+    cache_shm_size_mb: int = 64
+    cache_shm_slots: int = 65536
+    
+    # Distributed single-flight (Redis leases on cache misses)
+    cache_lease_ttl: float = 10.0  # seconds a fill lease is held
+    cache_lease_wait_timeout: float = 8.0  # max seconds to wait for another worker's fill
+    
+    # Background maintenance scheduler
+    scheduler_enabled: bool = True
+    cache_cleanup_interval: int = 60  # seconds between removals of expired entries
+    
+    # Warm restarts in in-memory mode: snapshot the cache to this file (None = off)
+    cache_snapshot_path: str | None = None
+    cache_snapshot_interval: int = 300  # seconds between periodic snapshots
     
     # Logging Configuration
     log_level: str = "INFO"
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    log_json: bool = False  # structured JSON lines instead of colored text
+    log_file: str | None = None
+    log_queue: bool = True  # format and write logs on a background thread
+    log_queue_size: int = 10000  # buffered records; overflow is dropped, never blocks
+    log_rate_limit_burst: int = 20  # records per call site and interval below ERROR (0 = off)
+    log_rate_limit_interval: float = 1.0
+    
+    # Event-loop lag monitor (records stacks of calls that block the loop)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.05  # seconds between heartbeats
+    loop_monitor_threshold: float = 0.1  # seconds of delay reported as a blocking call
+    
+    # Admission control: per route class concurrency, bounded wait queues, load shedding
+    # (departures are critical; radar and station lists are shed first)
+    admission_enabled: bool = True
+    admission_concurrency_critical: int = 64
+    admission_concurrency_normal: int = 32
+    admission_concurrency_low: int = 8
+    admission_queue_size: int = 64  # waiting requests per class (low class: a quarter)
+    admission_queue_timeout: float = 2.0  # max wait for a slot (critical: 2x, low: 1/4)
+    admission_lag_threshold: float = 0.2  # loop lag shedding low routes (normal at 2x)
+    admission_retry_after: int = 2  # Retry-After seconds on a 503
+    
+    # Request deadlines: upstream work stops once it runs out or the client disconnects
+    request_deadline_enabled: bool = True
+    request_deadline: float = 10.0  # seconds per API request (X-Request-Timeout may ask for less)
+    
+    # On-demand request profiling (adds a middleware only when enabled)
+    profiling_enabled: bool = False
+    profiling_token: str | None = None  # X-Profile-Token header / ?__profile= value; also guards the admin endpoints
+    profiling_sample_rate: int = 0  # profile 1 in N API requests (0 = only on demand)
+    profiling_mode: str = "sample"  # sample (collapsed stacks) or cprofile (.prof)
+    profiling_dir: str = "/tmp/berlin-transport-profiles"
+    profiling_keep: int = 50  # newest profiles kept on disk
     
-    # Rate Limiting
+    # Rate Limiting (inbound, per client)
     rate_limit_enabled: bool = True
     rate_limit_requests: int = 100  # requests per window
     rate_limit_window: int = 60  # window in seconds
@@ -47,7 +47,35 @@ class InvalidQueryException(BerlinTransportException):
 class ServiceUnavailableException(BerlinTransportException):
     """Exception raised when a required service is unavailable"""
     
-    def __init__(self, service_name: str):
+    def __init__(self, service_name: str, retry_after: int = None, stale_data=None):
         message = f"Service '{service_name}' is currently unavailable"
         super().__init__(message)
         self.service_name = service_name
+        self.retry_after = retry_after
+        # Last-known-good payload (if any) so callers can serve it as stale
+        self.stale_data = stale_data
+
+
+class CircuitOpenException(ServiceUnavailableException):
+    """Exception raised when an upstream circuit breaker is open"""
+    
+    def __init__(self, operation: str, retry_after: int, stale_data=None):
+        super().__init__(f"BVG {operation}", retry_after=retry_after, stale_data=stale_data)
+        self.operation = operation
+
+
+class UpstreamThrottledException(ServiceUnavailableException):
+    """Exception raised when an upstream call could not get a rate-limit slot before its deadline"""
+    
+    def __init__(self, operation: str, retry_after: int, stale_data=None):
+        super().__init__(f"BVG {operation}", retry_after=retry_after, stale_data=stale_data)
+        self.operation = operation
+
+
+class DeadlineExceededException(ServiceUnavailableException):
+    """Exception raised when a request's deadline passed (or its client left) before upstream answered"""
+    
+    def __init__(self, operation: str, reason: str = "deadline", retry_after: int = 1, stale_data=None):
+        super().__init__(f"BVG {operation}", retry_after=retry_after, stale_data=stale_data)
+        self.operation = operation
+        self.reason = reason
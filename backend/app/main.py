@@ -2,27 +2,107 @@
 FastAPI Web Application for Berlin Transport
 Main application entry point
 """
-from fastapi import FastAPI, Request
+import asyncio
+from functools import partial
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from contextlib import asynccontextmanager
 
 # Import your API routers
 from app.api import stations, departures, radar
+from app.config import get_settings
 from app.utils import get_cache_stats, clear_cache, cleanup_cache
-from app.services.bvg_client import initialize_bvg_client, shutdown_bvg_client
+from app.utils.cache import (
+    connect_cache, get_redis_client, attach_cache_bus, detach_cache_bus,
+    load_cache_snapshot, save_cache_snapshot, attach_shared_cache, detach_shared_cache
+)
+from app.utils.cache_bus import create_cache_bus
+from app.utils.circuit_breaker import get_breaker_stats
+from app.utils.rate_limit import InboundRateLimiter, get_outbound_limiter
+from app.utils.shm_cache import create_shared_store
+from app.utils.admission import AdmissionMiddleware, create_admission_controller
+from app.utils.deadline import DeadlineMiddleware
+from app.utils.loop_monitor import current_loop_lag, get_loop_monitor, start_loop_monitor, stop_loop_monitor
+from app.utils.profiling import ProfilingMiddleware, RequestProfiler
+from app.utils.logging_utils import get_logging_stats, setup_logging, shutdown_logging
+from app.utils.scheduler import get_scheduler, shutdown_scheduler
+from app.services.bvg_client import (
+    get_autocomplete_stats, get_bvg_client, get_ttl_policy_stats, initialize_bvg_client, shutdown_bvg_client
+)
+from app.services.departure_timeline import get_timelines
+from app.services.recorder import initialize_recorder, shutdown_recorder
+from app.services.station_store import get_station_store, initialize_station_store, shutdown_station_store
+
+settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
+    setup_logging(
+        settings.log_level, settings.log_json, settings.log_file,
+        use_queue=settings.log_queue, queue_size=settings.log_queue_size,
+        rate_limit_burst=settings.log_rate_limit_burst,
+        rate_limit_interval=settings.log_rate_limit_interval
+    )
+    initialize_recorder(settings.bvg_record_dir)
+    station_store = initialize_station_store(settings.station_store_path, settings.station_store_cache_size)
+    if station_store is not None and settings.station_stops_file:
+        asyncio.create_task(asyncio.to_thread(station_store.load_file, settings.station_stops_file))
+    # Connect the cache here, off the event loop, rather than at import time
+    await asyncio.to_thread(connect_cache)
+    redis_client = get_redis_client()
+    inbound_limiter.attach_redis(redis_client)
+    # Without Redis, workers on this host share one memory-mapped cache
+    shared_store = None
+    if redis_client is None:
+        shared_store = create_shared_store(
+            settings.cache_shared_memory, settings.workers, settings.cache_shm_path,
+            settings.cache_shm_size_mb, settings.cache_shm_slots
+        )
+        if shared_store is not None:
+            attach_shared_cache(shared_store)
+    # Keep worker caches coherent when running several workers (not needed with shared memory)
+    if shared_store is None:
+        bus = create_cache_bus(settings.cache_bus, settings.workers, redis_client, settings.cache_bus_socket_dir)
+        if bus is not None:
+            attach_cache_bus(bus, settings.cache_l1_ttl)
     initialize_bvg_client()
+    # Open TLS connections to BVG in the background so early requests skip the handshake
+    prewarm = asyncio.create_task(
+        asyncio.to_thread(get_bvg_client().prewarm, settings.bvg_prewarm_connections)
+    )
+    # Periodic maintenance, registered by each subsystem
+    scheduler = get_scheduler()
+    scheduler.register("cache.cleanup", cleanup_cache, interval=settings.cache_cleanup_interval, timeout=10)
+    # Warm restart (per-worker memory mode): reload the last snapshot without delaying readiness.
+    # A shared-memory store already outlives worker restarts.
+    snapshot_path = settings.cache_snapshot_path if redis_client is None and shared_store is None else None
+    if snapshot_path:
+        asyncio.create_task(asyncio.to_thread(load_cache_snapshot, snapshot_path))
+        scheduler.register("cache.snapshot", partial(save_cache_snapshot, snapshot_path),
+                           interval=settings.cache_snapshot_interval, timeout=30)
+    if settings.scheduler_enabled:
+        await scheduler.start()
+    if settings.loop_monitor_enabled:
+        await start_loop_monitor(settings.loop_monitor_interval, settings.loop_monitor_threshold)
     yield
     # Shutdown
+    await stop_loop_monitor()
+    await shutdown_scheduler()
+    if snapshot_path:
+        await asyncio.to_thread(save_cache_snapshot, snapshot_path)
+    prewarm.cancel()
     await shutdown_bvg_client()
+    detach_cache_bus()
+    detach_shared_cache()
+    shutdown_station_store()
+    shutdown_recorder()
+    shutdown_logging()
 
 
 # Create FastAPI instance
@@ -33,13 +113,72 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Enable CORS so the frontend (served on another port) can call the API
+# Per-client limiting for the JSON API, driven by the rate_limit_* settings
+# (counters move to Redis in the lifespan once it is connected)
+inbound_limiter = InboundRateLimiter(
+    max_requests=settings.rate_limit_requests,
+    window=settings.rate_limit_window,
+    enabled=settings.rate_limit_enabled
+)
+
+# Profile single requests on demand (admin token) or 1 in N; absent unless enabled
+profiler = RequestProfiler(
+    settings.profiling_dir,
+    token=settings.profiling_token,
+    sample_rate=settings.profiling_sample_rate,
+    default_mode=settings.profiling_mode,
+    keep=settings.profiling_keep
+)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Shed low-priority routes first under overload (runs inside the per-client rate limiter)
+admission = create_admission_controller(settings, lag_source=current_loop_lag)
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# Give each API request a deadline and drop its upstream work when the client disconnects
+# (outside admission, so requests still queued for a slot are dropped too)
+if settings.request_deadline_enabled:
+    app.add_middleware(DeadlineMiddleware, timeout=settings.request_deadline)
+
+@app.middleware("http")
+async def rate_limit_middleware(request: Request, call_next):
+    """Reject API clients that exceed their request budget with 429"""
+    # Preflights are answered by CORS and must not eat into the client's budget
+    if not inbound_limiter.enabled or request.method == "OPTIONS" or not request.url.path.startswith("/api/"):
+        return await call_next(request)
+
+    client_id = request.client.host if request.client else "unknown"
+    allowed, remaining, reset_after = inbound_limiter.hit(client_id)
+    headers = {
+        "X-RateLimit-Limit": str(inbound_limiter.max_requests),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset_after)
+    }
+    if not allowed:
+        headers["Retry-After"] = str(reset_after)
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Demasiadas solicitudes. Por favor, intenta de nuevo más tarde."},
+            headers=headers
+        )
+
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+# Enable CORS so the frontend (served on another port) can call the API.
+# Registered last, so it is the outermost middleware: 429 and shed 503 answers carry
+# CORS headers too and the browser can read their status and Retry-After
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3001", "http://localhost:3000", "http://127.0.0.1:3001"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Not CORS-safelisted: the frontend could not read when to retry otherwise
+    expose_headers=["Retry-After", "X-Shed-Reason", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
 )
 
 # Set up templates and static files
@@ -68,14 +207,26 @@ async def station_page(request: Request, station_id: str):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "berlin-transport-web"}
+    health = {"status": "healthy", "service": "berlin-transport-web"}
+    monitor = get_loop_monitor()
+    if monitor is not None:
+        health["event_loop"] = monitor.get_stats()
+    return health
 
 @app.get("/api/cache/stats")
 async def cache_stats():
     """Get cache statistics"""
     stats = get_cache_stats()
+    station_store = get_station_store()
     return {
         "cache": stats,
+        "ttl_policies": get_ttl_policy_stats(),
+        "stations": station_store.get_stats() if station_store is not None else None,
+        "departure_timelines": get_timelines().get_stats(),
+        "autocomplete": {
+            "cache": get_autocomplete_stats(),
+            "debounce": stations.search_debouncer.get_stats()
+        },
         "description": "Cache statistics for BVG API requests"
     }
 
@@ -91,6 +242,78 @@ async def cleanup_cache_endpoint():
     removed = cleanup_cache()
     return {"message": f"Removed {removed} expired entries"}
 
+@app.get("/api/maintenance/jobs")
+async def maintenance_jobs():
+    """Get timing and failure counts of the background maintenance jobs"""
+    return {
+        "scheduler": get_scheduler().get_stats(),
+        "logging": get_logging_stats(),
+        "description": "Periodic maintenance jobs run by the background scheduler"
+    }
+
+def require_profiling_admin(request: Request):
+    """Reject profiling admin calls unless profiling is on and the token matches"""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.is_admin(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    """List the stored request profiles (newest last)"""
+    require_profiling_admin(request)
+    return {
+        "profiles": list(profiler.profiles),
+        "stats": profiler.get_stats(),
+        "description": "Profiled requests; download one from /api/admin/profiles/{id}"
+    }
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, request: Request):
+    """Download a profile (collapsed stacks or cProfile stats)"""
+    require_profiling_admin(request)
+    path = profiler.file_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, filename=path.rsplit("/", 1)[-1], media_type="application/octet-stream")
+
+@app.get("/api/debug/event-loop")
+async def event_loop_debug():
+    """Get event-loop lag and the stacks of calls that blocked the loop"""
+    monitor = get_loop_monitor()
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Monitor del event loop desactivado")
+    return {
+        "event_loop": monitor.get_stats(include_reports=True),
+        "description": "Loop lag percentiles and recent blocking calls (innermost app frame first in blocking_sites)"
+    }
+
+@app.get("/api/admission")
+async def admission_stats():
+    """Get admission control state and shed counts per route class"""
+    return {
+        "enabled": settings.admission_enabled,
+        "admission": admission.get_stats(),
+        "description": "Requests admitted, queued and shed (503) per route class"
+    }
+
+@app.get("/api/upstream/breakers")
+async def upstream_breakers():
+    """Get circuit breaker state for each upstream BVG operation"""
+    return {
+        "breakers": get_breaker_stats(),
+        "description": "Circuit breaker state per upstream operation"
+    }
+
+@app.get("/api/upstream/limiter")
+async def upstream_limiter():
+    """Get outbound BVG rate limiter statistics"""
+    return {
+        "limiter": get_outbound_limiter().get_stats(),
+        "description": "Outbound token bucket and priority queue for BVG calls"
+    }
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Several workers need the import string; caches stay coherent via the cache bus
+    uvicorn.run("app.main:app", host=settings.host, port=settings.port, workers=settings.workers)
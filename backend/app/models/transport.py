@@ -22,9 +22,16 @@ class Station(BaseModel):
     name: str
     location: Optional[Location] = None
     type: str = "stop"
+    products: Optional[List[str]] = None  # served products, when known
+
+class StationLookupResponse(BaseModel):
+    """API response for a batch station lookup"""
+    stations: List[Station]
+    missing: List[str] = []
 
 class Departure(BaseModel):
     """Departure information"""
+    id: Optional[str] = None  # stable key of the stop event across refreshes (trip ID and planned time when known)
     line: TransportLine
     direction: str
     when: str  # ISO datetime string
@@ -37,11 +44,25 @@ class DeparturesResponse(BaseModel):
     station: Station
     departures: List[Departure]
     realtimeDataUpdatedAt: Optional[str] = None
+    stale: bool = False  # True when served from last-known-good data
+    version: Optional[int] = None  # pass as ?since= on the next refresh to get only the changes
+
+class DeparturesDeltaResponse(BaseModel):
+    """API response for a departures refresh: only what changed after ``since``"""
+    station: Station
+    since: int
+    version: int
+    added: List[Departure]
+    changed: List[Departure]
+    removed: List[str]  # ids of departures no longer on the board
+    realtimeDataUpdatedAt: Optional[str] = None
 
 class StationSearchResponse(BaseModel):
     """API response for station search"""
     stations: List[Station]
     query: str
+    stale: bool = False  # True when served from last-known-good data
+    superseded: bool = False  # True when a newer query from the same session replaced this one
 
 class VehicleMovement(BaseModel):
     """Vehicle movement from radar data"""
@@ -4,14 +4,31 @@ Refactored from extract/departures.py for web application use
 OPTIMIZED: Reduced timeout and retries for better performance
 """
 import os
+import itertools
+import json
 import requests
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from datetime import datetime
 import pytz
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import urlencode
 from dotenv import load_dotenv
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 import time
-from app.utils.cache import cached
+from app.config import get_settings
+from app.exceptions import (
+    CircuitOpenException, DeadlineExceededException, ServiceUnavailableException, UpstreamThrottledException
+)
+from app.utils.autocomplete import AutocompleteCache, normalize_query
+from app.utils.cache import NegativeResult, cache_get, cache_get_or_fill, cache_set, make_cache_key
+from app.utils.circuit_breaker import CircuitBreaker, get_breaker
+from app.utils.deadline import check_deadline, current_deadline, remaining_time
+from app.utils.json_stream import Projection, pick
+from app.utils.ttl_policy import AdaptiveTTL, DeparturesTTL
+from app.utils.rate_limit import Priority, get_outbound_limiter
+from app.services.recorder import get_recorder
+from app.services.station_store import get_station_store
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +36,144 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Upstream operations, each guarded by its own circuit breaker
+UPSTREAM_OPERATIONS = ("search", "departures", "radar")
+
+# Departures are cached per station as one window; shorter durations are
+# sliced out of the widest window fetched
+BERLIN_TZ = pytz.timezone("Europe/Berlin")
+
+# Product filters understood by the BVG API (one boolean query option each)
+PRODUCTS = ("suburban", "subway", "tram", "bus", "ferry", "express", "regional")
+
+# Lean query profiles: switch off payload sections the API layer never uses
+QUERY_PROFILES = {
+    "search": {"addresses": "false", "poi": "false", "linesOfStops": "false", "pretty": "false"},
+    "departures": {"remarks": "false", "linesOfStops": "false", "stopovers": "false", "pretty": "false"},
+    "radar": {"pretty": "false"},
+}
+
+
+# Fields of each list element the API layer reads; everything else is dropped while parsing
+LINE_FIELDS = ("id", "name", "product", "productName", "mode")
+DEPARTURE_FIELDS = ("tripId", "when", "plannedWhen", "delay", "platform", "direction", "cancelled")
+MOVEMENT_FIELDS = ("tripId", "direction", "location")
+STOP_FIELDS = ("id", "name", "location", "products")
+RADAR_MAX_STOPOVERS = 3
+
+
+def _project_departure(departure) -> Optional[Dict]:
+    if not isinstance(departure, dict):
+        return None
+    trimmed = pick(departure, DEPARTURE_FIELDS)
+    trimmed["line"] = pick(departure.get("line"), LINE_FIELDS) or {}
+    stop = pick(departure.get("stop"), STOP_FIELDS)
+    if stop:
+        # Only read to learn the station's metadata; dropped before the window is cached
+        stop["station"] = pick(departure["stop"].get("station"), STOP_FIELDS)
+        trimmed["stop"] = stop
+    return trimmed
+
+
+def _project_movement(movement) -> Optional[Dict]:
+    # Vehicles without a position can't be drawn on the map
+    if not isinstance(movement, dict) or not movement.get("location"):
+        return None
+    trimmed = pick(movement, MOVEMENT_FIELDS)
+    trimmed["line"] = pick(movement.get("line"), LINE_FIELDS) or {}
+    trimmed["nextStopovers"] = (movement.get("nextStopovers") or [])[:RADAR_MAX_STOPOVERS]
+    return trimmed
+
+
+DEPARTURES_PROJECTION = Projection("departures", _project_departure, keep=("stop", "realtimeDataUpdatedAt"))
+RADAR_PROJECTION = Projection("movements", _project_movement, keep=("realtimeDataUpdatedAt",))
+
+# Decoded bytes read from the socket at a time while streaming a body
+STREAM_CHUNK = 65536
+
+
+class _ChunkReader:
+    """Binary file-like object over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+            return data
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._buffer = chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def departure_timestamp(departure) -> Optional[float]:
+    """Epoch seconds of a departure's (planned) time, or None if unknown"""
+    if not isinstance(departure, dict):
+        return None
+    value = departure.get("when") or departure.get("plannedWhen")
+    if not isinstance(value, str):
+        return None
+    try:
+        when = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if when.tzinfo is None:
+        when = BERLIN_TZ.localize(when)
+    return when.timestamp()
+
+
+# Entry lifetimes follow the payloads: see app/utils/ttl_policy.py
+_settings = get_settings()
+DEPARTURES_TTL_POLICY = DeparturesTTL(
+    _settings.cache_ttl_departures_min,
+    _settings.cache_ttl_departures_max,
+    departure_time=departure_timestamp,
+    initial=60
+)
+SEARCH_TTL_POLICY = AdaptiveTTL(_settings.cache_ttl_search_min, _settings.cache_ttl_search_max, initial=300)
+
+
+def get_ttl_policy_stats() -> Dict:
+    """Get adaptive TTL statistics per cached operation"""
+    return {
+        "departures": DEPARTURES_TTL_POLICY.get_stats(),
+        "search": SEARCH_TTL_POLICY.get_stats()
+    }
+
+
+def parse_products(spec: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated product filter
+    
+    Returns:
+        Sorted product names, or None when no filter was given
+    
+    Raises:
+        ValueError: If an unknown product is named
+    """
+    if not spec:
+        return None
+    products = sorted({p.strip().lower() for p in spec.split(",") if p.strip()})
+    unknown = [p for p in products if p not in PRODUCTS]
+    if unknown:
+        raise ValueError(f"Unknown products: {', '.join(unknown)}")
+    return products or None
+
+# Interactive lookups go ahead of radar polling in the outbound queue
+OPERATION_PRIORITIES = {
+    "search": Priority.INTERACTIVE,
+    "departures": Priority.INTERACTIVE,
+    "radar": Priority.BACKGROUND,
+}
+
+
 class BVGClient:
     """Client for interacting with BVG Transport API"""
     
@@ -30,41 +185,235 @@ class BVGClient:
         # OPTIMIZED: Reduced retries from 3 to 1 (fail-fast approach)
         self.max_retries = 1
         self.retry_delay = 0.5  # seconds (reduced from 1s)
+        
+        settings = get_settings()
+        # Last-known-good payloads are served (marked stale) while a breaker is open
+        self.stale_ttl = settings.stale_cache_ttl
+        self.breakers: Dict[str, CircuitBreaker] = {
+            operation: get_breaker(
+                operation,
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                recovery_timeout=settings.circuit_breaker_recovery_timeout
+            )
+            for operation in UPSTREAM_OPERATIONS
+        }
+        self.limiter = get_outbound_limiter()
+        self.lean_profiles = settings.bvg_lean_profiles
+        self.stream_parsing = settings.bvg_stream_parsing
+        self.stream_min_bytes = settings.bvg_stream_min_bytes
+        self.autocomplete = AutocompleteCache(
+            settings.autocomplete_ttl, settings.autocomplete_min_chars
+        ) if settings.autocomplete_enabled else None
     
-    def _make_request(self, url: str) -> Optional[Dict]:
-        """Make HTTP request with retry logic"""
+    def _build_url(self, path: str, operation: str, params: Dict,
+                   products: Optional[Sequence[str]] = None) -> str:
+        """Build an upstream URL with the operation's query profile and product filter"""
+        query = {key: str(value) for key, value in params.items()}
+        if self.lean_profiles:
+            query.update(QUERY_PROFILES.get(operation, {}))
+        if products:
+            query.update({p: "true" if p in products else "false" for p in PRODUCTS})
+        return f"{self.api_url}{path}?{urlencode(query)}"
+    
+    def _make_request(self, url: str, operation: Optional[str] = None,
+                      priority: Optional[Priority] = None,
+                      projection: Optional[Projection] = None,
+                      negative: bool = False) -> Optional[Dict]:
+        """
+        Make HTTP request with retry logic
+        
+        Args:
+            url: Full upstream URL
+            operation: Upstream operation name; when given, the call is guarded
+                by that operation's circuit breaker and the outbound rate limiter
+            priority: Outbound queue priority (defaults per operation)
+            projection: Fields to keep from the body; the body is then parsed
+                incrementally from the stream instead of loaded in full
+            negative: Return a NegativeResult instead of None on failure, telling
+                unknown IDs (404) apart from other errors for the cache
+        
+        Raises:
+            CircuitOpenException: If the operation's breaker is open
+            UpstreamThrottledException: If no outbound slot was free before the deadline
+            DeadlineExceededException: If nobody waits for the result any more
+                (deadline passed or client gone); socket timeouts are capped
+                to the request's remaining time
+        """
+        check_deadline(operation or "request")
+        breaker = self.breakers.get(operation) if operation else None
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenException(operation, retry_after=breaker.retry_after)
+        
+        if operation is not None:
+            if priority is None:
+                priority = OPERATION_PRIORITIES.get(operation, Priority.INTERACTIVE)
+            try:
+                self.limiter.acquire(operation, priority, timeout=remaining_time(self.limiter.default_timeout))
+            except UpstreamThrottledException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+        
+        def failed(kind: str, value=None):
+            return NegativeResult(kind, value) if negative else None
+        
+        def abandoned():
+            # Cut short by our own deadline, which says nothing about upstream health
+            if breaker is not None:
+                breaker.release()
+            return DeadlineExceededException(operation or "request", current_deadline().cause())
+        
         last_error = None
         
         for attempt in range(self.max_retries):
+            timeout = remaining_time(self.timeout)
+            if timeout <= 0:
+                raise abandoned()
             try:
-                logger.info(f"Making request (attempt {attempt + 1}/{self.max_retries}): {url}")
-                response = self.session.get(url, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
+                logger.info("Making request (attempt %d/%d): %s", attempt + 1, self.max_retries, url)
+                started = time.perf_counter()
+                # Recording needs the full body, so it turns streaming off
+                stream = projection is not None and self.stream_parsing and get_recorder() is None
+                response = self.session.get(url, timeout=timeout, stream=stream)
+                if not stream:
+                    self._record(url, response, (time.perf_counter() - started) * 1000)
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError:
+                    # An unread streamed error body would keep its connection out of the pool
+                    response.close()
+                    raise
+                data = self._read_body(response, projection, stream)
+                if breaker is not None:
+                    breaker.record_success()
+                return data
             except requests.exceptions.Timeout as e:
                 last_error = e
-                logger.warning(f"Request timeout (attempt {attempt + 1}): {e}")
+                logger.warning("Request timeout (attempt %d): %s", attempt + 1, e)
             except requests.exceptions.ConnectionError as e:
                 last_error = e
-                logger.warning(f"Connection error (attempt {attempt + 1}): {e}")
+                logger.warning("Connection error (attempt %d): %s", attempt + 1, e)
             except requests.exceptions.HTTPError as e:
                 # Don't retry on 4xx errors (client errors)
                 if 400 <= e.response.status_code < 500:
-                    logger.error(f"Client error: {e}")
-                    return None
+                    logger.error("Client error: %s", e)
+                    # The upstream answered, so it counts as healthy
+                    if breaker is not None:
+                        breaker.record_success()
+                    # Only an unknown ID is a lasting answer; bad queries, auth and
+                    # throttling errors are cached as briefly as any other failure
+                    if e.response.status_code == 404:
+                        # Empty rather than None, so callers can tell it from an upstream failure
+                        return failed(NegativeResult.NOT_FOUND, {})
+                    return failed(NegativeResult.ERROR)
                 last_error = e
-                logger.warning(f"HTTP error (attempt {attempt + 1}): {e}")
+                logger.warning("HTTP error (attempt %d): %s", attempt + 1, e)
             except Exception as e:
                 last_error = e
-                logger.error(f"Unexpected error: {e}")
-                return None
+                logger.error("Unexpected error: %s", e)
+                if breaker is not None:
+                    breaker.record_failure()
+                return failed(NegativeResult.ERROR)
             
             # Wait before retrying (except on last attempt)
             if attempt < self.max_retries - 1:
-                time.sleep(self.retry_delay * (attempt + 1))
+                time.sleep(remaining_time(self.retry_delay * (attempt + 1)))
         
-        logger.error(f"All retry attempts failed. Last error: {last_error}")
-        return None
+        if remaining_time(self.timeout) <= 0:
+            raise abandoned()
+        logger.error("All retry attempts failed. Last error: %s", last_error)
+        if breaker is not None:
+            breaker.record_failure()
+        return failed(NegativeResult.ERROR)
+    
+    def _read_body(self, response: requests.Response, projection: Optional[Projection], stream: bool):
+        """
+        Decode a response body, trimmed to ``projection`` when given
+        
+        Socket errors while streaming come from urllib3; they are raised as their
+        ``requests`` counterparts so the caller retries them like any timeout.
+        """
+        if projection is None:
+            return response.json()
+        if not stream:
+            return projection.apply(response.json())
+        
+        try:
+            chunks = response.raw.stream(STREAM_CHUNK, decode_content=True)
+            # Incremental parsing saves memory but costs CPU, so small bodies are parsed in one go.
+            # Gzip and chunked bodies carry no Content-Length: read up to the threshold to find out
+            length = response.headers.get("Content-Length")
+            limit = float("inf") if length is not None and int(length) < self.stream_min_bytes \
+                else self.stream_min_bytes
+            head, size = [], 0
+            for chunk in chunks:
+                head.append(chunk)
+                size += len(chunk)
+                if size >= limit:
+                    data = projection.parse(_ChunkReader(itertools.chain(head, chunks)))
+                    break
+            else:
+                data = projection.apply(json.loads(b"".join(head)))
+            for _ in chunks:
+                pass
+        except ReadTimeoutError as e:
+            response.close()
+            raise requests.exceptions.ReadTimeout(e, request=response.request, response=response)
+        except ProtocolError as e:
+            response.close()
+            raise requests.exceptions.ConnectionError(e, request=response.request, response=response)
+        except Exception:
+            response.close()
+            raise
+        # Body fully read: hand the connection back to the pool for reuse
+        response.raw.release_conn()
+        return data
+    
+    def _record(self, url: str, response: requests.Response, elapsed_ms: float) -> None:
+        """Write the exchange to the response recorder when recording is enabled"""
+        recorder = get_recorder()
+        if recorder is None:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        recorder.record(url, response.status_code, elapsed_ms, body)
+    
+    def prewarm(self, connections: int = 2) -> int:
+        """
+        Open pooled TLS connections to the upstream ahead of the first request
+        
+        Sends parallel HEAD requests so the session's pool holds ``connections``
+        established connections. Failures are logged and otherwise ignored.
+        
+        Returns:
+            Number of connections that were opened
+        """
+        if connections <= 0:
+            return 0
+        
+        def open_connection(_):
+            try:
+                self.session.head(self.api_url, timeout=self.timeout)
+                return True
+            except requests.exceptions.RequestException as e:
+                logger.warning("Upstream pre-warm failed: %s", e)
+                return False
+        
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            opened = sum(pool.map(open_connection, range(connections)))
+        logger.info("Pre-warmed %d/%d upstream connections in %.0fms", opened, connections, (time.time() - started) * 1000)
+        return opened
+    
+    def _remember_last_known_good(self, operation: str, data, *args) -> None:
+        """Keep a long-lived copy of a successful payload for breaker fallbacks"""
+        cache_set(f"lkg:{operation}:{make_cache_key(*args)}", data, self.stale_ttl)
+    
+    def _get_last_known_good(self, operation: str, *args):
+        """Get the last successful payload for an operation, if still kept"""
+        return cache_get(f"lkg:{operation}:{make_cache_key(*args)}")
     
     def convert_to_utc(self, timestamp_ms: Optional[int]) -> Optional[str]:
         """Convert timestamp in milliseconds to UTC datetime string"""
@@ -75,7 +424,7 @@ class BVGClient:
             utc_datetime = datetime.fromtimestamp(timestamp_seconds, tz=pytz.UTC)
             return utc_datetime.isoformat()
         except Exception as e:
-            logger.warning(f"Failed to convert timestamp {timestamp_ms}: {e}")
+            logger.warning("Failed to convert timestamp %s: %s", timestamp_ms, e)
             return None
     
     def process_radar_data(self, data: Union[Dict, List]) -> Union[Dict, List]:
@@ -97,72 +446,181 @@ class BVGClient:
     
     def get_radar(self, north: float, south: float, west: float, east: float, 
                   duration: int = 60, frames: int = 10, results: int = 50, 
-                  polylines: bool = True) -> Optional[Dict]:
+                  polylines: bool = True, products: Optional[List[str]] = None) -> Optional[Dict]:
         """Get vehicle radar data for specified geographic area"""
-        url = (f"{self.api_url}/radar?"
-               f"north={north}&south={south}&west={west}&east={east}&"
-               f"duration={duration}&frames={frames}&results={results}&"
-               f"polylines={polylines}")
+        url = self._build_url("/radar", "radar", {
+            "north": north, "south": south, "west": west, "east": east,
+            "duration": duration, "frames": frames, "results": results,
+            "polylines": polylines
+        }, products)
         
         try:
-            data = self._make_request(url)
+            data = self._make_request(url, operation="radar", projection=RADAR_PROJECTION)
             if data:
                 processed_data = self.process_radar_data(data)
+                self._remember_last_known_good("radar", processed_data, url)
                 return processed_data
             return None
+        except ServiceUnavailableException as e:
+            e.stale_data = self._get_last_known_good("radar", url)
+            raise
         except Exception as e:
-            logger.error(f"Unexpected error in get_radar: {e}")
+            logger.error("Unexpected error in get_radar: %s", e)
             return None
     
-    @cached(ttl=300)  # Cache for 5 minutes
     def search_stations(self, query: str, results: int = 10) -> Optional[List[Dict]]:
-        """Search for stations by name - CACHED"""
-        url = f"{self.api_url}/locations?query={query}&results={results}"
+        """
+        Search for stations by name - CACHED
+        
+        Results are cached by normalized query (case, whitespace, diacritics), and a
+        longer query is answered from the complete result set of a shorter prefix
+        when one is cached, so search-as-you-type rarely reaches BVG. BVG itself
+        always gets the query as typed.
+        """
+        normalized = normalize_query(query)
+        if self.autocomplete is not None:
+            stations = self.autocomplete.lookup(normalized, results)
+            if stations is not None:
+                return stations
+        return cache_get_or_fill(
+            f"search:{make_cache_key(normalized, results)}",
+            lambda: self._search_stations(query.strip(), normalized, results),
+            SEARCH_TTL_POLICY  # 5 minutes, longer while results don't change
+        )
+    
+    def cached_stations(self, query: str, results: int = 10) -> Optional[List[Dict]]:
+        """Answer a search from cached result sets only (None when it would need BVG)"""
+        if self.autocomplete is None:
+            return None
+        return self.autocomplete.lookup(normalize_query(query), results)
+    
+    def _search_stations(self, query: str, normalized: str, results: int) -> Union[List[Dict], NegativeResult, None]:
+        """Search BVG for ``query``, keeping what it found under its normalized form"""
+        url = self._build_url("/locations", "search", {"query": query, "results": results})
         
         try:
-            logger.info(f"Searching stations: {query}")
-            data = self._make_request(url)
+            logger.info("Searching stations: %s", query)
+            data = self._make_request(url, operation="search", negative=True)
             
-            if data is None:
-                return None
+            if data is None or isinstance(data, NegativeResult):
+                return data
             
             # Filter only stations/stops
             if isinstance(data, list):
                 stations = [item for item in data if item.get('type') == 'stop']
+                if not stations:
+                    # Cached briefly, like unknown station IDs
+                    return NegativeResult(NegativeResult.EMPTY, value=[])
+                self._remember_last_known_good("search", stations, normalized, results)
+                self._remember_stations(stations)
+                if self.autocomplete is not None:
+                    # Fewer answers than asked for: BVG has no other match for this prefix
+                    self.autocomplete.remember(normalized, results, stations, complete=len(data) < results)
                 return stations
             return []
             
+        except ServiceUnavailableException as e:
+            e.stale_data = self._get_last_known_good("search", normalized, results)
+            raise
         except Exception as e:
-            logger.error(f"Unexpected error in search_stations: {e}")
+            logger.error("Unexpected error in search_stations: %s", e)
             return None
     
-    @cached(ttl=60)  # Cache for 1 minute (departures change frequently)
-    def get_departures(self, station_id: str, duration: int = 60) -> Optional[Dict]:
-        """Get departures for a specific station - CACHED"""
-        url = f"{self.api_url}/stops/{station_id}/departures?duration={duration}"
+    def get_departures(self, station_id: str, duration: int = 60,
+                       products: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Get departures for a specific station - CACHED
         
+        The cache keeps one window per station (and product filter): the widest
+        ``duration`` fetched recently, for as long as DEPARTURES_TTL_POLICY allows. Shorter durations are sliced
+        from it locally and only a longer duration triggers an upstream call.
+        """
+        scope = f"{station_id}:{','.join(products)}" if products else station_id
         try:
-            logger.info(f"Getting departures for station: {station_id}")
-            data = self._make_request(url)
-            
-            if data is None:
-                return None
-            
-            # Process departure times
-            if isinstance(data, dict) and 'departures' in data:
-                for departure in data['departures']:
-                    if 'when' in departure:
-                        # Convert ISO string to more readable format if needed
-                        pass
-                    if 'delay' in departure:
-                        # Process delay information
-                        pass
-            
-            return data
+            window = cache_get_or_fill(
+                f"departures:window:{scope}",
+                lambda: self._fetch_departures_window(station_id, duration, products, scope),
+                DEPARTURES_TTL_POLICY,
+                accept=lambda w: isinstance(w, dict) and w.get("duration", 0) >= duration
+            )
+            if not isinstance(window, dict) or "data" not in window:
+                return window  # None when upstream failed, {} for an unknown station
+            return self._slice_departures(window, duration)
             
+        except ServiceUnavailableException as e:
+            # Any last window helps while upstream is down, even a narrower one
+            window = self._get_last_known_good("departures", scope)
+            if isinstance(window, dict) and "data" in window:
+                e.stale_data = self._slice_departures(window, duration)
+            raise
         except Exception as e:
-            logger.error(f"Unexpected error in get_departures: {e}")
+            logger.error("Unexpected error in get_departures: %s", e)
             return None
+    
+    def _fetch_departures_window(self, station_id: str, duration: int,
+                                 products: Optional[List[str]], scope: str) -> Union[Dict, NegativeResult, None]:
+        """Fetch ``duration`` minutes of departures from upstream as a cacheable window"""
+        url = self._build_url(f"/stops/{station_id}/departures", "departures", {"duration": duration}, products)
+        logger.info("Getting departures for station: %s (%d min)", station_id, duration)
+        data = self._make_request(url, operation="departures", projection=DEPARTURES_PROJECTION, negative=True)
+        
+        if data is None or isinstance(data, NegativeResult):
+            return data
+        
+        station = self._departures_station(data, station_id)
+        if station is not None:
+            self._remember_stations([station])
+            if isinstance(data, dict) and not isinstance(data.get("stop"), dict):
+                data["stop"] = {"type": "stop", "id": station["id"], "name": station["name"]}
+        
+        window = {"duration": duration, "fetched_at": time.time(), "data": data}
+        self._remember_last_known_good("departures", window, scope)
+        return window
+    
+    def _departures_station(self, data: Union[Dict, List], station_id: str) -> Optional[Dict]:
+        """Find the queried station in a departures payload, stripping the per-departure ``stop`` blocks"""
+        found = data.get("stop") if isinstance(data, dict) else None
+        departures = data.get("departures") if isinstance(data, dict) else data
+        for dep in departures if isinstance(departures, list) else []:
+            stop = dep.pop("stop", None) if isinstance(dep, dict) else None
+            if found is not None or not stop:
+                continue
+            # Departures may leave from a platform-level stop inside the station
+            for candidate in (stop, stop.get("station")):
+                if isinstance(candidate, dict) and candidate.get("id") == station_id:
+                    found = candidate
+                    break
+        return found if isinstance(found, dict) else None
+    
+    def _remember_stations(self, stops: List[Dict]) -> None:
+        """Keep the metadata of stations seen upstream in the station store"""
+        store = get_station_store()
+        if store is None:
+            return
+        try:
+            store.upsert(stops)
+        except Exception as e:
+            logger.warning("Failed to update station store: %s", e)
+    
+    def _slice_departures(self, window: Dict, duration: int) -> Dict:
+        """
+        Cut a cached window down to the next ``duration`` minutes
+        
+        The window may be minutes old, so it is cut relative to now, not to when it
+        was fetched: departures already gone are dropped, like a fresh call would.
+        """
+        data = window["data"]
+        if window["duration"] <= duration or not isinstance(data, dict) \
+                or not isinstance(data.get("departures"), list):
+            return data
+        
+        now = time.time()
+        cutoff = now + duration * 60
+        departures = [
+            dep for dep in data["departures"]
+            if (when := departure_timestamp(dep)) is None or now <= when <= cutoff
+        ]
+        return {**data, "departures": departures}
 
 
 # Global singleton instance
@@ -180,6 +638,13 @@ def get_bvg_client() -> BVGClient:
     return _bvg_client
 
 
+def get_autocomplete_stats() -> Optional[Dict]:
+    """Reuse counters of the search-as-you-type cache (None when disabled)"""
+    if _bvg_client is None or _bvg_client.autocomplete is None:
+        return None
+    return _bvg_client.autocomplete.get_stats()
+
+
 def initialize_bvg_client(base_url: str = "https://v6.bvg.transport.rest") -> None:
     """Initialize the global BVG client instance"""
     global _bvg_client
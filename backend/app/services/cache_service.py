@@ -2,13 +2,19 @@
 Redis caching service for BVG API responses
 Implements caching layer to reduce API calls and improve performance
 """
+import asyncio
 import json
 import logging
-from typing import Any, Optional, Callable, TypeVar
+import time
+import uuid
+from typing import Any, Awaitable, Dict, List, Optional, Callable, TypeVar
 from functools import wraps
 import redis.asyncio as redis
 from redis.exceptions import RedisError
 
+from app.config import get_settings
+from app.utils.single_flight import FILLED_CHANNEL, LEASE_PREFIX, RELEASE_SCRIPT, LeaseMetrics
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -29,6 +35,11 @@ class CacheService:
         self.default_ttl = default_ttl
         self.client: Optional[redis.Redis] = None
         self._connected = False
+        # Same lease settings as SimpleCache, so sync and async fills agree on lease lifetimes
+        settings = get_settings()
+        self.lease_ttl = settings.cache_lease_ttl
+        self.lease_wait_timeout = settings.cache_lease_wait_timeout
+        self.lease_metrics = LeaseMetrics()
     
     async def connect(self) -> None:
         """Establish Redis connection"""
@@ -115,6 +126,62 @@ class CacheService:
             logger.error(f"Cache SET error for key {key}: {e}")
             return False
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values with a single MGET
+        
+        Args:
+            keys: Cache keys
+        
+        Returns:
+            The keys that were found, with their values
+        """
+        if not self.is_connected or not keys:
+            return {}
+        
+        try:
+            values = await self.client.mget(keys)
+        except RedisError as e:
+            logger.error(f"Cache MGET error for {len(keys)} keys: {e}")
+            return {}
+        
+        found = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                found[key] = json.loads(value)
+            except json.JSONDecodeError as e:
+                logger.error(f"Cache MGET decode error for key {key}: {e}")
+        logger.debug(f"Cache MGET {len(found)}/{len(keys)} hits")
+        return found
+    
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        Set several values with one pipelined round trip of SETEX
+        
+        Args:
+            items: Key -> value (values must be JSON serializable)
+            ttl: Time-to-live in seconds (uses default if None)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_connected or not items:
+            return False
+        
+        try:
+            ttl = ttl or self.default_ttl
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, json.dumps(value, default=str))
+            await pipe.execute()
+            logger.debug(f"Cache SET {len(items)} keys (TTL: {ttl}s)")
+            return True
+        except (RedisError, TypeError, ValueError) as e:
+            logger.error(f"Cache SET error for {len(items)} keys: {e}")
+            return False
+    
     async def delete(self, key: str) -> bool:
         """
         Delete key from cache
@@ -163,6 +230,88 @@ class CacheService:
             logger.error(f"Cache CLEAR error for pattern {pattern}: {e}")
             return 0
     
+    async def get_or_fill(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Get value from cache, filling it with ``loader`` on a miss
+        
+        The first worker to miss takes a short Redis lease and calls the
+        loader; other workers poll for the filled value and only call the
+        loader themselves if the lease holder does not finish in time.
+        Uses the same lease keys as the sync SimpleCache.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+            ttl: Time-to-live in seconds (uses default if None)
+            
+        Returns:
+            Cached, filled or peer-filled value
+        """
+        value = await self.get(key)
+        if value is not None or not self.is_connected:
+            return value if value is not None else await loader()
+        
+        lease_key = LEASE_PREFIX + key
+        started = time.monotonic()
+        deadline = started + self.lease_wait_timeout
+        waited = False
+        
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await self.client.set(lease_key, token, nx=True, px=int(self.lease_ttl * 1000))
+            except RedisError as e:
+                logger.warning(f"Lease acquire failed, fetching without lease: {e}")
+                acquired = True
+            
+            if acquired:
+                self.lease_metrics.incr("leases_acquired")
+                try:
+                    result = await loader()
+                    if result is not None:
+                        await self.set(key, result, ttl)
+                    return result
+                finally:
+                    await self._release_lease(lease_key, token, key)
+            
+            if not waited:
+                self.lease_metrics.incr("lease_waits")
+                waited = True
+            
+            # Poll with backoff until the value shows up or the lease goes away
+            interval = 0.01
+            while time.monotonic() < deadline:
+                await asyncio.sleep(interval)
+                value = await self.get(key)
+                if value is not None:
+                    self.lease_metrics.incr("filled_by_peer")
+                    self.lease_metrics.observe_wait(time.monotonic() - started)
+                    return value
+                try:
+                    if not await self.client.exists(lease_key):
+                        break
+                except RedisError:
+                    break
+                interval = min(interval * 1.5, 0.1)
+            
+            if time.monotonic() >= deadline:
+                self.lease_metrics.incr("lease_expired")
+                self.lease_metrics.observe_wait(time.monotonic() - started)
+                return await loader()
+    
+    async def _release_lease(self, lease_key: str, token: str, key: str) -> None:
+        """Drop our lease (if still ours) and wake up waiting workers"""
+        try:
+            await self.client.eval(RELEASE_SCRIPT, 1, lease_key, token)
+            await self.client.publish(FILLED_CHANNEL, key)
+        except RedisError as e:
+            logger.warning(f"Lease release failed: {e}")
+    
     def cache_key(self, prefix: str, *args, **kwargs) -> str:
         """
         Generate a cache key from prefix and arguments
@@ -213,19 +362,8 @@ def cached(
             else:
                 key = cache.cache_key(prefix, *args, **kwargs)
             
-            # Try cache first
-            cached_value = await cache.get(key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Cache miss - call function
-            result = await func(self, *args, **kwargs)
-            
-            # Store in cache
-            if result is not None:
-                await cache.set(key, result, ttl)
-            
-            return result
+            # Try cache first; on a miss only one worker calls the function
+            return await cache.get_or_fill(key, lambda: func(self, *args, **kwargs), ttl)
         
         return wrapper
     return decorator
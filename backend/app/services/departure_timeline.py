@@ -0,0 +1,139 @@
+"""
+Per-station departure timelines for incremental refreshes
+Successive departures results for the same board (station, products,
+duration) are folded into a timeline keyed by stop event. Every change bumps a
+monotonically increasing version, so a client that already holds version N
+only needs the departures added, changed or removed since N.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import itertools
+import os
+import time
+
+# Versions start from the process start time, so they keep increasing across restarts,
+# and carry the worker in the low bits, so a version from another worker is never mistaken for ours
+_counter = itertools.count(int(time.time() * 1000))
+_worker = os.getpid() % 1024
+
+
+def _next_version() -> int:
+    # Stays below 2**53, so JavaScript clients read it exactly
+    return next(_counter) * 1024 + _worker
+
+
+def departure_key(departure: Dict) -> str:
+    """
+    Stable key of one stop event: trip ID and planned time (a ring line trip can
+    pass the same station twice), or line, direction and time when BVG sent no trip ID
+    """
+    planned = departure.get("plannedWhen") or departure.get("when")
+    if departure.get("tripId"):
+        return f"{departure['tripId']}|{planned}"
+    line = departure.get("line") or {}
+    return f"{line.get('name')}|{departure.get('direction')}|{planned}"
+
+
+class DepartureTimeline:
+    """Departures of one board with the version each one last changed in"""
+
+    def __init__(self, history: int = 50):
+        """
+        Args:
+            history: Versions a client may lag behind and still get a delta
+        """
+        self.history = history
+        self.version = _next_version()
+        self._entries: Dict[str, Tuple[Any, int, int]] = {}  # key -> (departure, added, changed)
+        self._removed: Dict[str, int] = {}  # key -> version it disappeared in
+        self._versions: List[int] = [self.version]
+
+    def update(self, current: Dict[str, Any]) -> int:
+        """
+        Fold in a fresh result
+
+        Args:
+            current: Departures by departure_key(), compared with == against the previous result
+
+        Returns:
+            The timeline's version, bumped only if something changed
+        """
+        changes = [
+            key for key, departure in current.items()
+            if key not in self._entries or self._entries[key][0] != departure
+        ]
+        gone = [key for key in self._entries if key not in current]
+        if not changes and not gone:
+            return self.version
+
+        version = _next_version()
+        for key in changes:
+            added = self._entries[key][1] if key in self._entries else version
+            self._entries[key] = (current[key], added, version)
+            self._removed.pop(key, None)
+        for key in gone:
+            del self._entries[key]
+            self._removed[key] = version
+
+        self.version = version
+        self._versions.append(version)
+        if len(self._versions) > self.history:
+            del self._versions[:-self.history]
+            oldest = self._versions[0]
+            self._removed = {key: v for key, v in self._removed.items() if v > oldest}
+        return version
+
+    def delta(self, since: int) -> Optional[Dict]:
+        """
+        Changes after version ``since``
+
+        Returns:
+            {"added", "changed", "removed"}, or None when ``since`` is not a
+            version this timeline still remembers (too old, or from another worker)
+        """
+        if since not in self._versions:
+            return None
+        added, changed = [], []
+        for departure, added_in, changed_in in self._entries.values():
+            if added_in > since:
+                added.append(departure)
+            elif changed_in > since:
+                changed.append(departure)
+        removed = [key for key, version in self._removed.items() if version > since]
+        return {"added": added, "changed": changed, "removed": removed}
+
+
+class TimelineStore:
+    """Timelines of the most recently refreshed boards"""
+
+    def __init__(self, max_timelines: int = 2000, history: int = 50):
+        self.max_timelines = max_timelines
+        self.history = history
+        self._timelines: "OrderedDict[str, DepartureTimeline]" = OrderedDict()
+        self.deltas = 0
+        self.fallbacks = 0  # full snapshots sent for an unknown ``since``
+
+    def get(self, board: str) -> DepartureTimeline:
+        timeline = self._timelines.get(board)
+        if timeline is None:
+            timeline = self._timelines[board] = DepartureTimeline(self.history)
+            if len(self._timelines) > self.max_timelines:
+                self._timelines.popitem(last=False)
+        self._timelines.move_to_end(board)
+        return timeline
+
+    def get_stats(self) -> dict:
+        return {
+            "timelines": len(self._timelines),
+            "deltas": self.deltas,
+            "fallbacks": self.fallbacks
+        }
+
+
+# Global timelines; only touched from the event loop, so no locking is needed
+_timelines = TimelineStore()
+
+
+def get_timelines() -> TimelineStore:
+    """Get the departure timelines of this worker"""
+    return _timelines
@@ -0,0 +1,137 @@
+"""
+Recording of upstream BVG responses
+Writes every upstream exchange to gzip-compressed NDJSON segments so traffic
+can be replayed offline by scripts/bvg_standin.py
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = "bvg-*.ndjson.gz"
+
+
+class ResponseRecorder:
+    """Append-only recorder writing rotated gzip NDJSON segments"""
+
+    def __init__(self, directory: str, max_records_per_segment: int = 1000):
+        """
+        Args:
+            directory: Directory for segment files (created if missing)
+            max_records_per_segment: Records per segment before rotating
+        """
+        self.directory = directory
+        self.max_records_per_segment = max_records_per_segment
+        self._lock = threading.Lock()
+        self._file = None
+        self._records_in_segment = 0
+        self._segment_index = 0
+        self._total_records = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, url: str, status: int, elapsed_ms: float, body: Any) -> None:
+        """
+        Append one upstream exchange
+
+        Args:
+            url: Full upstream URL that was requested
+            status: HTTP status code returned
+            elapsed_ms: Upstream latency in milliseconds
+            body: Parsed JSON body (or text for non-JSON responses)
+        """
+        parts = urlsplit(url)
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "method": "GET",
+            "path": parts.path,
+            "query": dict(parse_qsl(parts.query)),
+            "status": status,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "body": body
+        }
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+
+        with self._lock:
+            try:
+                if self._file is None or self._records_in_segment >= self.max_records_per_segment:
+                    self._rotate()
+                self._file.write(line.encode("utf-8"))
+                self._records_in_segment += 1
+                self._total_records += 1
+            except OSError as e:
+                logger.warning(f"Failed to record upstream response: {e}")
+
+    def close(self) -> None:
+        """Flush and close the current segment"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> dict:
+        """Get recorder statistics"""
+        return {
+            "directory": self.directory,
+            "segments": self._segment_index,
+            "records": self._total_records
+        }
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._segment_index += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        filename = f"bvg-{stamp}-{os.getpid()}-{self._segment_index:04d}.ndjson.gz"
+        self._file = gzip.open(os.path.join(self.directory, filename), "wb")
+        self._records_in_segment = 0
+        logger.info(f"Recording upstream responses to {filename}")
+
+
+def iter_recordings(directory: str) -> Iterator[Dict]:
+    """
+    Read all recorded exchanges from a directory, oldest segment first
+
+    Truncated segments (e.g. from a crashed process) are read up to the
+    last complete record.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN))):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Stopped reading truncated segment {path}: {e}")
+
+
+# Global recorder, only set when recording is enabled
+_recorder: Optional[ResponseRecorder] = None
+
+
+def get_recorder() -> Optional[ResponseRecorder]:
+    """Get the active recorder, or None when recording is disabled"""
+    return _recorder
+
+
+def initialize_recorder(directory: Optional[str]) -> Optional[ResponseRecorder]:
+    """Enable recording into ``directory`` (no-op when directory is empty)"""
+    global _recorder
+    if directory:
+        _recorder = ResponseRecorder(directory)
+    return _recorder
+
+
+def shutdown_recorder() -> None:
+    """Close the active recorder"""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
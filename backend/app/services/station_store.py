@@ -0,0 +1,311 @@
+"""
+Persistent station metadata store
+Keeps every station seen in search and departures responses (name, location,
+served products) in SQLite, behind an in-memory read-through LRU, so station
+pages get complete metadata without an upstream call and the data survives
+restarts. It can also be bulk-loaded from a stops file.
+"""
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    products TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Known fields are never overwritten with unknown ones (departures carry no products)
+UPSERT = """
+INSERT INTO stations (id, name, latitude, longitude, products, updated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    name = excluded.name,
+    latitude = COALESCE(excluded.latitude, latitude),
+    longitude = COALESCE(excluded.longitude, longitude),
+    products = COALESCE(excluded.products, products),
+    updated_at = excluded.updated_at
+"""
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+# Rows written per transaction by bulk loads; readers get the lock in between
+LOAD_CHUNK = 1000
+
+
+def station_record(stop) -> Optional[Dict]:
+    """
+    Turn a BVG stop/station object into a store record
+
+    Returns:
+        {"id", "name", "location", "products"}, or None if the object is not a usable station
+    """
+    if not isinstance(stop, dict) or not stop.get("id") or not stop.get("name"):
+        return None
+    location = stop.get("location")
+    try:
+        location = {"latitude": float(location["latitude"]), "longitude": float(location["longitude"])}
+    except (TypeError, KeyError, ValueError):
+        location = None
+    products = stop.get("products")
+    if isinstance(products, dict):
+        products = [name for name, served in products.items() if served]
+    elif not isinstance(products, list):
+        products = None
+    return {"id": str(stop["id"]), "name": stop["name"], "location": location, "products": products}
+
+
+def _merge(old: Dict, new: Dict) -> Dict:
+    return {key: new[key] if new[key] is not None else old.get(key) for key in new}
+
+
+class StationStore:
+    """SQLite station table with an in-memory read-through cache"""
+
+    def __init__(self, path: str, cache_size: int = 20000, miss_ttl: float = 30.0):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            cache_size: Stations kept in memory
+            miss_ttl: Seconds an unknown ID is answered from memory; other
+                workers sharing the file may learn the station meanwhile
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.miss_ttl = miss_ttl
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._misses: "OrderedDict[str, float]" = OrderedDict()  # unknown ID -> expiry (monotonic)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.unchanged = 0
+
+    def get(self, station_id: str) -> Optional[Dict]:
+        """Look up one station (None when unknown)"""
+        return self.get_many([station_id]).get(station_id)
+
+    def get_many(self, station_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Look up several stations, reading SQLite once for all of them that are not in memory
+
+        Returns:
+            Records by ID; unknown IDs are left out
+        """
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for station_id in dict.fromkeys(station_ids):
+                if station_id in self._cache:
+                    self._cache.move_to_end(station_id)
+                    found[station_id] = self._cache[station_id]
+                    self.hits += 1
+                elif self._misses.get(station_id, 0) > now:
+                    self.hits += 1
+                else:
+                    missing.append(station_id)
+            self.misses += len(missing)
+
+            for start in range(0, len(missing), LOOKUP_CHUNK):
+                chunk = missing[start:start + LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT id, name, latitude, longitude, products FROM stations "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._remember(row[0], _from_row(row))
+                # Remember unknown IDs briefly too, so repeated misses stay off SQLite
+                for station_id in chunk:
+                    if station_id not in found:
+                        self._remember_miss(station_id, now + self.miss_ttl)
+        return found
+
+    def upsert(self, stops: Iterable) -> int:
+        """
+        Store stations from BVG stop objects, skipping ones already known as-is
+
+        Returns:
+            Number of stations written
+        """
+        records = [record for record in map(station_record, stops) if record is not None]
+        if not records:
+            return 0
+        now = time.time()
+        rows = []
+        with self._lock:
+            for record in records:
+                self._misses.pop(record["id"], None)
+                old = self._cache.get(record["id"])
+                if old is not None:
+                    record = _merge(old, record)
+                    if record == old:
+                        self.unchanged += 1
+                        continue
+                    self._remember(record["id"], record)
+                elif None not in record.values():
+                    self._remember(record["id"], record)
+                else:
+                    # Partial and not in memory: SQLite merges it with what it has, read back on demand
+                    self._cache.pop(record["id"], None)
+                rows.append(_to_row(record, now))
+            if rows:
+                self._write(rows)
+        return len(rows)
+
+    def load_file(self, path: str) -> int:
+        """
+        Bulk-load stations from a stops file
+
+        Accepts GTFS ``stops.txt``/CSV (stop_id, stop_name, stop_lat, stop_lon,
+        or id, name, latitude, longitude, products), a JSON list or ID-keyed
+        object of BVG stop objects, or NDJSON.
+
+        Returns:
+            Number of stations loaded (0 if the file could not be read)
+        """
+        now = time.time()
+        try:
+            rows = [_to_row(record, now) for record in map(station_record, _read_stops(path)) if record is not None]
+        except (OSError, ValueError, csv.Error) as e:
+            logger.warning(f"Failed to load stations from {path}: {e}")
+            return 0
+        # One transaction per chunk, so lookups are not held up for the whole file
+        for start in range(0, len(rows), LOAD_CHUNK):
+            chunk = rows[start:start + LOAD_CHUNK]
+            with self._lock:
+                self._write(chunk)
+                for row in chunk:
+                    self._cache.pop(row[0], None)
+                    self._misses.pop(row[0], None)
+        logger.info(f"Loaded {len(rows)} stations from {path}")
+        return len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "stations": self.count(),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "unchanged": self.unchanged
+        }
+
+    def _write(self, rows: List[tuple]) -> None:
+        try:
+            self._db.execute("BEGIN")
+            self._db.executemany(UPSERT, rows)
+            self._db.execute("COMMIT")
+            self.writes += len(rows)
+        except sqlite3.Error as e:
+            self._db.execute("ROLLBACK")
+            logger.warning(f"Failed to store {len(rows)} stations: {e}")
+
+    def _remember(self, station_id: str, record: Dict) -> Dict:
+        self._cache[station_id] = record
+        self._cache.move_to_end(station_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def _remember_miss(self, station_id: str, expires_at: float) -> None:
+        self._misses[station_id] = expires_at
+        self._misses.move_to_end(station_id)
+        if len(self._misses) > self.cache_size:
+            self._misses.popitem(last=False)
+
+
+def _to_row(record: Dict, now: float) -> tuple:
+    location = record["location"] or {}
+    products = ",".join(record["products"]) if record["products"] is not None else None
+    return (record["id"], record["name"], location.get("latitude"), location.get("longitude"), products, now)
+
+
+def _from_row(row: tuple) -> Dict:
+    station_id, name, latitude, longitude, products = row
+    return {
+        "id": station_id,
+        "name": name,
+        "location": {"latitude": latitude, "longitude": longitude} if latitude is not None else None,
+        "products": [p for p in products.split(",") if p] if products is not None else None
+    }
+
+
+def _read_stops(path: str) -> Iterator[Dict]:
+    """Stop objects from a stops file, in the shape station_record() reads"""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        yield from data.values() if isinstance(data, dict) else data
+    elif path.endswith(".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                latitude = row.get("stop_lat") or row.get("latitude")
+                longitude = row.get("stop_lon") or row.get("longitude")
+                products = row.get("products")
+                yield {
+                    "id": row.get("stop_id") or row.get("id"),
+                    "name": row.get("stop_name") or row.get("name"),
+                    "location": {"latitude": latitude, "longitude": longitude} if latitude and longitude else None,
+                    "products": [p for p in products.replace(";", " ").split() if p] if products else None
+                }
+
+
+# Global store, only set when a store path is configured
+_station_store: Optional[StationStore] = None
+
+
+def get_station_store() -> Optional[StationStore]:
+    """Get the station store, or None when it is disabled"""
+    return _station_store
+
+
+def initialize_station_store(path: Optional[str], cache_size: int = 20000) -> Optional[StationStore]:
+    """Open the station store at ``path`` (no-op when path is empty)"""
+    global _station_store
+    if path:
+        try:
+            _station_store = StationStore(path, cache_size)
+        except sqlite3.Error as e:
+            logger.warning(f"Station store unavailable ({path}): {e}")
+    return _station_store
+
+
+def shutdown_station_store() -> None:
+    global _station_store
+    if _station_store is not None:
+        _station_store.close()
+        _station_store = None
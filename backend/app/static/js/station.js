@@ -3,27 +3,51 @@
 let autoRefreshInterval;
 const AUTO_REFRESH_SECONDS = 30;
 
+// Departures on screen by id, and the server version they correspond to
+let board = { version: null, duration: null, departures: new Map() };
+
 document.addEventListener('DOMContentLoaded', () => {
     loadDepartures();
     setupControls();
     startAutoRefresh();
 });
 
-// Load departures for the station
-async function loadDepartures() {
+// Load departures for the station (incremental: only fetch what changed since the last load)
+async function loadDepartures(incremental = false) {
     const duration = document.getElementById('durationSelect').value;
     const container = document.getElementById('departuresContainer');
+    const useDelta = incremental && board.version !== null && board.duration === duration;
     
-    container.innerHTML = '<div class="loading">Loading departures...</div>';
+    if (!useDelta) {
+        container.innerHTML = '<div class="loading">Loading departures...</div>';
+    }
     
     try {
-        const response = await fetch(`/api/departures/${STATION_ID}?duration=${duration}`);
+        let url = `/api/departures/${STATION_ID}?duration=${duration}`;
+        if (useDelta) {
+            url += `&since=${board.version}`;
+        }
+        const response = await fetch(url);
         
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
         const data = await response.json();
+        if (data.since !== undefined) {
+            if (!applyDelta(data)) {
+                // Nothing changed: keep the table, just refresh the timestamp
+                updateLastUpdate(data.realtimeDataUpdatedAt);
+                return;
+            }
+            data.departures = boardDepartures();
+        } else {
+            board = {
+                version: data.version ?? null,
+                duration: duration,
+                departures: new Map(data.departures.map(dep => [dep.id, dep]))
+            };
+        }
         displayDepartures(data);
         updateStationInfo(data.station);
         
@@ -33,6 +57,30 @@ async function loadDepartures() {
     }
 }
 
+// Merge a delta response into the board; false when nothing changed
+function applyDelta(delta) {
+    board.version = delta.version;
+    if (!delta.added.length && !delta.changed.length && !delta.removed.length) {
+        return false;
+    }
+    delta.removed.forEach(id => board.departures.delete(id));
+    delta.added.concat(delta.changed).forEach(dep => board.departures.set(dep.id, dep));
+    return true;
+}
+
+// Departures on the board in departure order
+function boardDepartures() {
+    return [...board.departures.values()].sort((a, b) => (Date.parse(a.when) || 0) - (Date.parse(b.when) || 0));
+}
+
+function updateLastUpdate(realtimeDataUpdatedAt) {
+    if (realtimeDataUpdatedAt) {
+        const updateTime = new Date(realtimeDataUpdatedAt);
+        document.getElementById('lastUpdate').textContent = 
+            `Last updated: ${updateTime.toLocaleString()}`;
+    }
+}
+
 // Update station info in header
 function updateStationInfo(station) {
     document.getElementById('stationName').textContent = station.name;
@@ -49,11 +97,7 @@ function displayDepartures(data) {
     }
     
     // Update last update time
-    if (data.realtimeDataUpdatedAt) {
-        const updateTime = new Date(data.realtimeDataUpdatedAt);
-        document.getElementById('lastUpdate').textContent = 
-            `Last updated: ${updateTime.toLocaleString()}`;
-    }
+    updateLastUpdate(data.realtimeDataUpdatedAt);
     
     // Create departures table
     const table = document.createElement('table');
@@ -144,7 +188,7 @@ function setupControls() {
 // Auto-refresh functionality
 function startAutoRefresh() {
     autoRefreshInterval = setInterval(() => {
-        loadDepartures();
+        loadDepartures(true);
     }, AUTO_REFRESH_SECONDS * 1000);
 }
 
@@ -1,6 +1,6 @@
 """
 Utility modules for the backend
 """
-from .cache import cached, clear_cache, get_cache_stats, cleanup_cache
+from .cache import NegativeResult, cached, cache_get, cache_get_many, cache_get_or_fill, cache_set, cache_set_many, clear_cache, get_cache_stats, cleanup_cache
 
-__all__ = ['cached', 'clear_cache', 'get_cache_stats', 'cleanup_cache']
+__all__ = ['NegativeResult', 'cached', 'cache_get', 'cache_get_many', 'cache_get_or_fill', 'cache_set', 'cache_set_many', 'clear_cache', 'get_cache_stats', 'cleanup_cache']
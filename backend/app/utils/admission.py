@@ -0,0 +1,215 @@
+"""
+Admission control and load shedding for the JSON API
+Each route class has a concurrency limit and a bounded FIFO queue with a
+wait deadline. Under overload (full queues, event-loop lag, or higher
+priority requests waiting) low-priority routes are shed first with a fast
+503 + Retry-After so departures keep their latency.
+"""
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOW = 0
+NORMAL = 1
+CRITICAL = 2
+
+
+class ShedException(Exception):
+    """Request rejected by admission control"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteClass:
+    """Concurrency limit and wait queue shared by a group of routes"""
+
+    def __init__(self, name: str, priority: int, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Counter = Counter()
+
+    def get_stats(self) -> dict:
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self.waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values())
+        }
+
+
+class AdmissionController:
+    """
+    Admit, queue or shed API requests by route class
+
+    Args:
+        classes: Route classes
+        routes: (path prefix, class name) pairs, first match wins; paths
+            matching no prefix are not limited
+        lag_threshold: Event-loop lag (seconds) above which LOW routes are
+            shed; above twice this, NORMAL routes too
+        lag_source: Returns the current loop lag in seconds
+        retry_after: Seconds clients are told to wait after a 503
+    """
+
+    def __init__(self, classes: List[RouteClass], routes: List[Tuple[str, str]],
+                 lag_threshold: float = 0.2, lag_source: Optional[Callable[[], float]] = None,
+                 retry_after: int = 2):
+        self.classes: Dict[str, RouteClass] = {c.name: c for c in classes}
+        self.routes = [(prefix, self.classes[name]) for prefix, name in routes]
+        self.lag_threshold = lag_threshold
+        self.lag_source = lag_source
+        self.retry_after = retry_after
+
+    def classify(self, path: str) -> Optional[RouteClass]:
+        for prefix, route_class in self.routes:
+            if path.startswith(prefix):
+                return route_class
+        return None
+
+    def _overload_reason(self, route_class: RouteClass) -> Optional[str]:
+        """Why a request of this class must be shed before queueing, if at all"""
+        if route_class.priority >= CRITICAL:
+            return None
+        if self.lag_source is not None:
+            lag = self.lag_source()
+            if lag > self.lag_threshold * (2 if route_class.priority == NORMAL else 1):
+                return "loop_lag"
+        # Don't start lower-priority work while more important requests wait for a slot
+        for other in self.classes.values():
+            if other.priority > route_class.priority and other.waiters:
+                return "priority"
+        return None
+
+    def _reject(self, route_class: RouteClass, reason: str):
+        route_class.shed[reason] += 1
+        raise ShedException(reason, self.retry_after)
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        """Take a slot, waiting in line up to the class deadline; raises ShedException"""
+        reason = self._overload_reason(route_class)
+        if reason:
+            self._reject(route_class, reason)
+        if route_class.in_flight < route_class.limit and not route_class.waiters:
+            route_class.in_flight += 1
+            route_class.admitted += 1
+            return
+        if len(route_class.waiters) >= route_class.queue_size:
+            self._reject(route_class, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        route_class.queued += 1
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(waiter, route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(route_class, waiter)
+            self._reject(route_class, "queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(route_class)
+            else:
+                self._discard(route_class, waiter)
+            raise
+        route_class.admitted += 1
+
+    def release(self, route_class: RouteClass) -> None:
+        """Free a slot, handing it to the next request in line"""
+        while route_class.waiters:
+            waiter = route_class.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        route_class.in_flight -= 1
+
+    @staticmethod
+    def _discard(route_class: RouteClass, waiter: asyncio.Future) -> None:
+        try:
+            route_class.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            "lag_threshold_ms": self.lag_threshold * 1000,
+            "classes": {name: c.get_stats() for name, c in self.classes.items()},
+            "shed_total": sum(sum(c.shed.values()) for c in self.classes.values())
+        }
+
+
+SHED_BODY = json.dumps(
+    {"detail": "El servidor está sobrecargado. Por favor, intenta de nuevo en unos segundos."}
+).encode("utf-8")
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route_class = self.controller.classify(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(route_class)
+        except ShedException as e:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(SHED_BODY)).encode()),
+                    (b"retry-after", str(e.retry_after).encode()),
+                    (b"x-shed-reason", e.reason.encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": SHED_BODY})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
+
+
+def create_admission_controller(settings, lag_source: Optional[Callable[[], float]] = None) -> AdmissionController:
+    """Route classes for this API: departures are protected, radar and lists go first"""
+    timeout = settings.admission_queue_timeout
+    queue_size = settings.admission_queue_size
+    classes = [
+        RouteClass("critical", CRITICAL, settings.admission_concurrency_critical, queue_size, timeout * 2),
+        RouteClass("normal", NORMAL, settings.admission_concurrency_normal, queue_size, timeout),
+        RouteClass("low", LOW, settings.admission_concurrency_low, max(1, queue_size // 4), timeout / 4),
+    ]
+    routes = [
+        ("/api/departures/", "critical"),
+        ("/api/radar/", "low"),
+        ("/api/stations/featured", "low"),
+        ("/api/stations/all", "low"),
+        ("/api/stations/", "normal"),
+    ]
+    return AdmissionController(classes, routes, settings.admission_lag_threshold, lag_source,
+                               settings.admission_retry_after)
@@ -0,0 +1,148 @@
+"""
+Search-as-you-type support for station search
+Queries are normalized (case, whitespace, diacritics) before caching. When
+BVG returned fewer stations than asked for, the result set is complete: every
+station matching a longer query typed on top of it is already in the set, so
+"Alexa" and "Alexan" are answered by filtering the cached "Alex" results
+instead of going upstream. A per-session debouncer lets only the last query
+of a typing burst reach BVG.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+
+from app.utils.cache import cache_get_many, cache_set
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "autocomplete:"
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_query(text: str) -> str:
+    """Fold case and diacritics and collapse punctuation/whitespace ("  S+U Görlitzer " -> "s u gorlitzer")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", stripped.casefold()).strip()
+
+
+def matches(name: str, tokens: List[str]) -> bool:
+    """Whether every query token starts a word of the station name"""
+    words = normalize_query(name).split()
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+class AutocompleteCache:
+    """Result sets of station searches by normalized query, reusable by longer queries"""
+
+    def __init__(self, ttl: int = 300, min_chars: int = 2):
+        """
+        Args:
+            ttl: Seconds a result set is kept
+            min_chars: Shortest prefix whose result set is reused
+        """
+        self.ttl = ttl
+        self.min_chars = min_chars
+        self.exact_hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def lookup(self, normalized: str, results: int) -> Optional[List[Dict]]:
+        """
+        Answer a query from cached result sets, with one cache round trip
+
+        Returns:
+            Up to ``results`` stations, or None when the query has to go upstream
+        """
+        if len(normalized) < self.min_chars:
+            return None
+        prefixes = list(dict.fromkeys(
+            normalized[:end].rstrip() for end in range(len(normalized), self.min_chars - 1, -1)
+        ))
+        entries = cache_get_many([KEY_PREFIX + prefix for prefix in prefixes])
+
+        exact = entries.get(KEY_PREFIX + normalized)
+        if exact is not None and (exact["complete"] or exact["results"] >= results):
+            self.exact_hits += 1
+            return exact["stations"][:results]
+
+        tokens = normalized.split()
+        for prefix in prefixes[1:]:
+            entry = entries.get(KEY_PREFIX + prefix)
+            if entry is None or not entry["complete"]:
+                continue
+            found = [station for station in entry["stations"] if matches(station.get("name", ""), tokens)]
+            # BVG matches fuzzily (typos, abbreviations); an empty local answer is not trusted
+            if found:
+                self.prefix_hits += 1
+                return found[:results]
+            break
+        self.misses += 1
+        return None
+
+    def remember(self, normalized: str, results: int, stations: List[Dict], complete: bool) -> None:
+        """
+        Keep an upstream result set
+
+        Args:
+            results: Number of results asked from BVG
+            complete: BVG returned fewer than ``results``, so nothing is missing
+        """
+        cache_set(KEY_PREFIX + normalized, {"stations": stations, "results": results, "complete": complete}, self.ttl)
+
+    def get_stats(self) -> dict:
+        return {
+            "exact_hits": self.exact_hits,
+            "prefix_hits": self.prefix_hits,
+            "misses": self.misses
+        }
+
+
+class SearchDebouncer:
+    """
+    Let only the last query of a typing burst from one session go upstream
+
+    The first query after a pause runs at once. Queries arriving less than
+    ``delay`` after the session's previous one wait ``delay`` seconds and are
+    superseded if another query from the session arrived in the meantime.
+    """
+
+    def __init__(self, delay: float = 0.15, max_sessions: int = 10000):
+        self.delay = delay
+        self.max_sessions = max_sessions
+        self.superseded = 0
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._seq = 0
+
+    async def settle(self, session: str) -> bool:
+        """Wait out a typing burst; False if a newer query from the session arrived meanwhile"""
+        if self.delay <= 0:
+            return True
+        now = time.monotonic()
+        self._seq += 1
+        seq = self._seq
+        previous = self._sessions.get(session)
+        self._sessions[session] = (seq, now)
+        self._sessions.move_to_end(session)
+        if len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        if previous is None or now - previous[1] >= self.delay:
+            return True
+
+        await asyncio.sleep(self.delay)
+        latest = self._sessions.get(session)
+        if latest is not None and latest[0] != seq:
+            self.superseded += 1
+            return False
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "delay_ms": self.delay * 1000,
+            "sessions": len(self._sessions),
+            "superseded": self.superseded
+        }
@@ -3,15 +3,58 @@ Simple cache for API responses with Redis fallback
 Reduces latency for repeated queries
 """
 from datetime import datetime, timedelta
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 from functools import wraps
 import hashlib
 import json
 import logging
 import os
+import threading
+import time
+
+from app.config import get_settings
+from app.utils.cache_snapshot import read_snapshot, write_snapshot
+from app.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# A fixed TTL in seconds, or a policy called with (key, value) that returns one
+TTL = Union[int, Callable[[str, Any], int]]
+
+# Marker key of cached negative results (see NegativeResult)
+NEGATIVE_KEY = "__negative__"
+
+
+class NegativeResult:
+    """
+    Loader result for "nothing there" or "upstream failed"
+    
+    Returned by a loader passed to get_or_fill / @cached, it is stored as a
+    small marker with its own short TTL (instead of the value's TTL) and read
+    back as ``value``, so repeated bad lookups are answered locally.
+    
+    Kinds:
+        NOT_FOUND: the upstream does not know the requested ID (404)
+        EMPTY: the upstream had no results
+        ERROR: any other failure (5xx, timeout, other 4xx); cached only very briefly
+    """
+    
+    NOT_FOUND = "not_found"
+    EMPTY = "empty"
+    ERROR = "error"
+    
+    def __init__(self, kind: str, value: Any = None):
+        self.kind = kind
+        self.value = value
+    
+    def marker(self) -> dict:
+        return {NEGATIVE_KEY: self.kind, "value": self.value}
+
+
+def is_negative(value: Any) -> bool:
+    """Check whether a cached value is a negative-result marker"""
+    return isinstance(value, dict) and NEGATIVE_KEY in value
+
 # Try to import Redis, fall back to in-memory if not available
 try:
     import redis
@@ -29,84 +72,415 @@ class SimpleCache:
         self._misses = 0
         self._redis_client = None
         self._use_redis = False
+        # Coherence bus for multi-worker mode (see attach_bus)
+        self._bus = None
+        self._l1_ttl = 5
+        # Shared-memory store for workers on one host without Redis (see attach_shared)
+        self._shared = None
         
-        # Try to connect to Redis
+        # Redis is connected on first use (or by connect() during startup), never here,
+        # so importing the app stays fast and a Redis outage at boot is not permanent
+        settings = get_settings()
+        self._reconnect_interval = settings.cache_reconnect_interval
+        # Negative results live much shorter than values; errors shortest of all
+        self._negative_ttls = {
+            NegativeResult.NOT_FOUND: settings.cache_negative_ttl,
+            NegativeResult.EMPTY: settings.cache_negative_ttl,
+            NegativeResult.ERROR: settings.cache_error_ttl,
+        }
+        self._negative_hits = 0
+        self._negative_stored = 0
+        self._next_connect: Optional[float] = None
+        self._reconnecting = False
+        self._connect_lock = threading.Lock()
+        
+        # Concurrent misses for one key trigger a single fill (Redis lease across workers)
+        self._single_flight = SingleFlight(
+            lease_ttl=settings.cache_lease_ttl,
+            wait_timeout=settings.cache_lease_wait_timeout
+        )
+    
+    def connect(self) -> bool:
+        """
+        Try to connect to Redis now (blocking)
+        
+        Returns:
+            True if Redis is in use afterwards
+        """
         if REDIS_AVAILABLE:
-            try:
-                redis_host = os.getenv("REDIS_HOST", "localhost")
-                redis_port = int(os.getenv("REDIS_PORT", "6379"))
-                redis_db = int(os.getenv("REDIS_DB", "0"))
-                
-                self._redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True,
-                    socket_connect_timeout=2
-                )
-                # Test connection
-                self._redis_client.ping()
-                self._use_redis = True
-                logger.info(f"Redis cache connected at {redis_host}:{redis_port}")
-            except Exception as e:
-                logger.warning(f"Failed to connect to Redis: {e}. Using in-memory cache.")
-                self._redis_client = None
-                self._use_redis = False
+            with self._connect_lock:
+                if not self._use_redis:
+                    self._try_connect()
+        return self._use_redis
+    
+    def _try_connect(self):
+        """Ping Redis and switch to it on success (caller holds the connect lock)"""
+        self._next_connect = time.monotonic() + self._reconnect_interval
+        try:
+            redis_host = os.getenv("REDIS_HOST", "localhost")
+            redis_port = int(os.getenv("REDIS_PORT", "6379"))
+            redis_db = int(os.getenv("REDIS_DB", "0"))
+            
+            client = redis.Redis(
+                host=redis_host,
+                port=redis_port,
+                db=redis_db,
+                decode_responses=True,
+                socket_connect_timeout=2
+            )
+            # Test connection
+            client.ping()
+        except Exception as e:
+            logger.warning(f"Failed to connect to Redis: {e}. Using in-memory cache.")
+            return
+        
+        # Entries cached in memory while Redis was down must not shadow Redis as an L1
+        self._cache.clear()
+        self._redis_client = client
+        self._use_redis = True
+        self._single_flight.set_redis(client)
+        logger.info(f"Redis cache connected at {redis_host}:{redis_port}")
+    
+    def _ensure_connected(self):
+        """Connect on first use; while Redis is down, retry periodically in the background"""
+        if self._use_redis or not REDIS_AVAILABLE:
+            return
+        if self._next_connect is None:
+            with self._connect_lock:
+                if self._next_connect is None:
+                    self._try_connect()
+        elif time.monotonic() >= self._next_connect and not self._reconnecting:
+            self._reconnecting = True
+            threading.Thread(target=self._reconnect, name="cache-reconnect", daemon=True).start()
+    
+    def _reconnect(self):
+        try:
+            self.connect()
+        finally:
+            self._reconnecting = False
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
+        self._ensure_connected()
+        
+        # With a coherence bus, a short-lived L1 sits in front of Redis
+        if self._bus is not None and self._use_redis:
+            entry = self._cache.get(key)
+            if entry is not None and datetime.now() < entry[1]:
+                self._hits += 1
+                return entry[0]
+        
         # Try Redis first if available
         if self._use_redis and self._redis_client:
             try:
                 value = self._redis_client.get(key)
                 if value:
                     self._hits += 1
-                    logger.debug(f"Redis cache HIT for key: {key[:50]}...")
-                    return json.loads(value)
+                    logger.debug("Redis cache HIT for key: %.50s...", key)
+                    data = json.loads(value)
+                    if self._bus is not None:
+                        self._cache[key] = (data, datetime.now() + timedelta(seconds=self._l1_ttl))
+                    return data
                 else:
                     self._misses += 1
-                    logger.debug(f"Redis cache MISS for key: {key[:50]}...")
+                    logger.debug("Redis cache MISS for key: %.50s...", key)
                     return None
             except Exception as e:
                 logger.warning(f"Redis error on GET, falling back to memory: {e}")
                 # Fall through to in-memory cache
         
+        # Shared memory (values too large for it stay in the in-memory cache)
+        if self._shared is not None and not self._use_redis:
+            data = self._shared.get(key)
+            if data is not None:
+                self._hits += 1
+                logger.debug("Shared cache HIT for key: %.50s...", key)
+                return data
+        
         # In-memory cache
         if key in self._cache:
             data, expiry = self._cache[key]
             if datetime.now() < expiry:
                 self._hits += 1
-                logger.debug(f"Memory cache HIT for key: {key[:50]}...")
+                logger.debug("Memory cache HIT for key: %.50s...", key)
                 return data
             else:
                 # Expired, remove it
-                del self._cache[key]
-                logger.debug(f"Memory cache EXPIRED for key: {key[:50]}...")
+                self._cache.pop(key, None)
+                logger.debug("Memory cache EXPIRED for key: %.50s...", key)
         
         self._misses += 1
-        logger.debug(f"Memory cache MISS for key: {key[:50]}...")
+        logger.debug("Memory cache MISS for key: %.50s...", key)
         return None
     
     def set(self, key: str, value: Any, ttl_seconds: int = 300):
         """Set value in cache with TTL"""
+        self._ensure_connected()
+        
         # Try Redis first if available
         if self._use_redis and self._redis_client:
             try:
                 serialized = json.dumps(value, default=str)
                 self._redis_client.setex(key, ttl_seconds, serialized)
-                logger.debug(f"Redis cache SET for key: {key[:50]}... (TTL: {ttl_seconds}s)")
+                logger.debug("Redis cache SET for key: %.50s... (TTL: %ss)", key, ttl_seconds)
+                if self._bus is not None:
+                    l1_ttl = min(ttl_seconds, self._l1_ttl)
+                    self._cache[key] = (value, datetime.now() + timedelta(seconds=l1_ttl))
+                    self._bus.publish({"op": "set", "key": key, "value": value, "ttl": ttl_seconds})
                 return
             except Exception as e:
                 logger.warning(f"Redis error on SET, falling back to memory: {e}")
                 # Fall through to in-memory cache
         
+        # Shared memory: every local worker sees the value, no bus message needed
+        if self._shared is not None and not self._use_redis:
+            try:
+                if self._shared.set(key, value, ttl_seconds):
+                    logger.debug("Shared cache SET for key: %.50s... (TTL: %ss)", key, ttl_seconds)
+                    return
+            except Exception as e:
+                logger.warning(f"Shared cache error on SET, falling back to memory: {e}")
+        
         # In-memory cache
         expiry = datetime.now() + timedelta(seconds=ttl_seconds)
         self._cache[key] = (value, expiry)
-        logger.debug(f"Memory cache SET for key: {key[:50]}... (TTL: {ttl_seconds}s)")
+        logger.debug("Memory cache SET for key: %.50s... (TTL: %ss)", key, ttl_seconds)
+        if self._bus is not None:
+            self._bus.publish({"op": "set", "key": key, "value": value, "ttl": ttl_seconds})
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values in one round trip (MGET on Redis)
+        
+        Hits and misses are counted per key, as with get().
+        
+        Returns:
+            The keys that were found, with their values
+        """
+        self._ensure_connected()
+        pending: List[str] = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        
+        # With a coherence bus, a short-lived L1 sits in front of Redis
+        if self._bus is not None and self._use_redis:
+            now = datetime.now()
+            for key in pending:
+                entry = self._cache.get(key)
+                if entry is not None and now < entry[1]:
+                    found[key] = entry[0]
+            pending = [key for key in pending if key not in found]
+        
+        if self._use_redis and self._redis_client and pending:
+            try:
+                values = self._redis_client.mget(pending)
+                l1_expiry = datetime.now() + timedelta(seconds=self._l1_ttl)
+                for key, value in zip(pending, values):
+                    if value:
+                        found[key] = json.loads(value)
+                        if self._bus is not None:
+                            self._cache[key] = (found[key], l1_expiry)
+                self._hits += len(found)
+                self._misses += sum(1 for key in pending if key not in found)
+                return found
+            except Exception as e:
+                logger.warning(f"Redis error on MGET, falling back to memory: {e}")
+        
+        # Shared memory, then this worker's dict
+        if self._shared is not None and not self._use_redis and pending:
+            found.update(self._shared.get_many(pending))
+            pending = [key for key in pending if key not in found]
+        
+        now = datetime.now()
+        for key in pending:
+            entry = self._cache.get(key)
+            if entry is None:
+                continue
+            if now < entry[1]:
+                found[key] = entry[0]
+            else:
+                self._cache.pop(key, None)
+        
+        self._hits += len(found)
+        self._misses += len(pending) - sum(1 for key in pending if key in found)
+        return found
+    
+    def set_many(self, items: Dict[str, Any], ttl_seconds: TTL = 300):
+        """
+        Set several values (one pipelined round trip of SETEX on Redis)
+        
+        Args:
+            items: Key -> value
+            ttl_seconds: Fixed TTL, or a policy called with (key, value)
+        """
+        self._ensure_connected()
+        if not items:
+            return
+        ttls = {
+            key: ttl_seconds(key, value) if callable(ttl_seconds) else ttl_seconds
+            for key, value in items.items()
+        }
+        
+        if self._use_redis and self._redis_client:
+            try:
+                pipe = self._redis_client.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.setex(key, ttls[key], json.dumps(value, default=str))
+                pipe.execute()
+                if self._bus is not None:
+                    now = datetime.now()
+                    for key, value in items.items():
+                        self._cache[key] = (value, now + timedelta(seconds=min(ttls[key], self._l1_ttl)))
+                        self._bus.publish({"op": "set", "key": key, "value": value, "ttl": ttls[key]})
+                logger.debug("Redis cache SET %d keys in one pipeline", len(items))
+                return
+            except Exception as e:
+                logger.warning(f"Redis error on pipelined SET, falling back to memory: {e}")
+        
+        # Shared memory or this worker's dict: no round trips to save
+        shared = self._shared if not self._use_redis else None
+        now = datetime.now()
+        for key, value in items.items():
+            if shared is not None and shared.set(key, value, ttls[key]):
+                continue
+            self._cache[key] = (value, now + timedelta(seconds=ttls[key]))
+            if self._bus is not None:
+                self._bus.publish({"op": "set", "key": key, "value": value, "ttl": ttls[key]})
+    
+    def get_or_fill(self, key: str, loader: Callable[[], Any], ttl_seconds: TTL = 300,
+                    accept: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a value, filling it with ``loader`` on a miss
+        
+        Concurrent misses for the same key (in this process, or in other
+        workers/replicas when Redis is used) share a single loader call.
+        
+        Args:
+            ttl_seconds: Fixed TTL, or a policy deciding the TTL from the filled value
+            accept: Optional check that a cached value can serve this caller;
+                rejected values are treated as misses and refilled
+        """
+        usable = accept or (lambda v: True)
+        value = self.get(key)
+        if value is not None and (is_negative(value) or usable(value)):
+            return self._unwrap(value)
+        
+        def fill():
+            result = loader()
+            if isinstance(result, NegativeResult):
+                marker = result.marker()
+                ttl = self._negative_ttls.get(result.kind, self._negative_ttls[NegativeResult.ERROR])
+                if ttl > 0:
+                    self.set(key, marker, ttl)
+                    self._negative_stored += 1
+                return marker
+            ttl = ttl_seconds(key, result) if callable(ttl_seconds) else ttl_seconds
+            self.set(key, result, ttl)
+            return result
+        
+        def peek():
+            current = self._peek(key)
+            if current is not None and (is_negative(current) or usable(current)):
+                return current
+            return None
+        
+        value = self._single_flight.do(key, fill, peek)
+        if value is not None and not is_negative(value) and not usable(value):
+            # We joined an in-flight fill that does not cover this caller
+            value = fill()
+        return self._unwrap(value, counted=False)
+    
+    def _unwrap(self, value: Any, counted: bool = True) -> Any:
+        """Turn a negative-result marker back into the value callers see"""
+        if not is_negative(value):
+            return value
+        if counted:
+            self._negative_hits += 1
+        return value.get("value")
+    
+    def _peek(self, key: str) -> Optional[Any]:
+        """Read the shared cache without touching hit/miss statistics"""
+        if self._use_redis and self._redis_client:
+            try:
+                value = self._redis_client.get(key)
+                return json.loads(value) if value else None
+            except Exception:
+                return None
+        if self._shared is not None:
+            value = self._shared.get(key)
+            if value is not None:
+                return value
+        entry = self._cache.get(key)
+        if entry is not None and datetime.now() < entry[1]:
+            return entry[0]
+        return None
+    
+    def delete(self, key: str):
+        """Remove a single key (and tell other workers to drop it)"""
+        self._ensure_connected()
+        if self._use_redis and self._redis_client:
+            try:
+                self._redis_client.delete(key)
+            except Exception as e:
+                logger.warning(f"Redis error on DELETE: {e}")
+        if self._shared is not None:
+            self._shared.delete(key)
+        self._cache.pop(key, None)
+        if self._bus is not None:
+            self._bus.publish({"op": "delete", "key": key})
+    
+    def attach_bus(self, bus, l1_ttl: int = 5):
+        """
+        Keep this worker coherent with the others through a cache bus
+        
+        Local fills and invalidations are published; fills from other workers
+        land in the in-memory cache (an L1 in front of Redis when Redis is used).
+        
+        Args:
+            bus: A started-or-startable CacheBus
+            l1_ttl: Max seconds a Redis-backed value is kept in the L1
+        """
+        self._l1_ttl = l1_ttl
+        self._bus = bus
+        bus.start(self._apply_remote)
+    
+    def attach_shared(self, store):
+        """
+        Share in-memory entries with the other workers on this host
+        
+        While Redis is not in use, values are stored in ``store`` (a
+        SharedMemoryStore) instead of this worker's dict.
+        """
+        self._shared = store
+    
+    def detach_shared(self):
+        """Stop using the shared-memory store and unmap it"""
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+    
+    def detach_bus(self):
+        """Stop the cache bus"""
+        if self._bus is not None:
+            self._bus.stop()
+            self._bus = None
+    
+    def _apply_remote(self, message: dict):
+        """Apply a cache event published by another worker"""
+        op = message.get("op")
+        if op == "set":
+            ttl = message.get("ttl", 300)
+            if self._use_redis:
+                ttl = min(ttl, self._l1_ttl)
+            self._cache[message["key"]] = (message["value"], datetime.now() + timedelta(seconds=ttl))
+        elif op == "delete":
+            self._cache.pop(message["key"], None)
+        elif op == "clear":
+            self._cache.clear()
     
     def clear(self):
         """Clear all cache"""
+        self._ensure_connected()
+        
         # Clear Redis if available
         if self._use_redis and self._redis_client:
             try:
@@ -115,13 +489,19 @@ class SimpleCache:
             except Exception as e:
                 logger.warning(f"Failed to clear Redis cache: {e}")
         
+        if self._shared is not None:
+            self._shared.clear()
+        
         # Clear in-memory cache
         count = len(self._cache)
         self._cache.clear()
         logger.info(f"Memory cache cleared ({count} items removed)")
+        if self._bus is not None:
+            self._bus.publish({"op": "clear"})
     
     def get_stats(self) -> dict:
         """Get cache statistics"""
+        self._ensure_connected()
         total = self._hits + self._misses
         hit_rate = (self._hits / total * 100) if total > 0 else 0
         
@@ -130,7 +510,12 @@ class SimpleCache:
             "hits": self._hits,
             "misses": self._misses,
             "hit_rate": f"{hit_rate:.2f}%",
-            "using_redis": self._use_redis
+            "using_redis": self._use_redis,
+            "negative_hits": self._negative_hits,
+            "negative_stored": self._negative_stored,
+            "bus": self._bus.get_stats() if self._bus is not None else None,
+            "shared_memory": self._shared.get_stats() if self._shared is not None else None,
+            "single_flight": self._single_flight.get_stats()
         }
         
         # Add Redis info if available
@@ -145,13 +530,54 @@ class SimpleCache:
         
         return stats
     
+    def save_snapshot(self, path: str) -> int:
+        """
+        Write live in-memory entries to a snapshot file for a warm restart
+        
+        Only used in in-memory mode; Redis keeps its data across restarts.
+        
+        Returns:
+            Number of entries written
+        """
+        if self._use_redis:
+            return 0
+        started = time.perf_counter()
+        now = datetime.now()
+        entries = [(key, value, (expiry - now).total_seconds())
+                   for key, (value, expiry) in list(self._cache.items())]
+        count = write_snapshot(path, entries)
+        logger.info(f"Saved {count} cache entries to {path} in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return count
+    
+    def load_snapshot(self, path: str) -> int:
+        """
+        Load unexpired entries from a snapshot file, keeping their remaining TTL
+        
+        Entries already in the cache (filled since startup) are not overwritten.
+        
+        Returns:
+            Number of entries loaded
+        """
+        if self._use_redis:
+            return 0
+        started = time.perf_counter()
+        now = datetime.now()
+        count = 0
+        for key, value, remaining in read_snapshot(path):
+            entry = (value, now + timedelta(seconds=remaining))
+            if self._cache.setdefault(key, entry) is entry:
+                count += 1
+        if count:
+            logger.info(f"Loaded {count} cache entries from {path} in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return count
+    
     def cleanup_expired(self):
         """Remove all expired entries"""
         now = datetime.now()
-        expired_keys = [k for k, (_, exp) in self._cache.items() if now >= exp]
+        expired_keys = [k for k, (_, exp) in list(self._cache.items()) if now >= exp]
         
         for key in expired_keys:
-            del self._cache[key]
+            self._cache.pop(key, None)
         
         if expired_keys:
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
@@ -183,12 +609,13 @@ def make_cache_key(*args, **kwargs) -> str:
     # Hash it to create a fixed-length key
     return hashlib.md5(key_data.encode()).hexdigest()
 
-def cached(ttl: int = 300):
+def cached(ttl: TTL = 300):
     """
     Decorator to cache function results
     
     Args:
-        ttl: Time to live in seconds (default: 5 minutes)
+        ttl: Time to live in seconds (default: 5 minutes), or a TTL policy
+            called with (key, result) that picks each entry's lifetime
     
     Usage:
         @cached(ttl=600)
@@ -202,23 +629,61 @@ def cached(ttl: int = 300):
             # Create cache key
             cache_key = f"{func.__name__}:{make_cache_key(*args, **kwargs)}"
             
-            # Try to get from cache
-            cached_result = _cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Not in cache, call function
-            result = func(*args, **kwargs)
-            
-            # Store in cache
-            _cache.set(cache_key, result, ttl)
-            
-            return result
+            # Serve from cache, or call the function once for all concurrent misses
+            return _cache.get_or_fill(cache_key, lambda: func(*args, **kwargs), ttl)
         
         return wrapper
     return decorator
 
 # Export functions to interact with cache
+def get_redis_client():
+    """Get the shared sync Redis client, or None when running in-memory"""
+    _cache._ensure_connected()
+    if _cache._use_redis:
+        return _cache._redis_client
+    return None
+
+def connect_cache() -> bool:
+    """Connect the global cache to Redis (called from the app lifespan)"""
+    return _cache.connect()
+
+def attach_cache_bus(bus, l1_ttl: int = 5):
+    """Enable cross-worker coherence for the global cache"""
+    _cache.attach_bus(bus, l1_ttl)
+
+def detach_cache_bus():
+    """Disable cross-worker coherence for the global cache"""
+    _cache.detach_bus()
+
+def attach_shared_cache(store):
+    """Back the global in-memory cache with a store shared by local workers"""
+    _cache.attach_shared(store)
+
+def detach_shared_cache():
+    """Stop sharing the global in-memory cache"""
+    _cache.detach_shared()
+
+def cache_get(key: str) -> Optional[Any]:
+    """Get a value from the global cache by its raw key"""
+    return _cache.get(key)
+
+def cache_set(key: str, value: Any, ttl_seconds: int = 300):
+    """Store a value in the global cache under a raw key"""
+    _cache.set(key, value, ttl_seconds)
+
+def cache_get_many(keys: Iterable[str]) -> Dict[str, Any]:
+    """Get several values from the global cache in one round trip"""
+    return _cache.get_many(keys)
+
+def cache_set_many(items: Dict[str, Any], ttl_seconds: TTL = 300):
+    """Store several values in the global cache in one round trip"""
+    _cache.set_many(items, ttl_seconds)
+
+def cache_get_or_fill(key: str, loader: Callable[[], Any], ttl_seconds: TTL = 300,
+                      accept: Optional[Callable[[Any], bool]] = None) -> Any:
+    """Get a value from the global cache by its raw key, filling it once on a miss"""
+    return _cache.get_or_fill(key, loader, ttl_seconds, accept)
+
 def clear_cache():
     """Clear all cached data"""
     _cache.clear()
@@ -227,6 +692,14 @@ def get_cache_stats() -> dict:
     """Get cache statistics"""
     return _cache.get_stats()
 
+def save_cache_snapshot(path: str) -> int:
+    """Persist the in-memory cache for a warm restart"""
+    return _cache.save_snapshot(path)
+
+def load_cache_snapshot(path: str) -> int:
+    """Reload a cache snapshot written by save_cache_snapshot"""
+    return _cache.load_snapshot(path)
+
 def cleanup_cache():
     """Remove expired entries"""
     return _cache.cleanup_expired()
@@ -0,0 +1,236 @@
+"""
+Cache coherence bus for multi-worker deployments
+Broadcasts cache fills and invalidations between uvicorn workers, over Redis
+pub/sub when Redis is available or over local Unix datagram sockets otherwise
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+import zlib
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[dict], None]
+
+
+class CacheBus(ABC):
+    """Base class: publish cache events and deliver events from other workers"""
+
+    name = "base"
+
+    def __init__(self):
+        # Identifies this worker so it can ignore its own messages
+        self.node_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handler: Optional[MessageHandler] = None
+        self._published = 0
+        self._received = 0
+        self._dropped = 0
+
+    def start(self, handler: MessageHandler) -> None:
+        """Start delivering messages from other workers to ``handler``"""
+        self._handler = handler
+
+    def stop(self) -> None:
+        """Stop the bus and release its resources"""
+        self._handler = None
+
+    def publish(self, message: dict) -> None:
+        """Send a message to all other workers"""
+        message["origin"] = self.node_id
+        try:
+            self._send(self._prepare(message))
+            self._published += 1
+        except Exception as e:
+            self._dropped += 1
+            logger.warning(f"Cache bus publish failed: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            "type": self.name,
+            "node_id": self.node_id,
+            "published": self._published,
+            "received": self._received,
+            "dropped": self._dropped
+        }
+
+    def _prepare(self, message: dict):
+        return self._encode(message)
+
+    @abstractmethod
+    def _send(self, data: bytes) -> None:
+        """Hand an encoded message to the transport"""
+
+    def _encode(self, message: dict) -> bytes:
+        return zlib.compress(json.dumps(message, separators=(",", ":"), default=str).encode("utf-8"), 1)
+
+    def _decode(self, data) -> dict:
+        return json.loads(zlib.decompress(data))
+
+    def _deliver(self, data) -> None:
+        try:
+            message = self._decode(data)
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping malformed cache bus message: {e}")
+            return
+        if message.get("origin") == self.node_id or self._handler is None:
+            return
+        self._received += 1
+        try:
+            self._handler(message)
+        except Exception as e:
+            logger.warning(f"Cache bus handler failed: {e}")
+
+
+class RedisCacheBus(CacheBus):
+    """Bus over a Redis pub/sub channel"""
+
+    name = "redis"
+
+    def __init__(self, redis_client, channel: str = "cache:events"):
+        super().__init__()
+        self._redis = redis_client
+        self.channel = channel
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, handler: MessageHandler) -> None:
+        super().start(handler)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: lambda m: self._deliver(m["data"])})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+        logger.info(f"Cache bus subscribed to Redis channel '{self.channel}'")
+
+    def stop(self) -> None:
+        super().stop()
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def _encode(self, message: dict) -> str:
+        # The shared client decodes responses, so send plain JSON text
+        return json.dumps(message, separators=(",", ":"), default=str)
+
+    def _decode(self, data) -> dict:
+        return json.loads(data)
+
+    def _send(self, data) -> None:
+        self._redis.publish(self.channel, data)
+
+
+class UnixSocketCacheBus(CacheBus):
+    """
+    Bus over Unix datagram sockets in a shared directory
+
+    Each worker binds ``<directory>/<node_id>.sock`` and publishing sends the
+    message to every other socket in the directory. Messages too large for a
+    datagram are downgraded to an invalidation of the same key.
+    """
+
+    name = "unix"
+    MAX_DATAGRAM = 200 * 1024
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.node_id}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._send_sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self, handler: MessageHandler) -> None:
+        super().start(handler)
+        os.makedirs(self.directory, exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._sock.bind(self.path)
+        self._sock.settimeout(0.5)
+        # Sending never blocks the request path; a full peer just misses the message
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.setblocking(False)
+        self._running = True
+        self._thread = threading.Thread(target=self._listen, name="cache-bus", daemon=True)
+        self._thread.start()
+        logger.info(f"Cache bus listening on {self.path}")
+
+    def stop(self) -> None:
+        super().stop()
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for sock in (self._sock, self._send_sock):
+            if sock is not None:
+                sock.close()
+        self._sock = self._send_sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _prepare(self, message: dict) -> bytes:
+        data = self._encode(message)
+        if len(data) > self.MAX_DATAGRAM and message.get("op") == "set":
+            # Too big to ship: make the others drop their copy instead
+            data = self._encode({"op": "delete", "key": message["key"], "origin": self.node_id})
+        return data
+
+    def _send(self, data: bytes) -> None:
+        if self._send_sock is None:
+            return
+        for peer in glob.glob(os.path.join(self.directory, "*.sock")):
+            if peer == self.path:
+                continue
+            try:
+                self._send_sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; clean up its socket file
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError:
+                # Peer buffer full or message too large
+                self._dropped += 1
+
+    def _listen(self) -> None:
+        while self._running:
+            try:
+                data = self._sock.recv(self.MAX_DATAGRAM + 1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._deliver(data)
+
+
+def create_cache_bus(mode: str, workers: int, redis_client=None, socket_dir: str = None) -> Optional[CacheBus]:
+    """
+    Build the bus for the configured mode
+
+    Args:
+        mode: "auto" (on when running more than one worker), "redis", "unix" or "off"
+        workers: Configured number of workers
+        redis_client: Shared Redis client, or None when Redis is unavailable
+        socket_dir: Directory for Unix datagram sockets
+
+    Returns:
+        A bus, or None when coherence is not needed
+    """
+    mode = mode.lower()
+    if mode == "off" or (mode == "auto" and workers <= 1):
+        return None
+    if mode in ("auto", "redis") and redis_client is not None:
+        return RedisCacheBus(redis_client)
+    if mode == "redis":
+        logger.warning("Cache bus mode 'redis' requested but Redis is unavailable; using Unix sockets")
+    return UnixSocketCacheBus(socket_dir)
@@ -0,0 +1,95 @@
+"""
+On-disk snapshots of the in-memory cache for warm restarts
+Entries are written as length-prefixed binary records with their expiry time,
+and read back through mmap so expired entries are skipped without decoding.
+"""
+from typing import Any, Iterable, Iterator, Tuple
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BTCSNAP1"
+# expires_at (epoch seconds), key length, value length
+RECORD_HEADER = struct.Struct("<dII")
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[str, Any, float]]) -> int:
+    """
+    Write cache entries to ``path`` atomically
+
+    Args:
+        path: Snapshot file
+        entries: (key, value, remaining TTL in seconds) tuples
+
+    Returns:
+        Number of entries written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    now = time.time()
+    count = 0
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for key, value, remaining in entries:
+            if remaining <= 0:
+                continue
+            try:
+                data = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+            except (TypeError, ValueError):
+                continue
+            key_bytes = key.encode("utf-8")
+            f.write(RECORD_HEADER.pack(now + remaining, len(key_bytes), len(data)))
+            f.write(key_bytes)
+            f.write(data)
+            count += 1
+
+    # Readers only ever see a complete snapshot
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_snapshot(path: str) -> Iterator[Tuple[str, Any, float]]:
+    """
+    Yield (key, value, remaining TTL) for entries that have not expired yet
+
+    A missing, foreign or truncated file yields what can be read and stops.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                logger.warning(f"Ignoring cache snapshot with unknown format: {path}")
+                return
+
+            now = time.time()
+            offset = len(MAGIC)
+            while offset + RECORD_HEADER.size <= size:
+                expires_at, key_len, value_len = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                offset = start + key_len + value_len
+                if offset > size:
+                    logger.warning(f"Cache snapshot is truncated: {path}")
+                    return
+                remaining = expires_at - now
+                if remaining <= 0:
+                    continue  # Expired: skip without decoding
+                try:
+                    key = data[start:start + key_len].decode("utf-8")
+                    value = json.loads(data[start + key_len:offset])
+                except ValueError:
+                    continue
+                yield key, value, remaining
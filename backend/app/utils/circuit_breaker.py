@@ -0,0 +1,206 @@
+"""
+Circuit breaker for upstream (BVG) operations
+Fails fast while the upstream is degraded instead of waiting out every timeout
+"""
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker
+
+    - closed: calls go through, consecutive failures are counted
+    - open: calls are rejected immediately until ``recovery_timeout`` elapses
+    - half_open: a limited number of probe calls decide whether to close again
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Args:
+            name: Operation name (e.g. "departures", "radar")
+            failure_threshold: Consecutive failures before the circuit opens
+            recovery_timeout: Seconds to stay open before probing again
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+        self._rejected = 0
+        self._transitions: Dict[str, int] = {}
+        self._last_transition: Optional[dict] = None
+        self._pending: List[Tuple[str, str]] = []  # transitions not yet sent to listeners
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half_open once the timeout elapsed"""
+        with self._lock:
+            self._maybe_half_open()
+            state = self._state
+        self._notify()
+        return state
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed (for Retry-After headers)"""
+        with self._lock:
+            if self._state != OPEN:
+                return 1
+            return self._retry_after_unlocked()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go upstream right now"""
+        with self._lock:
+            self._maybe_half_open()
+
+            if self._state == CLOSED:
+                allowed = True
+            elif self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                allowed = True
+            else:
+                self._rejected += 1
+                allowed = False
+        self._notify()
+        return allowed
+
+    def record_success(self) -> None:
+        """Record a successful upstream call"""
+        with self._lock:
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._half_open_calls = 0
+                self._transition(CLOSED)
+        self._notify()
+
+    def record_failure(self) -> None:
+        """Record a failed upstream call (timeout, connection error, 5xx)"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._half_open_calls = 0
+                self._open()
+            elif self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+        self._notify()
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that never reached the upstream"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def reset(self) -> None:
+        """Force the breaker back to closed"""
+        with self._lock:
+            self._failures = 0
+            self._half_open_calls = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+        self._notify()
+
+    def get_stats(self) -> dict:
+        """Get breaker state and transition counters"""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "rejected_calls": self._rejected,
+                "transitions": dict(self._transitions),
+                "last_transition": self._last_transition,
+                "retry_after": self._retry_after_unlocked() if state == OPEN else None
+            }
+
+    def _retry_after_unlocked(self) -> int:
+        remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._half_open_calls = 0
+            self._transition(HALF_OPEN)
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, new_state: str) -> None:
+        old_state = self._state
+        self._state = new_state
+
+        key = f"{old_state}->{new_state}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        self._last_transition = {
+            "from": old_state,
+            "to": new_state,
+            "at": datetime.now(timezone.utc).isoformat()
+        }
+
+        level = logging.WARNING if new_state == OPEN else logging.INFO
+        logger.log(level, f"Circuit breaker '{self.name}' transition: {old_state} -> {new_state}")
+        self._pending.append((old_state, new_state))
+
+    def _notify(self) -> None:
+        # Listeners run outside the lock, so they may read the breaker's state and stats
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for old_state, new_state in pending:
+            for listener in list(_listeners):
+                try:
+                    listener(self.name, old_state, new_state)
+                except Exception as e:
+                    logger.warning(f"Circuit breaker listener failed: {e}")
+
+
+# Registry of breakers, one per upstream operation
+_breakers: Dict[str, CircuitBreaker] = {}
+_listeners: List[Callable[[str, str, str], None]] = []
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Get (or create) the breaker for an upstream operation"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, **kwargs)
+        _breakers[name] = breaker
+    return breaker
+
+
+def add_transition_listener(listener: Callable[[str, str, str], None]) -> None:
+    """Register a callback ``listener(name, old_state, new_state)`` for alerting"""
+    _listeners.append(listener)
+
+
+def get_breaker_stats() -> dict:
+    """Get state of all registered breakers"""
+    return {name: breaker.get_stats() for name, breaker in _breakers.items()}
+
+
+def reset_breakers() -> None:
+    """Reset all breakers to closed (useful for testing)"""
+    for breaker in _breakers.values():
+        breaker.reset()
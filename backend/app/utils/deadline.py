@@ -0,0 +1,245 @@
+"""
+Request deadlines and cancellation on client disconnect
+Every API request carries a Deadline in a context variable. It follows the
+request into the worker thread running the BVG client, through the cache's
+single-flight fills, and down to the HTTP call, where it caps socket timeouts
+and stops retries. A client that disconnects cancels its deadline.
+
+Work several callers wait on (a single-flight fill) runs under a
+SharedDeadline that only expires once every caller has given up; callers
+without a deadline (pre-warm, scheduled refreshes) keep it alive for good.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from app.exceptions import DeadlineExceededException
+from app.utils.profiling import profile_worker_thread
+
+logger = logging.getLogger(__name__)
+
+EXPIRED = "deadline"
+DISCONNECTED = "disconnected"
+TIMEOUT_HEADER = b"x-request-timeout"
+
+
+class Deadline:
+    """Point in time after which nobody needs a request's result any more"""
+
+    def __init__(self, timeout: float):
+        self.expires_at = time.monotonic() + timeout
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = DISCONNECTED) -> None:
+        """Give up before the deadline (the client went away)"""
+        if self.reason is None:
+            self.reason = reason
+
+    def remaining(self) -> float:
+        if self.reason is not None:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cause(self) -> str:
+        return self.reason or EXPIRED
+
+    def cap(self, timeout: float) -> float:
+        """``timeout`` shortened to the time left"""
+        return min(timeout, self.remaining())
+
+    def check(self, operation: str = "request") -> None:
+        """
+        Raises:
+            DeadlineExceededException: If the deadline passed or was cancelled
+        """
+        if self.remaining() <= 0:
+            raise DeadlineExceededException(operation, self.cause())
+
+
+class SharedDeadline(Deadline):
+    """Deadline of work shared by several callers: alive while any of them still waits"""
+
+    def __init__(self, first: Optional[Deadline] = None):
+        self._members: List[Deadline] = []
+        self._unbounded = False
+        self._lock = threading.Lock()
+        self.reason = None
+        self.join(first)
+
+    def join(self, deadline: Optional[Deadline]) -> None:
+        """Add a caller; one without a deadline keeps the work alive until it completes"""
+        with self._lock:
+            if deadline is None:
+                self._unbounded = True
+            else:
+                self._members.append(deadline)
+
+    def cancel(self, reason: str = DISCONNECTED) -> None:
+        # Only the callers themselves can give up on shared work
+        pass
+
+    def remaining(self) -> float:
+        if self._unbounded:
+            return math.inf
+        with self._lock:
+            return max((member.remaining() for member in self._members), default=0.0)
+
+    def cause(self) -> str:
+        with self._lock:
+            if self._members and all(member.reason == DISCONNECTED for member in self._members):
+                return DISCONNECTED
+        return EXPIRED
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being served (None for background work)"""
+    return _current.get()
+
+
+def remaining_time(default: float) -> float:
+    """``default`` seconds, shortened to what is left of the current deadline"""
+    deadline = _current.get()
+    return default if deadline is None else deadline.cap(default)
+
+
+def check_deadline(operation: str = "request") -> None:
+    """
+    Stop work nobody waits for any more
+
+    Raises:
+        DeadlineExceededException: If the current deadline passed or was cancelled
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(operation)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Run a block under ``deadline`` instead of the caller's"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def _in_worker(func, args, kwargs):
+    # The context (deadline, profile session) was copied into this thread by to_thread
+    with profile_worker_thread():
+        return func(*args, **kwargs)
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    # Abandoned calls finish in the background; their errors are of no interest
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_with_deadline(func, *args, **kwargs):
+    """
+    Run blocking client code in a worker thread, giving up at the deadline
+
+    The thread inherits the deadline, so it stops at its next check (before a
+    retry, or when a socket read times out) unless a single-flight waiter or
+    background job still needs the result. When the request is being profiled,
+    the thread is profiled with it.
+
+    Raises:
+        DeadlineExceededException: If the deadline passed first
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return await asyncio.to_thread(_in_worker, func, args, kwargs)
+
+    deadline.check()
+    task = asyncio.ensure_future(asyncio.to_thread(_in_worker, func, args, kwargs))
+    task.add_done_callback(_consume_result)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceededException("request", deadline.cause())
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware giving each API request a deadline
+
+    Clients may ask for a shorter deadline with an ``X-Request-Timeout``
+    header (seconds). When the client disconnects before the response is
+    complete, the deadline is cancelled and the handler task with it.
+    """
+
+    def __init__(self, app, timeout: float = 10.0):
+        self.app = app
+        self.timeout = timeout
+
+    def _timeout_for(self, scope: dict) -> float:
+        for name, value in scope["headers"]:
+            if name == TIMEOUT_HEADER:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, self.timeout)
+                break
+        return self.timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(self._timeout_for(scope))
+        messages: asyncio.Queue = asyncio.Queue()
+        state = {"complete": False, "disconnect": None}
+
+        async def receive_buffered():
+            if state["disconnect"] is not None:
+                return state["disconnect"]
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                state["disconnect"] = message
+            return message
+
+        async def send_tracked(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["complete"] = True
+            await send(message)
+
+        async def watch():
+            # Own the transport's receive so a disconnect is noticed while the handler runs
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not state["complete"]:
+                        deadline.cancel(DISCONNECTED)
+                        handler.cancel()
+                    return
+
+        token = _current.set(deadline)
+        try:
+            handler = asyncio.create_task(self.app(scope, receive_buffered, send_tracked))
+        finally:
+            _current.reset(token)
+        watcher = asyncio.create_task(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if deadline.reason != DISCONNECTED:
+                raise
+            # Nobody is left to answer
+            logger.info("Client disconnected, abandoned %s %s", scope["method"], scope["path"])
+        finally:
+            watcher.cancel()
+
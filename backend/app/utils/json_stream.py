@@ -0,0 +1,119 @@
+"""
+Incremental JSON parsing with early filtering
+Large upstream objects (radar movements, long departure windows) are parsed
+from the response stream one list element at a time, keeping only the fields
+an endpoint needs instead of materializing the whole document first. This
+lowers peak memory for bodies of a few MiB at about 4x the CPU of a full
+json.loads, so it is only worth it where memory is the constraint.
+"""
+from typing import Any, Callable, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency: without ijson, payloads are parsed in full and then projected
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+    logger.warning("ijson not available, upstream JSON is parsed in full")
+
+SCALAR_EVENTS = frozenset(("null", "boolean", "integer", "double", "number", "string"))
+
+
+def pick(source: Any, fields: Iterable[str]) -> Optional[dict]:
+    """Copy the given keys of a dict (None if ``source`` is not a dict)"""
+    if not isinstance(source, dict):
+        return None
+    return {key: source[key] for key in fields if key in source}
+
+
+class Projection:
+    """
+    The part of a JSON document an endpoint actually uses
+
+    The document is expected to be an object holding one large list under
+    ``list_key`` (a bare top-level list is accepted too). Each element is
+    passed through ``project_item``, which returns the trimmed element or
+    None to drop it. Top-level keys listed in ``keep`` are copied as-is;
+    everything else is skipped.
+    """
+
+    def __init__(self, list_key: str, project_item: Callable[[Any], Any], keep: Iterable[str] = ()):
+        self.list_key = list_key
+        self.project_item = project_item
+        self.keep = frozenset(keep)
+
+    def apply(self, data: Any) -> Any:
+        """Project an already parsed document"""
+        if isinstance(data, list):
+            return self._project_list(data)
+        if not isinstance(data, dict):
+            return data
+        result = {key: value for key, value in data.items() if key in self.keep}
+        result[self.list_key] = self._project_list(data.get(self.list_key) or [])
+        return result
+
+    def parse(self, stream) -> Any:
+        """
+        Parse and project a document from a binary file-like object
+
+        Only one list element is ever fully built at a time.
+        """
+        if not IJSON_AVAILABLE:
+            import json
+            return self.apply(json.loads(stream.read()))
+
+        result: dict = {}
+        items: list = []
+        item_prefix = f"{self.list_key}.item"
+        is_list = False
+        builder = None
+        building = None  # prefix whose value the builder is assembling
+
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == building and event in ("end_map", "end_array"):
+                    if building == item_prefix:
+                        item = self.project_item(builder.value)
+                        if item is not None:
+                            items.append(item)
+                    else:
+                        result[building] = builder.value
+                    builder = building = None
+                continue
+
+            if prefix == "" and event == "start_array":
+                # Bare list at the top level
+                is_list = True
+                item_prefix = "item"
+            elif prefix == item_prefix:
+                if event in ("start_map", "start_array"):
+                    builder, building = ObjectBuilder(), prefix
+                    builder.event(event, value)
+                elif event in SCALAR_EVENTS:
+                    item = self.project_item(value)
+                    if item is not None:
+                        items.append(item)
+            elif prefix in self.keep:
+                if event in ("start_map", "start_array"):
+                    builder, building = ObjectBuilder(), prefix
+                    builder.event(event, value)
+                elif event in SCALAR_EVENTS:
+                    result[prefix] = value
+
+        if is_list:
+            return items
+        result[self.list_key] = items
+        return result
+
+    def _project_list(self, items: list) -> list:
+        projected = []
+        for item in items:
+            item = self.project_item(item)
+            if item is not None:
+                projected.append(item)
+        return projected
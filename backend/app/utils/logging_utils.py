@@ -1,11 +1,19 @@
 """
 Logging utilities for structured logging throughout the application
+Records are handed to a background thread for formatting and I/O, and
+repetitive call sites can be rate limited so a burst of identical warnings
+does not cost every request.
 """
+import atexit
 import logging
+import queue
 import sys
-from typing import Any, Dict
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class StructuredFormatter(logging.Formatter):
@@ -16,7 +24,8 @@ class StructuredFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # When the event happened, not when the background thread formats it
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -55,16 +64,101 @@ class ColoredFormatter(logging.Formatter):
         color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
         reset = self.COLORS['RESET']
         
-        # Color the level name
-        record.levelname = f"{color}{record.levelname}{reset}"
-        
-        return super().format(record)
+        # Color the level name (only for this handler; others see the same record)
+        levelname = record.levelname
+        record.levelname = f"{color}{levelname}{reset}"
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler for the request path
+    
+    Records are passed on unformatted (the listener runs in this process, so
+    message args and tracebacks are formatted there), and a full queue drops
+    the record instead of blocking the caller.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most ``burst`` records per call site through every ``interval`` seconds
+    
+    Call sites are keyed by file and line, so f-string messages with changing
+    values still count as one site. The next record let through after a quiet
+    period reports how many were suppressed. ERROR and above always pass.
+    """
+    
+    def __init__(self, burst: int = 20, interval: float = 1.0, max_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_level = max_level
+        self.suppressed_total = 0
+        # (pathname, lineno) -> [window start, records in window, suppressed since last report]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        # Several handlers may share this filter; decide once per record
+        decided = record.__dict__.get("_rate_limit_pass")
+        if decided is None:
+            decided = record._rate_limit_pass = self._allow(record)
+        return decided
+    
+    def _allow(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                self._sites[site] = [now, 1, 0]
+                return True
+            if now - state[0] >= self.interval:
+                state[0], state[1] = now, 0
+            if state[1] >= self.burst:
+                state[2] += 1
+                self.suppressed_total += 1
+                return False
+            state[1] += 1
+            suppressed, state[2] = state[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+        return True
+
+
+# Background listener started by setup_logging(use_queue=True)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_rate_limit: Optional[RateLimitFilter] = None
 
 
 def setup_logging(
     log_level: str = "INFO",
     use_json: bool = False,
-    log_file: str = None
+    log_file: str = None,
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    rate_limit_burst: int = 0,
+    rate_limit_interval: float = 1.0
 ) -> None:
     """
     Configure application logging
@@ -73,12 +167,20 @@ def setup_logging(
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         use_json: Use structured JSON logging (for production)
         log_file: Optional file path for logging to file
+        use_queue: Format and write records on a background thread
+        queue_size: Records buffered for the background thread (overflow is dropped)
+        rate_limit_burst: Max records per call site and interval below ERROR (0 = no limit)
+        rate_limit_interval: Rate limit window in seconds
     """
+    global _listener, _queue_handler, _rate_limit
+    shutdown_logging()
+    
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level.upper()))
     
     # Remove existing handlers
     root_logger.handlers.clear()
+    handlers = []
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -93,14 +195,29 @@ def setup_logging(
         )
     
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # File handler (optional)
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(getattr(logging, log_level.upper()))
         file_handler.setFormatter(StructuredFormatter())
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if use_queue:
+        # Callers only enqueue; formatting and I/O happen on the listener thread
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [_queue_handler]
+    
+    _rate_limit = None
+    if rate_limit_burst > 0:
+        _rate_limit = RateLimitFilter(rate_limit_burst, rate_limit_interval)
+    for handler in handlers:
+        if _rate_limit is not None:
+            handler.addFilter(_rate_limit)
+        root_logger.addHandler(handler)
     
     # Silence noisy third-party loggers
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -108,6 +225,29 @@ def setup_logging(
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """Stop the background listener after writing out queued records"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logging_stats() -> dict:
+    """Queue and rate limit counters"""
+    return {
+        "queued": _queue_handler is not None,
+        "queue_size": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped if _queue_handler is not None else 0,
+        "rate_limited": _rate_limit.suppressed_total if _rate_limit is not None else 0
+    }
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the given name
@@ -0,0 +1,186 @@
+"""
+Event-loop lag monitor and blocking-call detector
+A heartbeat task measures how late the event loop wakes it up; a watchdog
+thread notices when the heartbeat stops and records the stack of whatever
+is blocking the loop at that moment (sync HTTP, sync Redis, heavy parsing).
+"""
+from collections import Counter, deque
+from typing import Deque, List, Optional
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """
+    Measure event-loop lag and catch the code that blocks the loop
+
+    Args:
+        interval: Seconds between heartbeats
+        threshold: A heartbeat this many seconds overdue counts as a stall
+        window: Lag samples kept for the percentiles
+        max_reports: Stall reports (with stacks) kept
+        stack_limit: Innermost frames kept per stack
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, window: int = 1200,
+                 max_reports: int = 20, stack_limit: int = 25):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.reports: Deque[dict] = deque(maxlen=max_reports)
+        self.sites: Counter = Counter()
+        self.stalls = 0
+        self.max_lag = 0.0
+
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._current: Optional[dict] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._lags.append(lag)
+                self.max_lag = max(self.max_lag, lag)
+                if self._current is not None:
+                    # The stall is over: record how long the loop was blocked in total
+                    self._current["blocked_ms"] = round(lag * 1000, 1)
+                    self._current["ongoing"] = False
+                    self._current = None
+                self._last_beat = now
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.threshold / 2):
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat - self.interval
+                if overdue < self.threshold or self._current is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+                stack = traceback.format_stack(frame, limit=self.stack_limit)
+                site = self._blocking_site(frame)
+                self._current = {
+                    "detected_at": time.time(),
+                    "blocked_ms": round(overdue * 1000, 1),
+                    "ongoing": True,
+                    "site": site,
+                    "stack": [line.rstrip() for line in stack]
+                }
+                self.reports.append(self._current)
+                self.sites[site] += 1
+                self.stalls += 1
+                del frame
+            logger.warning(f"Event loop blocked for over {overdue * 1000:.0f}ms at {site}")
+
+    def _blocking_site(self, frame) -> str:
+        """Innermost application frame, which is the call to move off the loop"""
+        innermost = None
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            location = f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} ({frame.f_code.co_name})"
+            if innermost is None:
+                innermost = location
+            if filename.startswith(APP_DIR) and not filename.endswith("loop_monitor.py"):
+                return location
+            frame = frame.f_back
+        return innermost or "unknown"
+
+    def recent_lag(self, samples: int = 5) -> float:
+        """Worst lag (seconds) over the last few heartbeats, cheap enough to call per request"""
+        lags = self._lags
+        if not lags:
+            return 0.0
+        return max(lags[i] for i in range(-min(samples, len(lags)), 0))
+
+    def get_stats(self, include_reports: bool = False) -> dict:
+        with self._lock:
+            lags: List[float] = sorted(self._lags)
+            stats = {
+                "running": self._task is not None,
+                "threshold_ms": self.threshold * 1000,
+                "lag_ms": round(self._lags[-1] * 1000, 2) if self._lags else None,
+                "lag_p50_ms": _percentile_ms(lags, 0.50),
+                "lag_p99_ms": _percentile_ms(lags, 0.99),
+                "lag_max_ms": round(self.max_lag * 1000, 2),
+                "stalls": self.stalls
+            }
+            if include_reports:
+                stats["blocking_sites"] = [
+                    {"site": site, "stalls": count} for site, count in self.sites.most_common(10)
+                ]
+                stats["reports"] = [dict(report) for report in reversed(self.reports)]
+        return stats
+
+
+def _percentile_ms(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+
+
+# Global monitor used by the app lifespan
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    """Get the running monitor (None when disabled)"""
+    return _monitor
+
+
+def current_loop_lag() -> float:
+    """Recent event-loop lag in seconds (0 when the monitor is not running)"""
+    return _monitor.recent_lag() if _monitor is not None else 0.0
+
+
+async def start_loop_monitor(interval: float = 0.05, threshold: float = 0.1) -> LoopMonitor:
+    """Start monitoring the running event loop"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(interval, threshold)
+        await _monitor.start()
+    return _monitor
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
@@ -0,0 +1,324 @@
+"""
+On-demand profiling of single API requests
+A request is profiled when it carries the admin token (header or query flag)
+or is picked by 1-in-N sampling. The profile covers what the request runs on
+the event loop thread (routing, response serialization) and in the worker
+threads it starts through run_with_deadline (cache, BVG client, parsing,
+transformation), which find the session in a context variable. It is saved
+as collapsed stacks (flamegraph.pl, speedscope) or as a cProfile .prof file
+(snakeviz, pstats).
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, List, Optional
+import asyncio
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = b"x-profile-token"
+MODE_HEADER = b"x-profile-mode"
+QUERY_FLAG = "__profile"
+MODES = ("sample", "cprofile")
+
+
+class StackSampler:
+    """Sample the stacks of some threads every ``interval`` seconds from a helper thread"""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_ids = (thread_id,)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def add_thread(self, thread_id: int) -> None:
+        # Replaced, never mutated, so the sampler thread can read it without a lock
+        self.thread_ids = self.thread_ids + (thread_id,)
+
+    def remove_thread(self, thread_id: int) -> None:
+        self.thread_ids = tuple(t for t in self.thread_ids if t != thread_id)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _short_path(filename: str) -> str:
+    # Keep flamegraph labels readable: app-relative, or the last two path parts
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        return "app/" + filename.split(marker, 1)[1].replace(os.sep, "/")
+    return "/".join(filename.split(os.sep)[-2:])
+
+
+class ProfileSession:
+    """A request being profiled"""
+
+    def __init__(self, method: str, path: str, query: str, mode: str, interval: float):
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.query = query
+        self.mode = mode
+        self.status: Optional[int] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._interval = interval
+        self._started = 0.0
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread_profiles: List[cProfile.Profile] = []  # of worker threads that finished
+        self.duration_ms = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), self._interval)
+            self._sampler.start()
+
+    def stop(self):
+        """Stop collecting (on the thread that called start)"""
+        with self._lock:
+            self._stopped = True
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    @contextmanager
+    def worker_thread(self):
+        """Profile the calling worker thread too while the block runs"""
+        thread_id = threading.get_ident()
+        profiler = None
+        with self._lock:
+            if self._stopped:
+                yield
+                return
+            if self._sampler is not None:
+                self._sampler.add_thread(thread_id)
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # Another profiler already covers this thread
+                profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            with self._lock:
+                if self._sampler is not None:
+                    self._sampler.remove_thread(thread_id)
+                # A thread outliving its request (deadline passed) is left out
+                if profiler is not None and not self._stopped:
+                    self._thread_profiles.append(profiler)
+
+    def save(self, directory: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", self.path).strip("_")[:60] or "root"
+        if self._profiler is not None:
+            path = os.path.join(directory, f"{self.profile_id}-{slug}.prof")
+            stats = pstats.Stats(self._profiler)
+            for profiler in self._thread_profiles:
+                stats.add(profiler)
+            stats.dump_stats(path)
+        else:
+            path = os.path.join(directory, f"{self.profile_id}-{slug}.collapsed")
+            with open(path, "w") as f:
+                f.write(self._sampler.collapsed())
+        return path
+
+    def describe(self, file_path: str) -> dict:
+        return {
+            "id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "mode": self.mode,
+            "duration_ms": self.duration_ms,
+            "samples": sum(self._sampler.stacks.values()) if self._sampler is not None else None,
+            "file": os.path.basename(file_path)
+        }
+
+
+# Session of the request being profiled, for the worker threads it starts
+_active_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+@contextmanager
+def profile_worker_thread():
+    """Include the calling worker thread in the current request's profile, if any"""
+    session = _active_session.get()
+    if session is None:
+        yield
+        return
+    with session.worker_thread():
+        yield
+
+
+class RequestProfiler:
+    """
+    Decide which requests to profile and keep the latest profiles
+
+    Only one request is profiled at a time; others triggered meanwhile run
+    normally and are counted as skipped.
+    """
+
+    def __init__(self, directory: str, token: Optional[str] = None, sample_rate: int = 0,
+                 default_mode: str = "sample", interval: float = 0.001, keep: int = 50):
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.default_mode = default_mode if default_mode in MODES else "sample"
+        self.interval = interval
+        self.keep = keep
+        self.profiles: Deque[dict] = deque(maxlen=keep)
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+        self.skipped = 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        """Check an admin token (always False when no token is configured)"""
+        return bool(self.token) and token is not None and hmac.compare_digest(token, self.token)
+
+    def select(self, scope: dict) -> Optional[str]:
+        """Profiling mode for this request, or None to run it normally"""
+        if not scope["path"].startswith("/api/"):
+            return None
+        mode = None
+        token = None
+        for name, value in scope["headers"]:
+            if name == TOKEN_HEADER:
+                token = value.decode("latin-1")
+            elif name == MODE_HEADER:
+                mode = value.decode("latin-1")
+        if token is None and QUERY_FLAG.encode() in scope["query_string"]:
+            token = parse_qs(scope["query_string"].decode("latin-1")).get(QUERY_FLAG, [None])[0]
+
+        if self.is_admin(token):
+            return mode if mode in MODES else self.default_mode
+        if self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0:
+            return self.default_mode
+        return None
+
+    def begin(self, scope: dict, mode: str) -> Optional[ProfileSession]:
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        # Never store the admin token with the profile
+        query = urlencode([
+            (name, value) for name, value in parse_qsl(scope["query_string"].decode("latin-1"))
+            if name != QUERY_FLAG
+        ])
+        session = ProfileSession(scope["method"], scope["path"], query, mode, self.interval)
+        session.start()
+        return session
+
+    def finish(self, session: ProfileSession) -> None:
+        """Save a stopped session (blocking I/O; run it off the event loop)"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            info = session.describe(session.save(self.directory))
+            if len(self.profiles) == self.keep:
+                self._remove(self.profiles[0]["file"])
+            self.profiles.append(info)
+            logger.info(f"Profiled {session.method} {session.path} in {session.duration_ms}ms -> {info['file']}")
+        except Exception as e:
+            logger.warning(f"Failed to save profile of {session.path}: {e}")
+        finally:
+            self._busy.release()
+
+    def file_path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored profile, by id"""
+        for info in self.profiles:
+            if info["id"] == profile_id:
+                return os.path.join(self.directory, info["file"])
+        return None
+
+    def _remove(self, file_name: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except OSError:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "default_mode": self.default_mode,
+            "stored": len(self.profiles),
+            "skipped": self.skipped
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests selected by a RequestProfiler
+
+    Only added when profiling is enabled, so normal deployments pay nothing.
+    Profiled responses carry an ``X-Profile-Id`` header.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        mode = self.profiler.select(scope) if scope["type"] == "http" else None
+        session = self.profiler.begin(scope, mode) if mode else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                session.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session.profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _active_session.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active_session.reset(token)
+            session.stop()
+            await asyncio.to_thread(self.profiler.finish, session)
@@ -0,0 +1,302 @@
+"""
+Rate limiting for outbound BVG calls and inbound API clients
+Outbound calls share a token bucket (in Redis when available, so all workers
+draw from the same budget) and queue by priority up to a deadline
+"""
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+
+from app.exceptions import UpstreamThrottledException
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Outbound call priority (lower value goes first)"""
+    INTERACTIVE = 0  # departures, station search
+    BACKGROUND = 1   # radar polling
+    PREWARM = 2      # cache pre-warming
+
+
+# Fraction of the bucket that must remain after a take, per priority.
+# Background traffic can never drain the budget that interactive calls need.
+PRIORITY_RESERVE: Dict[Priority, float] = {
+    Priority.INTERACTIVE: 0.0,
+    Priority.BACKGROUND: 0.25,
+    Priority.PREWARM: 0.5,
+}
+
+# Atomic token bucket take. Returns 0 when a token was taken, otherwise the
+# number of milliseconds until one is available at the requested reserve level.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local min_level = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) / 1000 * rate)
+local wait = 0
+if tokens - 1 >= min_level then
+    tokens = tokens - 1
+else
+    wait = math.ceil((min_level + 1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return wait
+"""
+
+
+class TokenBucket:
+    """In-process token bucket"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, min_level: float = 0.0) -> float:
+        """
+        Take one token if at least ``min_level`` tokens remain afterwards
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens - 1 >= min_level:
+                self._tokens -= 1
+                return 0.0
+            return (min_level + 1 - self._tokens) / self.rate
+
+
+class RedisTokenBucket:
+    """Token bucket stored in Redis and shared by all workers"""
+
+    def __init__(self, redis_client, key: str, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.key = key
+        self._redis = redis_client
+        self._script = redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+        # Used while Redis is unreachable so calls are still limited per worker
+        self._fallback = TokenBucket(rate, capacity)
+
+    def try_acquire(self, min_level: float = 0.0) -> float:
+        """Take one token from the shared bucket (see TokenBucket.try_acquire)"""
+        try:
+            wait_ms = self._script(keys=[self.key], args=[self.rate, self.capacity, min_level])
+            return int(wait_ms) / 1000
+        except Exception as e:
+            logger.warning("Redis rate limiter unavailable, using local bucket: %s", e)
+            return self._fallback.try_acquire(min_level)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class OutboundLimiter:
+    """
+    Priority queue in front of a token bucket
+
+    Waiters are served strictly by priority, then arrival order. Each waiter
+    gives up with UpstreamThrottledException once its deadline passes.
+    """
+
+    def __init__(self, bucket, default_timeout: float = 5.0):
+        """
+        Args:
+            bucket: TokenBucket or RedisTokenBucket
+            default_timeout: Seconds a call may wait for a slot
+        """
+        self.bucket = bucket
+        self.default_timeout = default_timeout
+        self._cond = threading.Condition()
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._acquired = {p.name.lower(): 0 for p in Priority}
+        self._throttled = {p.name.lower(): 0 for p in Priority}
+        self._wait_seconds = 0.0
+
+    def acquire(
+        self,
+        operation: str,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None
+    ) -> float:
+        """
+        Wait for an outbound slot
+
+        Args:
+            operation: Upstream operation name (for errors)
+            priority: Call priority
+            timeout: Seconds to wait before giving up (default_timeout if None)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            UpstreamThrottledException: If no slot became available in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        if _on_event_loop():
+            # Waiting here would stall every request of the worker: only take a free slot
+            timeout = 0
+        start = time.monotonic()
+        deadline = start + timeout
+        # Never reserve the whole bucket, or low priority could never be served
+        min_level = min(self.bucket.capacity * PRIORITY_RESERVE[priority], self.bucket.capacity - 1)
+        entry = (int(priority), next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = self.bucket.try_acquire(min_level)
+                        if wait == 0:
+                            waited = time.monotonic() - start
+                            self._acquired[priority.name.lower()] += 1
+                            self._wait_seconds += waited
+                            return waited
+                    else:
+                        # Someone with higher priority is ahead; wait to be notified
+                        wait = timeout
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._throttled[priority.name.lower()] += 1
+                        logger.warning("Outbound %s call throttled after %.1fs", operation, timeout)
+                        raise UpstreamThrottledException(operation, retry_after=max(1, math.ceil(wait)))
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def get_stats(self) -> dict:
+        """Get limiter counters"""
+        with self._cond:
+            acquired = sum(self._acquired.values())
+            return {
+                "backend": "redis" if isinstance(self.bucket, RedisTokenBucket) else "memory",
+                "rate_per_second": self.bucket.rate,
+                "capacity": self.bucket.capacity,
+                "queued": len(self._waiters),
+                "acquired": dict(self._acquired),
+                "throttled": dict(self._throttled),
+                "avg_wait_ms": round(self._wait_seconds / acquired * 1000, 2) if acquired else 0.0
+            }
+
+
+class InboundRateLimiter:
+    """Fixed-window request limiter per API client"""
+
+    def __init__(self, max_requests: int, window: int, enabled: bool = True, redis_client=None):
+        """
+        Args:
+            max_requests: Requests allowed per client per window
+            window: Window length in seconds
+            enabled: Turn limiting on/off
+            redis_client: Optional Redis client to share counters across workers
+        """
+        self.max_requests = max_requests
+        self.window = window
+        self.enabled = enabled
+        self._redis = redis_client
+        self._counters: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._rejected = 0
+
+    def attach_redis(self, redis_client) -> None:
+        """Share counters across workers once Redis is connected (None = stay local)"""
+        self._redis = redis_client
+
+    def hit(self, client_id: str) -> Tuple[bool, int, int]:
+        """
+        Count a request for a client
+
+        Returns:
+            (allowed, remaining requests, seconds until the window resets)
+        """
+        now = time.time()
+        window_index = int(now // self.window)
+        reset_after = max(1, int((window_index + 1) * self.window - now))
+
+        count = None
+        if self._redis is not None:
+            try:
+                key = f"ratelimit:{client_id}:{window_index}"
+                pipe = self._redis.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, self.window + 1)
+                count = pipe.execute()[0]
+            except Exception as e:
+                logger.warning("Redis rate limit counter unavailable, using memory: %s", e)
+
+        if count is None:
+            with self._lock:
+                if len(self._counters) > 10000:
+                    self._counters = {k: v for k, v in self._counters.items() if v[0] == window_index}
+                index, count = self._counters.get(client_id, (window_index, 0))
+                count = count + 1 if index == window_index else 1
+                self._counters[client_id] = (window_index, count)
+
+        allowed = count <= self.max_requests
+        if not allowed:
+            self._rejected += 1
+        return allowed, max(0, self.max_requests - count), reset_after
+
+    def reset(self) -> None:
+        """Forget all in-memory counters"""
+        with self._lock:
+            self._counters.clear()
+
+
+# Global outbound limiter shared by all BVG client instances
+_outbound_limiter: Optional[OutboundLimiter] = None
+
+
+def get_outbound_limiter() -> OutboundLimiter:
+    """Get the outbound limiter, creating it from settings on first use"""
+    global _outbound_limiter
+    if _outbound_limiter is None:
+        from app.config import get_settings
+        from app.utils.cache import get_redis_client
+
+        settings = get_settings()
+        rate = settings.upstream_rate_limit_requests / settings.upstream_rate_limit_window
+        capacity = settings.upstream_rate_limit_burst
+        redis_client = get_redis_client()
+
+        if redis_client is not None:
+            bucket = RedisTokenBucket(redis_client, "ratelimit:bvg:outbound", rate, capacity)
+        else:
+            bucket = TokenBucket(rate, capacity)
+        _outbound_limiter = OutboundLimiter(bucket, default_timeout=settings.upstream_queue_timeout)
+    return _outbound_limiter
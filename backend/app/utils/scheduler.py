@@ -0,0 +1,194 @@
+"""
+Async background scheduler for periodic maintenance
+Runs registered jobs on the event loop with jitter, per-job timeouts and
+overlap protection; started and stopped by the app lifespan.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+import asyncio
+import inspect
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[], Union[Awaitable[Any], Any]]
+
+
+class Job:
+    """A periodic job and its run statistics"""
+
+    def __init__(self, name: str, func: JobFunc, interval: float, jitter: float = 0.1,
+                 timeout: Optional[float] = None, initial_delay: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.initial_delay = interval if initial_delay is None else initial_delay
+        self.is_async = inspect.iscoroutinefunction(func)
+
+        self._task: Optional[asyncio.Task] = None
+        # Sync jobs run in a thread that outlives a timeout; don't start another meanwhile
+        self._thread_future: Optional[asyncio.Future] = None
+
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_error: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        self.total_duration_ms = 0.0
+        self.last_run_at: Optional[float] = None
+
+    @property
+    def busy(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        return self._thread_future is not None and not self._thread_future.done()
+
+    def get_stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "running": self.busy,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+            "avg_duration_ms": round(self.total_duration_ms / self.runs, 2) if self.runs else None,
+            "last_error": self.last_error
+        }
+
+
+class Scheduler:
+    """Run registered jobs periodically on the event loop"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._running = False
+
+    def register(self, name: str, func: JobFunc, interval: float, jitter: float = 0.1,
+                 timeout: Optional[float] = None, initial_delay: Optional[float] = None) -> Job:
+        """
+        Register a periodic job
+
+        Args:
+            name: Unique job name
+            func: Coroutine function, or plain function (run in a worker thread)
+            interval: Seconds between runs
+            jitter: Random +/- fraction of the interval, so workers don't run in lockstep
+            timeout: Seconds before a run counts as failed (None = no limit)
+            initial_delay: Seconds before the first run (defaults to ``interval``)
+        """
+        job = Job(name, func, interval, jitter, timeout, initial_delay)
+        self.jobs[name] = job
+        if self._running:
+            self._loops[name] = asyncio.create_task(self._loop(job), name=f"job:{name}")
+        return job
+
+    async def start(self) -> None:
+        """Start the loops of all registered jobs"""
+        self._running = True
+        for name, job in self.jobs.items():
+            if name not in self._loops:
+                self._loops[name] = asyncio.create_task(self._loop(job), name=f"job:{name}")
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs")
+
+    async def stop(self, grace: float = 5.0) -> None:
+        """Stop scheduling and give running jobs ``grace`` seconds to finish"""
+        self._running = False
+        for loop_task in self._loops.values():
+            loop_task.cancel()
+        await asyncio.gather(*self._loops.values(), return_exceptions=True)
+        self._loops.clear()
+
+        running = [job._task for job in self.jobs.values() if job._task is not None and not job._task.done()]
+        if running:
+            done, pending = await asyncio.wait(running, timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("Scheduler stopped")
+
+    async def run_now(self, name: str) -> None:
+        """Run a job immediately (unless it is already running)"""
+        job = self.jobs[name]
+        if job.busy:
+            job.skipped += 1
+            return
+        job._task = asyncio.create_task(self._run(job))
+        await job._task
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._running,
+            "jobs": {name: job.get_stats() for name, job in self.jobs.items()}
+        }
+
+    async def _loop(self, job: Job) -> None:
+        delay = job.initial_delay
+        while True:
+            await asyncio.sleep(self._jittered(delay, job.jitter))
+            delay = job.interval
+            if job.busy:
+                # Previous run is still going: skip rather than pile up
+                job.skipped += 1
+                logger.warning(f"Job '{job.name}' still running, skipping this run")
+                continue
+            job._task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        started = time.perf_counter()
+        job.last_run_at = time.time()
+        try:
+            if job.is_async:
+                await asyncio.wait_for(job.func(), job.timeout)
+            else:
+                job._thread_future = asyncio.get_running_loop().run_in_executor(None, job.func)
+                await asyncio.wait_for(asyncio.shield(job._thread_future), job.timeout)
+            job.last_error = None
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            job.failures += 1
+            job.last_error = f"timed out after {job.timeout}s"
+            logger.warning(f"Job '{job.name}' timed out after {job.timeout}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Job '{job.name}' failed: {e}")
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            job.runs += 1
+            job.last_duration_ms = round(duration_ms, 2)
+            job.total_duration_ms += duration_ms
+
+    @staticmethod
+    def _jittered(delay: float, jitter: float) -> float:
+        if delay <= 0 or jitter <= 0:
+            return max(0.0, delay)
+        return max(0.0, delay * (1 + random.uniform(-jitter, jitter)))
+
+
+# Global scheduler used by the app lifespan
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """Get the global scheduler, creating it on first use"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
+
+
+async def shutdown_scheduler() -> None:
+    """Stop the global scheduler and drop its jobs"""
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,320 @@
+"""
+Shared-memory cache store for several workers on one host
+A fixed-size hash table in a memory-mapped file (under /dev/shm by default)
+that every local worker maps, so a value cached by one worker is a hit for
+all of them at memory speed, without running Redis.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+    SHM_AVAILABLE = True
+except ImportError:  # No flock (Windows): workers keep separate caches
+    SHM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BTCSHM01"
+# magic, slot count, data area size, next free data offset, used slots, compactions
+HEADER = struct.Struct("<8sIQQIQ")
+HEADER_SIZE = 64
+# key hash, expires_at (epoch seconds), data offset, key length, value length
+SLOT = struct.Struct("<QdQII")
+
+EMPTY = 0  # Hash of a never-used slot (ends a probe sequence)
+DELETED = -1.0  # expires_at of a deleted slot (keeps the probe sequence intact)
+MAX_LOAD = 0.75
+
+
+def default_shm_path() -> str:
+    """RAM-backed location when available, otherwise the temp directory"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "berlin-transport-cache")
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class SharedMemoryStore:
+    """
+    Key-value store with TTLs in a memory-mapped file shared between processes
+
+    Layout: a header, an open-addressing slot table and an append-only data
+    area holding each entry's key and serialized value. Writers take an
+    exclusive flock, readers a shared one. When the data area or the table
+    fills up, live entries are compacted to the front, keeping the ones that
+    live longest if they no longer all fit.
+    """
+
+    def __init__(self, path: Optional[str] = None, size_bytes: int = 64 * 1024 * 1024,
+                 slots: int = 65536):
+        if not SHM_AVAILABLE:
+            raise RuntimeError("Shared-memory cache needs fcntl (POSIX)")
+        self.path = path or default_shm_path()
+        self.slots = slots
+        self.data_offset = HEADER_SIZE + slots * SLOT.size
+        self.data_size = size_bytes - self.data_offset
+        if self.data_size <= 0:
+            raise ValueError(f"Shared cache of {size_bytes} bytes is too small for {slots} slots")
+        # Bigger values would force a compaction every few writes
+        self.max_entry_size = self.data_size // 8
+
+        self._lock = threading.Lock()  # flock does not exclude threads of one process
+        self._hits = 0
+        self._misses = 0
+        self._oversized = 0
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked(exclusive=True, mapped=False):
+                fresh = os.fstat(self._fd).st_size != size_bytes
+                if fresh:
+                    os.ftruncate(self._fd, size_bytes)
+                self._mm = mmap.mmap(self._fd, size_bytes)
+                self._view = memoryview(self._mm)
+                magic, table_slots, data_size, _, _, _ = HEADER.unpack_from(self._mm, 0)
+                if fresh or magic != MAGIC or table_slots != slots or data_size != self.data_size:
+                    self._format()
+        except Exception:
+            os.close(self._fd)
+            raise
+        logger.info(f"Shared-memory cache at {self.path} ({size_bytes // (1024 * 1024)}MB, {slots} slots)")
+
+    def close(self):
+        """Unmap the store (the file stays for the other workers)"""
+        with self._lock:
+            if self._fd < 0:
+                return
+            self._view.release()
+            self._mm.close()
+            os.close(self._fd)
+            self._fd = -1
+
+    @contextmanager
+    def _locked(self, exclusive: bool, mapped: bool = True):
+        with self._lock:
+            if mapped and self._fd < 0:
+                raise RuntimeError("Shared-memory cache is closed")
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_pos(self, index: int) -> int:
+        return HEADER_SIZE + index * SLOT.size
+
+    def _format(self, compactions: int = 0):
+        """Empty the table and data area (caller holds the exclusive lock)"""
+        self._mm[HEADER_SIZE:self.data_offset] = bytes(self.data_offset - HEADER_SIZE)
+        HEADER.pack_into(self._mm, 0, MAGIC, self.slots, self.data_size, 0, 0, compactions)
+
+    def _find(self, key: bytes, key_hash: int) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Probe for ``key``
+
+        Returns:
+            (slot holding the key or None, first slot a new entry can use or None)
+        """
+        mm = self._mm
+        now = time.time()
+        reusable = None
+        start = key_hash % self.slots
+        for i in range(self.slots):
+            index = (start + i) % self.slots
+            slot_hash, expires_at, offset, key_len, _ = SLOT.unpack_from(mm, self._slot_pos(index))
+            if slot_hash == EMPTY:
+                return None, index if reusable is None else reusable
+            if slot_hash == key_hash and expires_at != DELETED and key_len == len(key):
+                begin = self.data_offset + offset
+                if mm[begin:begin + key_len] == key:
+                    return index, None
+            if reusable is None and expires_at <= now:
+                reusable = index
+        return None, reusable
+
+    @contextmanager
+    def view(self, key: str) -> Iterator[Optional[memoryview]]:
+        """
+        Zero-copy view of a live entry's serialized value
+
+        The view points into the shared mapping and is only valid inside the
+        ``with`` block (other workers may compact the store afterwards).
+        """
+        encoded = key.encode("utf-8")
+        with self._locked(exclusive=False):
+            payload = None
+            index, _ = self._find(encoded, _hash(encoded))
+            if index is not None:
+                _, expires_at, offset, key_len, value_len = SLOT.unpack_from(self._mm, self._slot_pos(index))
+                if expires_at > time.time():
+                    begin = self.data_offset + offset + key_len
+                    payload = self._view[begin:begin + value_len]
+            try:
+                yield payload
+            finally:
+                if payload is not None:
+                    payload.release()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, decoded straight from shared memory"""
+        with self.view(key) as payload:
+            if payload is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return json.loads(str(payload, "utf-8"))
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several live values under a single lock"""
+        found: Dict[str, Any] = {}
+        with self._locked(exclusive=False):
+            now = time.time()
+            for key in keys:
+                encoded = key.encode("utf-8")
+                index, _ = self._find(encoded, _hash(encoded))
+                if index is None:
+                    continue
+                _, expires_at, offset, key_len, value_len = SLOT.unpack_from(self._mm, self._slot_pos(index))
+                if expires_at > now:
+                    begin = self.data_offset + offset + key_len
+                    with self._view[begin:begin + value_len] as payload:
+                        found[key] = json.loads(str(payload, "utf-8"))
+        self._hits += len(found)
+        self._misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Store a JSON-serializable value; False if it is too large to share"""
+        payload = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        return self.set_raw(key, payload, ttl_seconds)
+
+    def set_raw(self, key: str, payload: bytes, ttl_seconds: float) -> bool:
+        """Store an already serialized value"""
+        encoded = key.encode("utf-8")
+        size = len(encoded) + len(payload)
+        if size > self.max_entry_size:
+            self._oversized += 1
+            return False
+        key_hash = _hash(encoded)
+
+        with self._locked(exclusive=True):
+            _, _, _, next_free, used, compactions = HEADER.unpack_from(self._mm, 0)
+            index, free = self._find(encoded, key_hash)
+            new_slot = index is None and (free is None or self._is_empty(free))
+            if next_free + size > self.data_size or (new_slot and (free is None or used + 1 > self.slots * MAX_LOAD)):
+                self._compact()
+                _, _, _, next_free, used, compactions = HEADER.unpack_from(self._mm, 0)
+                index, free = self._find(encoded, key_hash)
+
+            if index is None:
+                index = free
+                if self._is_empty(index):
+                    used += 1
+            begin = self.data_offset + next_free
+            self._mm[begin:begin + len(encoded)] = encoded
+            self._mm[begin + len(encoded):begin + size] = payload
+            SLOT.pack_into(self._mm, self._slot_pos(index), key_hash, time.time() + ttl_seconds,
+                           next_free, len(encoded), len(payload))
+            HEADER.pack_into(self._mm, 0, MAGIC, self.slots, self.data_size, next_free + size, used, compactions)
+        return True
+
+    def _is_empty(self, index: int) -> bool:
+        return SLOT.unpack_from(self._mm, self._slot_pos(index))[0] == EMPTY
+
+    def _compact(self):
+        """
+        Rewrite live entries to the front of an empty table (caller holds the exclusive lock)
+
+        If live entries fill more than half the data area or table, the ones
+        expiring soonest are dropped so the next compaction is far away.
+        """
+        now = time.time()
+        live: List[tuple] = []
+        for index in range(self.slots):
+            key_hash, expires_at, offset, key_len, value_len = SLOT.unpack_from(self._mm, self._slot_pos(index))
+            if key_hash != EMPTY and expires_at > now:
+                begin = self.data_offset + offset
+                live.append((expires_at, key_hash, key_len, value_len, bytes(self._mm[begin:begin + key_len + value_len])))
+        live.sort(key=lambda entry: entry[0], reverse=True)
+
+        compactions = HEADER.unpack_from(self._mm, 0)[5] + 1
+        self._format(compactions)
+        byte_budget = self.data_size // 2
+        slot_budget = int(self.slots * MAX_LOAD / 2)
+        next_free = 0
+        kept = 0
+        for expires_at, key_hash, key_len, value_len, data in live:
+            if kept >= slot_budget or next_free + len(data) > byte_budget:
+                break
+            index = key_hash % self.slots
+            while not self._is_empty(index):
+                index = (index + 1) % self.slots
+            begin = self.data_offset + next_free
+            self._mm[begin:begin + len(data)] = data
+            SLOT.pack_into(self._mm, self._slot_pos(index), key_hash, expires_at, next_free, key_len, value_len)
+            next_free += len(data)
+            kept += 1
+        HEADER.pack_into(self._mm, 0, MAGIC, self.slots, self.data_size, next_free, kept, compactions)
+        logger.info(f"Shared-memory cache compacted: kept {kept} of {len(live)} live entries")
+
+    def delete(self, key: str):
+        """Remove a key"""
+        encoded = key.encode("utf-8")
+        with self._locked(exclusive=True):
+            index, _ = self._find(encoded, _hash(encoded))
+            if index is not None:
+                struct.pack_into("<d", self._mm, self._slot_pos(index) + 8, DELETED)
+
+    def clear(self):
+        """Remove all keys (for every worker)"""
+        with self._locked(exclusive=True):
+            self._format(HEADER.unpack_from(self._mm, 0)[5])
+
+    def get_stats(self) -> dict:
+        with self._locked(exclusive=False):
+            _, _, _, next_free, used, compactions = HEADER.unpack_from(self._mm, 0)
+        return {
+            "path": self.path,
+            "slots": self.slots,
+            "used_slots": used,
+            "data_used_bytes": next_free,
+            "data_size_bytes": self.data_size,
+            "compactions": compactions,
+            "hits": self._hits,
+            "misses": self._misses,
+            "oversized": self._oversized
+        }
+
+
+def create_shared_store(mode: str, workers: int, path: Optional[str] = None,
+                        size_mb: int = 64, slots: int = 65536) -> Optional[SharedMemoryStore]:
+    """
+    Open the shared store for the configured mode
+
+    Args:
+        mode: "auto" (on when running more than one worker), "on" or "off"
+        workers: Configured number of workers
+
+    Returns:
+        A store, or None when it is not needed or cannot be opened
+    """
+    mode = mode.lower()
+    if mode == "off" or (mode == "auto" and workers <= 1):
+        return None
+    try:
+        return SharedMemoryStore(path, size_mb * 1024 * 1024, slots)
+    except Exception as e:
+        logger.warning(f"Shared-memory cache unavailable, workers keep separate caches: {e}")
+        return None
@@ -0,0 +1,286 @@
+"""
+Single-flight cache fills
+Only one caller per key fetches from upstream: within a process callers wait
+on the in-flight call, and across workers/replicas the first miss takes a short
+Redis lease while the others wait for the filled value.
+"""
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+import logging
+import threading
+import time
+import uuid
+
+from app.exceptions import DeadlineExceededException
+from app.utils.deadline import SharedDeadline, check_deadline, current_deadline, deadline_scope, remaining_time
+
+logger = logging.getLogger(__name__)
+
+LEASE_PREFIX = "lease:"
+FILLED_CHANNEL = "cache:filled"
+
+# Delete the lease only if we still own it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseMetrics:
+    """Counters and wait-time samples for lease-based fills"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=max_samples)
+        self.counters = {
+            "leases_acquired": 0,     # this process did the fetch
+            "lease_waits": 0,         # another worker was already fetching
+            "filled_by_peer": 0,      # wait ended with the peer's value
+            "lease_expired": 0,       # peer gave up or died; we fetched ourselves
+            "local_waits": 0,         # same-process caller was already fetching
+        }
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = dict(self.counters)
+        if waits:
+            stats["wait_ms"] = {
+                "count": len(waits),
+                "p50": round(waits[len(waits) // 2] * 1000, 2),
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2),
+                "max": round(waits[-1] * 1000, 2)
+            }
+        else:
+            stats["wait_ms"] = None
+        return stats
+
+
+class _Call:
+    """An in-flight fill that same-process callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        # Keeps the fill going while any waiter still has time (None: nobody set a deadline)
+        self.deadline: Optional[SharedDeadline] = None
+
+
+class _FillNotifier:
+    """One pub/sub subscription per process that wakes waiters when a key is filled"""
+
+    def __init__(self, redis_client):
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{FILLED_CHANNEL: self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def event_for(self, key: str) -> threading.Event:
+        with self._lock:
+            return self._events.setdefault(key, threading.Event())
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+    def close(self) -> None:
+        self._thread.stop()
+        self._pubsub.close()
+
+    def _on_message(self, message) -> None:
+        with self._lock:
+            event = self._events.get(message["data"])
+        if event is not None:
+            event.set()
+
+
+class SingleFlight:
+    """Deduplicate concurrent fills of the same key, locally and across workers"""
+
+    def __init__(self, redis_client=None, lease_ttl: float = 10.0, wait_timeout: float = 8.0):
+        """
+        Args:
+            redis_client: Sync Redis client for distributed leases (None = local only)
+            lease_ttl: Seconds a lease is held before others may take over
+            wait_timeout: Max seconds to wait for a peer before fetching ourselves
+        """
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.metrics = LeaseMetrics()
+        self._local: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._notifier: Optional[_FillNotifier] = None
+        self._notifier_failed = False
+        self._release = None
+        self.set_redis(redis_client)
+
+    def set_redis(self, redis_client) -> None:
+        """Switch to distributed leases once a Redis connection is available"""
+        self._release = redis_client.register_script(RELEASE_SCRIPT) if redis_client is not None else None
+        self._redis = redis_client
+
+    def do(self, key: str, fill: Callable[[], Any], peek: Callable[[], Any]) -> Any:
+        """
+        Fill ``key`` once
+
+        Args:
+            key: Cache key
+            fill: Fetches the value, stores it in the shared cache and returns it
+            peek: Reads the shared cache (returns None on miss)
+
+        Returns:
+            The fetched value, or the value filled by another caller
+        """
+        deadline = current_deadline()
+        with self._lock:
+            call = self._local.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                if deadline is not None:
+                    call.deadline = SharedDeadline(deadline)
+                self._local[key] = call
+            elif call.deadline is not None:
+                call.deadline.join(deadline)
+
+        if not leader:
+            self.metrics.incr("local_waits")
+            started = time.monotonic()
+            call.event.wait(remaining_time(self.wait_timeout))
+            self.metrics.observe_wait(time.monotonic() - started)
+            if call.error is not None:
+                if isinstance(call.error, DeadlineExceededException) and (deadline is None or deadline.remaining() > 0):
+                    # Everyone waiting before us gave up on that fill; we still need the value
+                    return fill()
+                raise call.error
+            if call.event.is_set():
+                return call.value
+            check_deadline()
+            return fill()
+
+        try:
+            # The fill only gives up once every waiter has
+            with deadline_scope(call.deadline):
+                call.value = self._distributed(key, fill, peek)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._local.pop(key, None)
+            call.event.set()
+
+    def get_stats(self) -> dict:
+        stats = self.metrics.get_stats()
+        stats["distributed"] = self._redis is not None
+        stats["in_flight"] = len(self._local)
+        return stats
+
+    def close(self) -> None:
+        if self._notifier is not None:
+            self._notifier.close()
+            self._notifier = None
+
+    def _distributed(self, key: str, fill: Callable[[], Any], peek: Callable[[], Any]) -> Any:
+        if self._redis is None:
+            return fill()
+
+        lease_key = LEASE_PREFIX + key
+        deadline = time.monotonic() + remaining_time(self.wait_timeout)
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            token = self._acquire(lease_key)
+            if token is not None:
+                self.metrics.incr("leases_acquired")
+                try:
+                    value = fill()
+                finally:
+                    self._release_lease(lease_key, token, key)
+                return value
+
+            if not waited:
+                self.metrics.incr("lease_waits")
+                waited = True
+
+            value = self._wait_for_fill(key, lease_key, peek, deadline)
+            if value is not None:
+                self.metrics.incr("filled_by_peer")
+                self.metrics.observe_wait(time.monotonic() - started)
+                return value
+
+            if time.monotonic() >= deadline:
+                check_deadline()
+                # The lease holder is stuck or gone; don't wait any longer
+                self.metrics.incr("lease_expired")
+                self.metrics.observe_wait(time.monotonic() - started)
+                return fill()
+            # Lease released without a value (peer failed): try to take it ourselves
+
+    def _acquire(self, lease_key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if self._redis.set(lease_key, token, nx=True, px=int(self.lease_ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Lease acquire failed, fetching without lease: {e}")
+            return token  # Redis trouble: behave as if we own the lease
+
+    def _release_lease(self, lease_key: str, token: str, key: str) -> None:
+        try:
+            self._release(keys=[lease_key], args=[token])
+            self._redis.publish(FILLED_CHANNEL, key)
+        except Exception as e:
+            logger.warning(f"Lease release failed: {e}")
+
+    def _wait_for_fill(self, key: str, lease_key: str, peek: Callable[[], Any], deadline: float) -> Any:
+        """Wait until the value appears, the lease disappears or the deadline passes"""
+        event = self._event_for(key)
+        interval = 0.01
+        try:
+            while time.monotonic() < deadline:
+                if event is not None:
+                    event.wait(interval)
+                else:
+                    time.sleep(interval)
+
+                value = peek()
+                if value is not None:
+                    return value
+                try:
+                    if not self._redis.exists(lease_key):
+                        return None
+                except Exception:
+                    return None
+                interval = min(interval * 1.5, 0.1)
+            return None
+        finally:
+            if event is not None:
+                self._notifier.discard(key)
+
+    def _event_for(self, key: str) -> Optional[threading.Event]:
+        if self._notifier is None:
+            if self._notifier_failed:
+                return None
+            try:
+                self._notifier = _FillNotifier(self._redis)
+            except Exception as e:
+                logger.warning(f"Fill notifications unavailable, polling instead: {e}")
+                self._notifier_failed = True
+                return None
+        return self._notifier.event_for(key)
@@ -0,0 +1,136 @@
+"""
+Adaptive cache TTL policies
+A policy is called with (key, value) when an entry is filled and returns the
+entry's lifetime in seconds, so payloads that change often (or are about to)
+expire sooner than quiet ones.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import hashlib
+import json
+import threading
+import time
+
+
+def fingerprint(value: Any) -> str:
+    """Stable digest of a JSON-like value"""
+    return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class AdaptiveTTL:
+    """
+    TTL that follows how often refreshes of a key actually change it
+
+    Each key starts at ``initial``. A refresh that returns the same payload
+    (by ``digest``) stretches the TTL by ``growth``, a changed payload halves
+    it; the result always stays within [min_ttl, max_ttl].
+    """
+
+    def __init__(self, min_ttl: int, max_ttl: int, initial: Optional[int] = None,
+                 digest: Callable[[Any], Hashable] = fingerprint,
+                 growth: float = 1.5, max_keys: int = 10000):
+        self.min_ttl = min_ttl
+        self.max_ttl = max(max_ttl, min_ttl)
+        self.initial = self.clamp(initial if initial is not None else min_ttl)
+        self.digest = digest
+        self.growth = growth
+        self.max_keys = max_keys
+        # key -> (last digest, current TTL), least recently filled first
+        self._history: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._issued_total = 0.0
+        self._changed = 0
+        self._unchanged = 0
+
+    def __call__(self, key: str, value: Any) -> int:
+        return self.record(key, self.adapt(key, value))
+
+    def clamp(self, ttl: float) -> int:
+        return int(min(self.max_ttl, max(self.min_ttl, ttl)))
+
+    def adapt(self, key: str, value: Any) -> int:
+        """TTL from the change history of ``key``, updated with ``value``"""
+        current = self.digest(value)
+        with self._lock:
+            previous = self._history.pop(key, None)
+            if previous is None:
+                ttl = self.initial
+            elif previous[0] == current:
+                self._unchanged += 1
+                ttl = self.clamp(previous[1] * self.growth)
+            else:
+                self._changed += 1
+                ttl = self.clamp(previous[1] / 2)
+            self._history[key] = (current, ttl)
+            while len(self._history) > self.max_keys:
+                self._history.popitem(last=False)
+        return ttl
+
+    def record(self, key: str, ttl: float) -> int:
+        """Clamp the final TTL and count it in the stats"""
+        ttl = self.clamp(ttl)
+        with self._lock:
+            self._issued += 1
+            self._issued_total += ttl
+        return ttl
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "min_ttl": self.min_ttl,
+                "max_ttl": self.max_ttl,
+                "issued": self._issued,
+                "avg_ttl": round(self._issued_total / self._issued, 1) if self._issued else None,
+                "refreshes_changed": self._changed,
+                "refreshes_unchanged": self._unchanged,
+                "tracked_keys": len(self._history)
+            }
+
+
+class DeparturesTTL(AdaptiveTTL):
+    """
+    TTL for a departures window
+
+    On top of the change history:
+    - the entry never outlives the next departure (down to ``min_ttl``), so a
+      train that has left is refreshed promptly at quiet stops; at hubs the
+      next departure is always close, so ``min_ttl`` is what bounds upstream calls
+    - stops whose realtime data has not been updated for ``realtime_stale_after``
+      seconds only run to schedule and get the longest TTL
+    """
+
+    def __init__(self, min_ttl: int, max_ttl: int, departure_time: Callable[[dict], Optional[float]],
+                 initial: Optional[int] = None, realtime_stale_after: int = 300):
+        super().__init__(min_ttl, max_ttl, initial, digest=self._departures_digest)
+        self.departure_time = departure_time
+        self.realtime_stale_after = realtime_stale_after
+
+    def __call__(self, key: str, window: Any) -> int:
+        data = window.get("data") if isinstance(window, dict) else None
+        if not isinstance(data, dict):
+            return self.record(key, self.min_ttl)
+
+        ttl = self.adapt(key, data)
+        now = time.time()
+
+        updated_at = data.get("realtimeDataUpdatedAt")
+        if isinstance(updated_at, (int, float)) and now - updated_at > self.realtime_stale_after:
+            ttl = self.max_ttl
+
+        upcoming = [
+            when for when in map(self.departure_time, data.get("departures") or [])
+            if when is not None and when > now
+        ]
+        if upcoming:
+            ttl = min(ttl, min(upcoming) - now)
+
+        return self.record(key, ttl)
+
+    @staticmethod
+    def _departures_digest(data: dict) -> str:
+        # Only what riders see; volatile metadata would count every refresh as a change
+        return fingerprint([
+            (d.get("tripId"), d.get("when"), d.get("platform"), d.get("cancelled"))
+            for d in data.get("departures") or [] if isinstance(d, dict)
+        ])
@@ -0,0 +1,29 @@
+"""
+Micro-benchmarks for the backend hot paths
+Run with: python -m benchmarks.run --help
+"""
+from typing import Callable, List, Optional, Sequence
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 50000)
+
+# Registered benchmarks: (name, sizes, setup)
+_benchmarks: List[tuple] = []
+
+
+def benchmark(name: Optional[str] = None, sizes: Sequence[Optional[int]] = (None,)):
+    """
+    Register a benchmark
+
+    The decorated function receives the payload size and returns the
+    zero-argument callable to time, so setup cost is not measured.
+
+    Example:
+        @benchmark("cache.get", sizes=DEFAULT_SIZES)
+        def bench_get(size):
+            cache = prepare(size)
+            return lambda: cache.get("key")
+    """
+    def decorator(setup: Callable):
+        _benchmarks.append((name or setup.__name__, tuple(sizes), setup))
+        return setup
+    return decorator
@@ -0,0 +1,162 @@
+"""
+Benchmarks for code that runs on every request
+"""
+import io
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueListener
+
+from app.api.departures import build_departures
+from app.services.bvg_client import BVGClient, RADAR_PROJECTION
+from app.utils.cache import SimpleCache, make_cache_key
+from app.utils.logging_utils import NonBlockingQueueHandler, RateLimitFilter, StructuredFormatter
+
+from benchmarks.payloads import make_departures_payload, make_radar_payload
+from benchmarks import DEFAULT_SIZES, benchmark
+
+_client = BVGClient.__new__(BVGClient)  # Only the pure helpers are used
+_cache = SimpleCache()
+
+
+@benchmark("cache.make_cache_key")
+def bench_make_cache_key(size):
+    return lambda: make_cache_key("900000100003", duration=60)
+
+
+@benchmark("cache.make_cache_key.self_arg")
+def bench_make_cache_key_self(size):
+    return lambda: make_cache_key(_client, "Alexanderplatz", results=10)
+
+
+@benchmark("cache.get.hit", sizes=DEFAULT_SIZES)
+def bench_cache_get_hit(size):
+    key = f"bench:get:{size}"
+    _cache.set(key, make_departures_payload(size), 300)
+    return lambda: _cache.get(key)
+
+
+@benchmark("cache.get.miss")
+def bench_cache_get_miss(size):
+    return lambda: _cache.get("bench:missing")
+
+
+@benchmark("cache.set", sizes=DEFAULT_SIZES)
+def bench_cache_set(size):
+    key = f"bench:set:{size}"
+    payload = make_departures_payload(size)
+    return lambda: _cache.set(key, payload, 300)
+
+
+BATCH_SIZES = (10, 100, 1000)
+
+
+def _batch(size):
+    items = {f"bench:batch:{size}:{i}": {"stop": i, "departures": [i] * 10} for i in range(size)}
+    _cache.set_many(items, 300)
+    return items
+
+
+@benchmark("cache.get.loop", sizes=BATCH_SIZES)
+def bench_cache_get_loop(size):
+    keys = list(_batch(size))
+    return lambda: [_cache.get(key) for key in keys]
+
+
+@benchmark("cache.get_many", sizes=BATCH_SIZES)
+def bench_cache_get_many(size):
+    keys = list(_batch(size))
+    return lambda: _cache.get_many(keys)
+
+
+@benchmark("cache.set.loop", sizes=BATCH_SIZES)
+def bench_cache_set_loop(size):
+    items = _batch(size)
+    return lambda: [_cache.set(key, value, 300) for key, value in items.items()]
+
+
+@benchmark("cache.set_many", sizes=BATCH_SIZES)
+def bench_cache_set_many(size):
+    items = _batch(size)
+    return lambda: _cache.set_many(items, 300)
+
+
+@benchmark("bvg.convert_to_utc")
+def bench_convert_to_utc(size):
+    return lambda: _client.convert_to_utc(1761663600000)
+
+
+@benchmark("bvg.process_radar_data", sizes=DEFAULT_SIZES)
+def bench_process_radar_data(size):
+    payload = make_radar_payload(size)
+    return lambda: _client.process_radar_data(payload)
+
+
+@benchmark("bvg.slice_departures", sizes=DEFAULT_SIZES)
+def bench_slice_departures(size):
+    # Relative to now: slices are cut against the clock, a fixed date would filter everything out
+    payload = make_departures_payload(size, now=datetime.now(timezone.utc))
+    window = {"duration": 240, "fetched_at": time.time(), "data": payload}
+    return lambda: _client._slice_departures(window, 60)
+
+
+@benchmark("bvg.parse_radar.full", sizes=DEFAULT_SIZES)
+def bench_parse_radar_full(size):
+    raw = json.dumps(make_radar_payload(size)).encode()
+    return lambda: RADAR_PROJECTION.apply(json.loads(raw))
+
+
+@benchmark("bvg.parse_radar.stream", sizes=DEFAULT_SIZES)
+def bench_parse_radar_stream(size):
+    raw = json.dumps(make_radar_payload(size)).encode()
+    return lambda: RADAR_PROJECTION.parse(io.BytesIO(raw))
+
+
+@benchmark("api.build_departures", sizes=DEFAULT_SIZES)
+def bench_build_departures(size):
+    departures = make_departures_payload(size)["departures"]
+    return lambda: build_departures(departures)
+
+
+def _request_logger(name, queued=False, rate_limited=False):
+    """A logger writing JSON lines to /dev/null, like production minus the disk"""
+    target = logging.StreamHandler(open(os.devnull, "w"))
+    target.setFormatter(StructuredFormatter())
+    handler = target
+    if queued:
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=100000))
+        QueueListener(handler.queue, target).start()
+    if rate_limited:
+        handler.addFilter(RateLimitFilter(burst=20, interval=1.0))
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+
+def _log_request(log):
+    # The INFO lines a departures request writes
+    log.info("Getting departures for station: %s (%d min)", "900000100003", 60)
+    log.info("Making request (attempt %d/%d): %s", 1, 3, "https://v6.bvg.transport.rest/stops/900000100003/departures")
+
+
+@benchmark("logging.request.direct")
+def bench_logging_direct(size):
+    log = _request_logger("direct")
+    return lambda: _log_request(log)
+
+
+@benchmark("logging.request.queued")
+def bench_logging_queued(size):
+    log = _request_logger("queued", queued=True)
+    return lambda: _log_request(log)
+
+
+@benchmark("logging.request.queued_rate_limited")
+def bench_logging_rate_limited(size):
+    log = _request_logger("rate_limited", queued=True, rate_limited=True)
+    return lambda: _log_request(log)
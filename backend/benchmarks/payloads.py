@@ -0,0 +1,101 @@
+"""
+Synthetic BVG payload generators for benchmarks
+Payloads are deterministic for a given size so runs are comparable
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+PRODUCTS = [
+    ("suburban", "S"), ("subway", "U"), ("tram", "T"), ("bus", "B"), ("ferry", "F"), ("regional", "RE"),
+]
+DIRECTIONS = ["Pankow", "Ruhleben", "Spandau", "Erkner", "Flughafen BER", "Hermannstr.", "Wittenau"]
+
+
+def _line(rng: random.Random) -> Dict:
+    product, short = rng.choice(PRODUCTS)
+    number = rng.randint(1, 300)
+    return {
+        "type": "line",
+        "id": f"{short.lower()}{number}",
+        "name": f"{short}{number}",
+        "mode": "train" if product in ("suburban", "subway", "regional") else product,
+        "product": product,
+        "productName": short,
+        "operator": {"type": "operator", "id": "796", "name": "Berliner Verkehrsbetriebe"}
+    }
+
+
+def _stop(rng: random.Random) -> Dict:
+    stop_id = f"9000{rng.randint(10000000, 99999999)}"
+    return {
+        "type": "stop",
+        "id": stop_id,
+        "name": f"Stop {stop_id[-4:]}",
+        "location": {
+            "type": "location",
+            "latitude": round(52.4 + rng.random() * 0.2, 6),
+            "longitude": round(13.2 + rng.random() * 0.4, 6)
+        }
+    }
+
+
+def make_departures_payload(count: int, seed: int = 42, now: Optional[datetime] = None) -> Dict:
+    """
+    BVG-shaped departures response with ``count`` departures over the 4 hours from ``now``
+
+    ``now`` defaults to a fixed time, so payloads are identical across runs; pass the
+    current time for code that filters departures against the clock.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2025, 10, 28, 15, 0, tzinfo=timezone.utc)
+    departures: List[Dict] = []
+    for i in range(count):
+        planned = now + timedelta(seconds=rng.randint(0, 240 * 60))
+        delay = rng.choice([None, 0, 60, 120, 300])
+        departures.append({
+            "tripId": f"1|{100000 + i}|0|86|28102025",
+            "stop": _stop(rng),
+            "when": (planned + timedelta(seconds=delay or 0)).isoformat(),
+            "plannedWhen": planned.isoformat(),
+            "delay": delay,
+            "platform": str(rng.randint(1, 8)),
+            "plannedPlatform": str(rng.randint(1, 8)),
+            "direction": rng.choice(DIRECTIONS),
+            "line": _line(rng),
+            "remarks": [{"type": "hint", "code": "bf", "text": "barrier-free"}] * rng.randint(0, 3)
+        })
+    return {
+        "stop": {"type": "stop", "id": "900000100003", "name": "S+U Alexanderplatz"},
+        "departures": departures,
+        "realtimeDataUpdatedAt": 1761663600
+    }
+
+
+def make_radar_payload(count: int, seed: int = 42) -> Dict:
+    """BVG-shaped radar response with ``count`` vehicle movements"""
+    rng = random.Random(seed)
+    movements = []
+    for i in range(count):
+        movements.append({
+            "direction": rng.choice(DIRECTIONS),
+            "tripId": f"1|{200000 + i}|0|86|28102025",
+            "line": _line(rng),
+            "location": {
+                "type": "location",
+                "latitude": round(52.4 + rng.random() * 0.2, 6),
+                "longitude": round(13.2 + rng.random() * 0.4, 6)
+            },
+            "nextStopovers": [
+                {
+                    "stop": _stop(rng),
+                    "arrival": None,
+                    "plannedArrival": None,
+                    "departure": "2025-10-28T15:05:00+01:00",
+                    "departureDelay": rng.choice([None, 0, 60]),
+                }
+                for _ in range(rng.randint(2, 8))
+            ],
+            "frames": [{"origin": _stop(rng), "destination": _stop(rng), "t": 0}]
+        })
+    return {"movements": movements, "realtimeDataUpdatedAt": 1761663600}
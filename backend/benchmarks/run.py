@@ -0,0 +1,153 @@
+"""
+Benchmark runner
+Times every registered benchmark, stores results as JSON and compares runs.
+
+Usage (from backend/):
+    python -m benchmarks.run                           # run and print
+    python -m benchmarks.run --save                    # store benchmarks/results/baseline.json
+    python -m benchmarks.run --compare                 # compare against the stored baseline
+    python -m benchmarks.run --filter cache --max-size 1000
+"""
+import argparse
+import fnmatch
+import glob
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import _benchmarks
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+def load_benchmarks() -> None:
+    """Import all benchmarks/bench_*.py modules so they register themselves"""
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "bench_*.py"))):
+        importlib.import_module(f"benchmarks.{os.path.splitext(os.path.basename(path))[0]}")
+
+
+def time_callable(func: Callable, min_time: float, repeat: int) -> Dict:
+    """Time ``func`` like timeit: calibrate the loop count, then take several repeats"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    per_call = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - start) / loops)
+
+    return {
+        "loops": loops,
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "stdev_us": round(statistics.pstdev(per_call) * 1e6, 3)
+    }
+
+
+def run(pattern: str, max_size: Optional[int], min_time: float, repeat: int) -> Dict:
+    results = {}
+    for name, sizes, setup in _benchmarks:
+        for size in sizes:
+            key = name if size is None else f"{name}[{size}]"
+            if not fnmatch.fnmatch(key, pattern) and pattern not in key:
+                continue
+            if max_size is not None and size is not None and size > max_size:
+                continue
+            result = time_callable(setup(size), min_time, repeat)
+            result["size"] = size
+            results[key] = result
+            print(f"{key:<48}{format_us(result['median_us']):>14}  (min {format_us(result['min_us'])}, "
+                  f"{result['loops']} loops)")
+    return results
+
+
+def format_us(value: float) -> str:
+    if value >= 1e6:
+        return f"{value / 1e6:.3f} s"
+    if value >= 1e3:
+        return f"{value / 1e3:.3f} ms"
+    return f"{value:.3f} us"
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print a comparison table and return the keys that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<48}{'baseline':>14}{'current':>14}{'change':>10}")
+    for key, current in results.items():
+        old = baseline.get("results", {}).get(key)
+        if old is None:
+            print(f"{key:<48}{'-':>14}{format_us(current['median_us']):>14}{'new':>10}")
+            continue
+        change = (current["median_us"] - old["median_us"]) / old["median_us"] * 100
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(key)
+        elif change < -threshold:
+            marker = "  improved"
+        print(f"{key:<48}{format_us(old['median_us']):>14}{format_us(current['median_us']):>14}"
+              f"{change:>+9.1f}%{marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run backend micro-benchmarks")
+    parser.add_argument("--filter", default="*", help="Glob or substring matching benchmark names")
+    parser.add_argument("--max-size", type=int, help="Skip payload sizes above this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed repeats")
+    parser.add_argument("--quick", action="store_true", help="Short run (--min-time 0.02 --repeat 3)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="Write results to a baseline file")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a baseline file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change counted as regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero on regressions")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.min_time, args.repeat = 0.02, 3
+
+    load_benchmarks()
+    results = run(args.filter, args.max_size, args.min_time, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform()
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"\nResults written to {args.save}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"\nNo baseline at {args.compare}; create one with --save")
+            return
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -77,3 +77,10 @@ def mock_bvg_departures_response():
             }
         ]
     }
+
+@pytest.fixture(autouse=True)
+def reset_inbound_rate_limit():
+    """Start every test with a fresh per-client request budget"""
+    from app.main import inbound_limiter
+    inbound_limiter.reset()
+    yield
@@ -0,0 +1,108 @@
+"""
+Tests for admission control and load shedding
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.admission import (
+    CRITICAL, LOW, AdmissionController, AdmissionMiddleware, RouteClass, ShedException
+)
+
+
+def make_controller(lag=0.0, low_limit=1, critical_limit=1, queue_size=1, queue_timeout=0.2):
+    classes = [
+        RouteClass("critical", CRITICAL, critical_limit, queue_size, queue_timeout),
+        RouteClass("low", LOW, low_limit, queue_size, queue_timeout),
+    ]
+    routes = [("/api/departures/", "critical"), ("/api/radar/", "low")]
+    return AdmissionController(classes, routes, lag_threshold=0.2, lag_source=lambda: lag)
+
+def test_queue_hands_over_slots_in_order():
+    """Test that waiting requests get the slot freed by a finishing one"""
+    async def scenario():
+        controller = make_controller()
+        critical = controller.classes["critical"]
+        await controller.acquire(critical)
+        waiting = asyncio.create_task(controller.acquire(critical))
+        await asyncio.sleep(0)
+        with pytest.raises(ShedException) as shed:
+            await controller.acquire(critical)
+        controller.release(critical)
+        await waiting
+        return critical, shed.value.reason
+
+    critical, reason = asyncio.run(scenario())
+    assert reason == "queue_full"
+    assert critical.in_flight == 1 and critical.admitted == 2
+
+def test_queue_deadline_sheds():
+    """Test that a request waiting past the class deadline is shed"""
+    async def scenario():
+        controller = make_controller(queue_timeout=0.05)
+        critical = controller.classes["critical"]
+        await controller.acquire(critical)
+        with pytest.raises(ShedException) as shed:
+            await controller.acquire(critical)
+        return critical, shed.value.reason
+
+    critical, reason = asyncio.run(scenario())
+    assert reason == "queue_timeout"
+    assert not critical.waiters and critical.shed["queue_timeout"] == 1
+
+def test_low_priority_shed_first():
+    """Test that loop lag and waiting departures shed radar but not departures"""
+    async def scenario():
+        lagging = make_controller(lag=0.5)
+        await lagging.acquire(lagging.classes["critical"])
+        with pytest.raises(ShedException) as by_lag:
+            await lagging.acquire(lagging.classes["low"])
+
+        busy = make_controller()
+        critical = busy.classes["critical"]
+        await busy.acquire(critical)
+        waiting = asyncio.create_task(busy.acquire(critical))
+        await asyncio.sleep(0)
+        with pytest.raises(ShedException) as by_priority:
+            await busy.acquire(busy.classes["low"])
+        waiting.cancel()
+        return by_lag.value.reason, by_priority.value.reason, critical
+
+    by_lag, by_priority, critical = asyncio.run(scenario())
+    assert (by_lag, by_priority) == ("loop_lag", "priority")
+    assert not critical.waiters and critical.in_flight == 1
+
+def test_middleware_answers_503_with_retry_after():
+    """Test the fast 503 for shed requests and that other paths are not limited"""
+    controller = make_controller(low_limit=0, queue_size=0)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.get("/api/radar/vehicles")
+    async def radar():
+        return {"vehicles": []}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    client = TestClient(app)
+    response = client.get("/api/radar/vehicles")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert "sobrecargado" in response.json()["detail"]
+    assert client.get("/health").status_code == 200
+    assert controller.get_stats()["shed_total"] == 1
+
+def test_shed_answers_are_readable_cross_origin(client):
+    """Test that a shed 503 from the real app carries CORS headers for the frontend"""
+    from app.main import admission
+    with patch.object(admission, "lag_source", lambda: 10.0):
+        response = client.get("/api/radar/vehicles", headers={"Origin": "http://localhost:3001"})
+    assert response.status_code == 503
+    assert response.headers["X-Shed-Reason"] == "loop_lag"
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:3001"
+    assert "retry-after" in response.headers["Access-Control-Expose-Headers"].lower()
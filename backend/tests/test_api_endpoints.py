@@ -103,6 +103,28 @@ def test_get_departures_api_unavailable(mock_client, client):
     data = response.json()
     assert "detail" in data
 
+@patch('app.services.bvg_client.requests.Session.get')
+def test_get_departures_unknown_station(mock_get, client):
+    """Test that a station BVG doesn't know answers 404, from cache the second time"""
+    import requests
+    from app.utils.cache import clear_cache
+    clear_cache()
+    mock_response = MagicMock()
+    mock_response.status_code = 404
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+    mock_get.return_value = mock_response
+    
+    for _ in range(2):
+        response = client.get("/api/departures/900000999999")
+        assert response.status_code == 404
+    assert mock_get.call_count == 1
+    clear_cache()
+
+def test_get_departures_unknown_product(client):
+    """Test that an unknown product filter is rejected"""
+    response = client.get("/api/departures/900000100003?products=zeppelin")
+    assert response.status_code == 400
+
 def test_get_station_info(client):
     """Test get station info endpoint"""
     response = client.get("/api/stations/900000100003")
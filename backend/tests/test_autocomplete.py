@@ -0,0 +1,104 @@
+"""
+Tests for search-as-you-type caching and per-session debouncing
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.services.bvg_client import BVGClient
+from app.utils.autocomplete import SearchDebouncer, normalize_query
+from app.utils.cache import clear_cache
+
+STOPS = [
+    {"type": "stop", "id": "900000100003", "name": "S+U Alexanderplatz"},
+    {"type": "stop", "id": "900000100024", "name": "Alexanderplatz/Memhardstr."},
+    {"type": "stop", "id": "900000007102", "name": "Alexandrinenstr."},
+]
+
+@pytest.fixture
+def bvg_client():
+    clear_cache()
+    yield BVGClient()
+    clear_cache()
+
+def test_normalize_query():
+    """Test that case, diacritics, punctuation and whitespace are folded"""
+    assert normalize_query("  S+U  Görlitzer Bhf ") == "s u gorlitzer bhf"
+    assert normalize_query("Straße") == "strasse"
+    assert normalize_query("ALEX") == normalize_query("alex")
+
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_longer_queries_filter_a_complete_prefix(mock_request, bvg_client):
+    """Test that a complete result set answers longer queries without BVG"""
+    mock_request.return_value = STOPS  # 3 < 10: nothing else matches "alex"
+    bvg_client.search_stations("Alex")
+
+    assert [s["id"] for s in bvg_client.search_stations("alexan")] == [s["id"] for s in STOPS]
+    assert [s["id"] for s in bvg_client.search_stations("ALEXANDERPL")] == ["900000100003", "900000100024"]
+    assert [s["id"] for s in bvg_client.search_stations("alexanderplatz memh", results=1)] == ["900000100024"]
+    assert [s["id"] for s in bvg_client.search_stations("Älex ")] == [s["id"] for s in STOPS]
+    assert mock_request.call_count == 1
+    assert bvg_client.autocomplete.get_stats()["prefix_hits"] == 3
+
+    # No local match: BVG may still find it (fuzzy matching), so it is asked
+    bvg_client.search_stations("alexz")
+    assert mock_request.call_count == 2
+
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_query_sent_as_typed_and_cached_normalized(mock_request, bvg_client):
+    """Test that BVG sees the user's query while spellings share one cache entry"""
+    mock_request.return_value = STOPS[:1]
+    bvg_client.autocomplete = None  # Exact cache only
+    bvg_client.search_stations(" S+U Görlitzer ")
+    assert "query=S%2BU+G%C3%B6rlitzer" in mock_request.call_args[0][0]
+
+    bvg_client.search_stations("s u gorlitzer")
+    assert mock_request.call_count == 1
+
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_truncated_result_set_is_not_reused(mock_request, bvg_client):
+    """Test that a result set cut at the limit only serves the same query"""
+    mock_request.return_value = STOPS[:2]
+    bvg_client.search_stations("alex", results=2)
+    bvg_client.search_stations("alex", results=1)
+    assert mock_request.call_count == 1
+
+    bvg_client.search_stations("alexa", results=2)
+    assert mock_request.call_count == 2
+
+def test_debouncer_lets_only_the_last_query_through():
+    """Test that a typing burst from one session sends one query upstream"""
+    debouncer = SearchDebouncer(delay=0.05)
+
+    async def typing():
+        first = await debouncer.settle("session")  # After a pause: runs at once
+        burst = []
+        for _ in range(3):
+            burst.append(asyncio.create_task(debouncer.settle("session")))
+            await asyncio.sleep(0.01)
+        other = await debouncer.settle("other")
+        return first, await asyncio.gather(*burst), other
+
+    first, burst, other = asyncio.run(typing())
+    assert first is True and other is True
+    assert burst == [False, False, True]
+    assert debouncer.get_stats()["superseded"] == 2
+
+@patch('app.api.stations.search_debouncer')
+@patch('app.services.bvg_client._bvg_client')
+def test_search_debounced_only_with_a_session_id(mock_client, mock_debouncer, client, mock_bvg_stations_response):
+    """Test that requests without X-Session-Id are never superseded"""
+    async def superseded(session):
+        return False
+    mock_debouncer.settle.side_effect = superseded
+    mock_client.search_stations.return_value = mock_bvg_stations_response
+    mock_client.cached_stations.return_value = None
+
+    response = client.get("/api/stations/search?q=alex").json()
+    assert response["superseded"] is False and len(response["stations"]) == 2
+    assert mock_debouncer.settle.call_count == 0
+
+    response = client.get("/api/stations/search?q=alex", headers={"X-Session-Id": "tab-1"}).json()
+    assert response["superseded"] is True and response["stations"] == []
+    mock_debouncer.settle.assert_called_once_with("tab-1")
@@ -2,8 +2,10 @@
 Tests for BVG Client
 """
 import pytest
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch, MagicMock
-from app.services.bvg_client import BVGClient
+from app.services.bvg_client import BVGClient, parse_products
 from app.utils.cache import clear_cache
 
 @pytest.fixture
@@ -92,6 +94,104 @@ def test_get_departures_none_response(mock_request, bvg_client):
     result = bvg_client.get_departures("123")
     assert result is None
 
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_departures_sliced_from_wider_window(mock_request, bvg_client):
+    """Test that shorter durations reuse the widest cached window"""
+    now = datetime.now(timezone.utc)
+    mock_request.return_value = {
+        "departures": [
+            {"when": (now + timedelta(minutes=m)).isoformat(), "direction": f"+{m}"}
+            for m in (5, 25, 50, 100)
+        ]
+    }
+    
+    wide = bvg_client.get_departures("123", duration=120)
+    assert len(wide["departures"]) == 4
+    
+    short = bvg_client.get_departures("123", duration=30)
+    assert [d["direction"] for d in short["departures"]] == ["+5", "+25"]
+    assert mock_request.call_count == 1
+    
+    # Only a longer window goes upstream again
+    bvg_client.get_departures("123", duration=240)
+    assert mock_request.call_count == 2
+    assert "duration=240" in mock_request.call_args[0][0]
+
+def test_departures_sliced_relative_to_now(bvg_client):
+    """Test that an aged window is cut from now, not from when it was fetched"""
+    now = datetime.now(timezone.utc)
+    window = {
+        "duration": 120,
+        "fetched_at": (now - timedelta(minutes=3)).timestamp(),
+        "data": {"departures": [
+            {"when": None, "plannedWhen": (now + timedelta(minutes=m)).isoformat(), "direction": f"{m:+d}"}
+            for m in (-2, 5, 28, 32)
+        ]}
+    }
+    short = bvg_client._slice_departures(window, 30)
+    assert [d["direction"] for d in short["departures"]] == ["+5", "+28"]
+
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_departures_use_lean_profile_and_products(mock_request, bvg_client):
+    """Test that departures ask BVG for a lean, product-filtered payload"""
+    mock_request.return_value = {"departures": []}
+    bvg_client.get_departures("123", duration=30, products=["subway", "tram"])
+    
+    url = mock_request.call_args[0][0]
+    assert "remarks=false" in url
+    assert "linesOfStops=false" in url
+    assert "subway=true" in url and "tram=true" in url and "bus=false" in url
+
+def test_parse_products():
+    """Test product filter parsing"""
+    assert parse_products(None) is None
+    assert parse_products("Tram, subway") == ["subway", "tram"]
+    with pytest.raises(ValueError):
+        parse_products("zeppelin")
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_unknown_station_is_cached_negatively(mock_get, bvg_client):
+    """Test that repeated lookups of an unknown station don't reach BVG"""
+    import requests
+    mock_response = Mock()
+    mock_response.status_code = 404
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+    mock_get.return_value = mock_response
+    
+    assert bvg_client.get_departures("999999") == {}
+    assert bvg_client.get_departures("999999", duration=120) == {}
+    assert mock_get.call_count == 1
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_other_client_errors_are_not_cached_as_unknown(mock_get, bvg_client):
+    """Test that a 4xx other than 404 gets the short error TTL and is then retried"""
+    import requests
+    from app.utils import cache as cache_module
+    from app.utils.cache import NEGATIVE_KEY, NegativeResult, cache_get
+    mock_response = Mock()
+    mock_response.status_code = 400
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+    mock_get.return_value = mock_response
+    
+    with patch.dict(cache_module._cache._negative_ttls, {NegativeResult.ERROR: 1}):
+        assert bvg_client.get_departures("999999") is None
+        assert cache_get("departures:window:999999")[NEGATIVE_KEY] == NegativeResult.ERROR
+        assert bvg_client.get_departures("999999") is None
+        assert mock_get.call_count == 1  # Cached, but only briefly
+        
+        time.sleep(1.1)
+        assert bvg_client.get_departures("999999") is None
+        assert mock_get.call_count == 2
+
+@patch('app.services.bvg_client.BVGClient._make_request')
+def test_empty_search_is_cached(mock_request, bvg_client):
+    """Test that searches without stops are cached and return an empty list"""
+    mock_request.return_value = [{"type": "address", "id": "456", "name": "Somewhere"}]
+    
+    assert bvg_client.search_stations("nowhere") == []
+    assert bvg_client.search_stations("nowhere") == []
+    assert mock_request.call_count == 1
+
 def test_convert_to_utc(bvg_client):
     """Test timestamp conversion to UTC"""
     timestamp_ms = 1698508800000  # Oct 28, 2023 12:00:00 UTC
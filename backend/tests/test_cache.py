@@ -3,7 +3,10 @@ Tests for cache utility
 """
 import pytest
 import time
-from app.utils.cache import cached, clear_cache, get_cache_stats, cleanup_cache
+from app.utils.cache import (
+    NegativeResult, SimpleCache, cached, cache_get_many, cache_set_many,
+    clear_cache, get_cache_stats, cleanup_cache
+)
 
 @pytest.fixture(autouse=True)
 def reset_cache():
@@ -115,3 +118,75 @@ def test_cleanup_expired():
     # Cleanup should remove expired entries
     removed = cleanup_cache()
     assert removed >= 0  # Should remove at least some entries
+
+def test_negative_results_are_cached():
+    """Test that negative results are served from cache as their value"""
+    call_count = 0
+    
+    @cached(ttl=60)
+    def lookup(x):
+        nonlocal call_count
+        call_count += 1
+        return NegativeResult(NegativeResult.EMPTY, value=[])
+    
+    assert lookup("nothing") == []
+    assert lookup("nothing") == []
+    assert call_count == 1
+    
+    stats = get_cache_stats()
+    assert stats["negative_stored"] >= 1
+    assert stats["negative_hits"] >= 1
+
+def test_get_many_and_set_many_in_memory():
+    """Test batch operations and their hit/miss accounting"""
+    before = get_cache_stats()
+    cache_set_many({"board:1": [1], "board:2": [2]}, 60)
+    
+    found = cache_get_many(["board:1", "board:2", "board:3"])
+    assert found == {"board:1": [1], "board:2": [2]}
+    
+    stats = get_cache_stats()
+    assert stats["hits"] - before["hits"] == 2
+    assert stats["misses"] - before["misses"] == 1
+
+
+class FakeRedis:
+    """Just enough of redis.Redis to count round trips"""
+    
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+    
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+    
+    def pipeline(self, transaction=True):
+        redis = self
+        
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+            
+            def setex(self, key, ttl, value):
+                self.commands.append((key, value))
+            
+            def execute(self):
+                redis.round_trips += 1
+                redis.data.update(self.commands)
+        
+        return Pipeline()
+
+def test_batch_operations_use_one_redis_round_trip():
+    """Test that get_many/set_many use MGET and a single pipeline"""
+    cache = SimpleCache()
+    fake = FakeRedis()
+    cache._redis_client = fake
+    cache._use_redis = True
+    
+    cache.set_many({f"tile:{i}": {"i": i} for i in range(100)}, lambda key, value: 30)
+    found = cache.get_many([f"tile:{i}" for i in range(120)])
+    
+    assert fake.round_trips == 2
+    assert len(found) == 100 and found["tile:7"] == {"i": 7}
+    assert cache._hits == 100 and cache._misses == 20
@@ -0,0 +1,71 @@
+"""
+Tests for cross-worker cache coherence
+"""
+import pytest
+import time
+
+from app.utils.cache import SimpleCache
+from app.utils.cache_bus import CacheBus, UnixSocketCacheBus, create_cache_bus
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def worker_caches(tmp_path):
+    """Two caches standing in for two workers on one host"""
+    caches = [SimpleCache(), SimpleCache()]
+    for cache in caches:
+        cache.clear()
+        cache.attach_bus(UnixSocketCacheBus(str(tmp_path)))
+    yield caches
+    for cache in caches:
+        cache.detach_bus()
+        cache.clear()
+
+def test_fill_is_shared_between_workers(worker_caches):
+    """Test that one worker's fetch fills the other worker's cache"""
+    first, second = worker_caches
+    first.set("departures:abc", {"departures": [1, 2]}, 60)
+    assert wait_for(lambda: second.get("departures:abc") is not None)
+    assert second.get("departures:abc") == {"departures": [1, 2]}
+
+def test_invalidation_is_broadcast(worker_caches):
+    """Test that deletes and clears reach the other worker"""
+    first, second = worker_caches
+    first.set("a", 1, 60)
+    first.set("b", 2, 60)
+    assert wait_for(lambda: second.get("b") == 2)
+
+    first.delete("a")
+    assert wait_for(lambda: second.get("a") is None)
+
+    first.clear()
+    assert wait_for(lambda: second.get("b") is None)
+
+def test_oversized_fill_becomes_invalidation(worker_caches):
+    """Test that payloads too large for a datagram invalidate instead of fill"""
+    first, second = worker_caches
+    second.set("big", "old", 60)
+    assert wait_for(lambda: first.get("big") == "old")
+
+    first.set("big", [str(i) * 50 for i in range(200000)], 60)
+    assert wait_for(lambda: second.get("big") is None)
+
+def test_create_cache_bus_modes(tmp_path):
+    """Test bus selection from settings"""
+    assert create_cache_bus("auto", workers=1) is None
+    assert create_cache_bus("off", workers=4) is None
+    assert isinstance(create_cache_bus("auto", workers=4, socket_dir=str(tmp_path)), UnixSocketCacheBus)
+
+def test_bus_without_transport_cannot_be_created():
+    """Test that a bus subclass missing _send fails when instantiated, not on first publish"""
+    class Incomplete(CacheBus):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
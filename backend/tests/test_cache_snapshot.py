@@ -0,0 +1,63 @@
+"""
+Tests for warm-restart cache snapshots
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.utils.cache import SimpleCache
+from app.utils.cache_snapshot import MAGIC, read_snapshot, write_snapshot
+
+
+def memory_cache() -> SimpleCache:
+    cache = SimpleCache()
+    cache._next_connect = float("inf")  # Stay in memory, don't try Redis
+    return cache
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that live entries come back with their remaining TTL"""
+    path = str(tmp_path / "cache.snap")
+    count = write_snapshot(path, [("stations:search:alex", [{"id": "1"}], 120), ("expired", 1, -5)])
+
+    assert count == 1
+    entries = list(read_snapshot(path))
+    assert [(key, value) for key, value, _ in entries] == [("stations:search:alex", [{"id": "1"}])]
+    assert 110 < entries[0][2] <= 120
+
+def test_snapshot_skips_entries_expired_on_disk(tmp_path):
+    """Test that entries expiring between save and load are not restored"""
+    path = str(tmp_path / "cache.snap")
+    write_snapshot(path, [("short", "a", 0.01), ("long", "b", 60)])
+    time.sleep(0.05)
+
+    assert [key for key, _, _ in read_snapshot(path)] == ["long"]
+
+def test_snapshot_tolerates_missing_foreign_and_truncated_files(tmp_path):
+    """Test that unreadable snapshots are ignored instead of failing startup"""
+    assert list(read_snapshot(str(tmp_path / "missing.snap"))) == []
+
+    foreign = tmp_path / "foreign.snap"
+    foreign.write_bytes(b"not a snapshot at all")
+    assert list(read_snapshot(str(foreign))) == []
+
+    path = str(tmp_path / "cache.snap")
+    write_snapshot(path, [("first", 1, 60), ("second", 2, 60)])
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    assert [key for key, _, _ in read_snapshot(path)] == ["first"]
+    assert open(path, "rb").read(len(MAGIC)) == MAGIC
+
+def test_cache_restore_keeps_fresher_entries(tmp_path):
+    """Test that a restore does not overwrite entries filled since startup"""
+    path = str(tmp_path / "cache.snap")
+    source = memory_cache()
+    source.set("departures:1", {"old": True}, 60)
+    source.set("search:alex", ["x"], 60)
+    assert source.save_snapshot(path) == 2
+
+    target = memory_cache()
+    target._cache["departures:1"] = ({"old": False}, datetime.now() + timedelta(seconds=30))
+
+    assert target.load_snapshot(path) == 1
+    assert target.get("departures:1") == {"old": False}
+    assert target.get("search:alex") == ["x"]
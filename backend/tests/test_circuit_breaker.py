@@ -0,0 +1,138 @@
+"""
+Tests for upstream circuit breakers
+"""
+import pytest
+import time
+from unittest.mock import patch
+import requests
+
+from app.exceptions import CircuitOpenException
+from app.services.bvg_client import BVGClient
+from app.utils.cache import clear_cache
+from app.utils.circuit_breaker import (
+    CircuitBreaker, CLOSED, OPEN, HALF_OPEN, _listeners, add_transition_listener, reset_breakers
+)
+
+@pytest.fixture
+def bvg_client():
+    """Create a BVG client with fresh cache and breakers"""
+    clear_cache()
+    reset_breakers()
+    yield BVGClient()
+    reset_breakers()
+
+def test_breaker_opens_after_threshold():
+    """Test that consecutive failures open the circuit"""
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow_request() is False
+    assert breaker.retry_after > 0
+
+def test_breaker_success_resets_failures():
+    """Test that a success resets the consecutive failure count"""
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_breaker_half_open_probe():
+    """Test that half-open allows a single probe and closes on success"""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False  # Only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+    stats = breaker.get_stats()
+    assert stats["transitions"]["closed->open"] == 1
+    assert stats["transitions"]["half_open->closed"] == 1
+
+def test_breaker_half_open_failure_reopens():
+    """Test that a failed probe opens the circuit again"""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+    assert breaker.allow_request() is True
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+def test_listener_may_read_breaker():
+    """Test that transition listeners run outside the breaker's lock"""
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    seen = []
+
+    def listener(name, old_state, new_state):
+        seen.append((new_state, breaker.state, breaker.get_stats()["consecutive_failures"]))
+
+    add_transition_listener(listener)
+    try:
+        breaker.record_failure()
+    finally:
+        _listeners.remove(listener)
+    assert seen == [(OPEN, OPEN, 1)]
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_open_breaker_fails_fast(mock_get, bvg_client):
+    """Test that no upstream call is made while the breaker is open"""
+    mock_get.side_effect = requests.exceptions.Timeout()
+    breaker = bvg_client.breakers["departures"]
+
+    for _ in range(breaker.failure_threshold):
+        assert bvg_client.get_departures("123") is None
+        clear_cache()
+    calls = mock_get.call_count
+
+    with pytest.raises(CircuitOpenException) as exc_info:
+        bvg_client.get_departures("123")
+
+    assert mock_get.call_count == calls
+    assert exc_info.value.stale_data is None
+    assert exc_info.value.retry_after >= 1
+
+def test_open_breaker_serves_last_known_good(bvg_client):
+    """Test that the last successful payload is attached when the breaker is open"""
+    payload = {"stop": {"name": "Test Station"}, "departures": []}
+    window = {"duration": 60, "fetched_at": time.time(), "data": payload}
+    bvg_client._remember_last_known_good("departures", window, "123")
+    breaker = bvg_client.breakers["departures"]
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenException) as exc_info:
+        bvg_client.get_departures("123")
+    assert exc_info.value.stale_data == payload
+
+@patch('app.services.bvg_client._bvg_client')
+def test_departures_endpoint_stale_and_retry_after(mock_client, client, mock_bvg_departures_response):
+    """Test that the API serves stale data or a fast 503 with Retry-After"""
+    mock_client.get_departures.side_effect = CircuitOpenException(
+        "departures", retry_after=12, stale_data=mock_bvg_departures_response
+    )
+    response = client.get("/api/departures/900000100003")
+    assert response.status_code == 200
+    assert response.json()["stale"] is True
+
+    mock_client.get_departures.side_effect = CircuitOpenException("departures", retry_after=12)
+    response = client.get("/api/departures/900000100003")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+
+def test_breakers_endpoint(client):
+    """Test breaker state export endpoint"""
+    response = client.get("/api/upstream/breakers")
+    assert response.status_code == 200
+    assert "departures" in response.json()["breakers"]
@@ -0,0 +1,139 @@
+"""
+Tests for request deadlines and cancellation on client disconnect
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from app.exceptions import DeadlineExceededException
+from app.services.bvg_client import BVGClient
+from app.utils.circuit_breaker import reset_breakers
+from app.utils.deadline import (
+    DISCONNECTED, Deadline, DeadlineMiddleware, SharedDeadline,
+    check_deadline, current_deadline, deadline_scope, run_with_deadline
+)
+from app.utils.single_flight import SingleFlight
+
+def test_shared_deadline_lives_while_any_waiter_does():
+    """Test that shared work expires only once every waiter has given up"""
+    first, second = Deadline(0.5), Deadline(5)
+    shared = SharedDeadline(first)
+    shared.join(second)
+    first.cancel()
+    assert shared.remaining() > 4
+
+    second.cancel()
+    assert shared.remaining() == 0
+    assert shared.cause() == DISCONNECTED
+
+    shared.join(None)  # Background caller without a deadline
+    assert shared.remaining() == float("inf")
+
+def test_run_with_deadline_gives_up_and_stops_the_thread():
+    """Test that the caller is answered at the deadline and the thread stops at its next check"""
+    checked = threading.Event()
+
+    def slow_call():
+        time.sleep(0.2)
+        try:
+            check_deadline()
+        except DeadlineExceededException:
+            checked.set()
+            raise
+
+    async def main():
+        with deadline_scope(Deadline(0.05)):
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceededException):
+                await run_with_deadline(slow_call)
+            return time.monotonic() - started
+
+    assert asyncio.run(main()) < 0.15
+    assert checked.wait(1)
+
+def test_single_flight_fill_survives_while_a_waiter_remains():
+    """Test that the leader's deadline passing does not abort a fill others wait for"""
+    flight = SingleFlight()
+    leader_in_fill = threading.Event()
+    results = {}
+
+    def fill():
+        leader_in_fill.set()
+        time.sleep(0.15)
+        check_deadline()  # Raises if nobody waits any more
+        return "value"
+
+    def caller(name, timeout):
+        with deadline_scope(Deadline(timeout)):
+            try:
+                results[name] = flight.do("key", fill, lambda: None)
+            except DeadlineExceededException:
+                results[name] = "expired"
+
+    leader = threading.Thread(target=caller, args=("leader", 0.05))
+    leader.start()
+    leader_in_fill.wait(1)
+    follower = threading.Thread(target=caller, args=("follower", 2))
+    follower.start()
+    leader.join()
+    follower.join()
+    assert results == {"leader": "value", "follower": "value"}
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_upstream_timeout_capped_and_not_blamed_on_upstream(mock_get):
+    """Test that socket timeouts shrink to the deadline and expiring it leaves the breaker alone"""
+    reset_breakers()
+    client = BVGClient()
+    mock_get.side_effect = requests.exceptions.Timeout("slow")
+
+    with deadline_scope(Deadline(0.5)):
+        # Remaining time seen by the limiter, the one attempt, then the final check
+        with patch('app.services.bvg_client.remaining_time', side_effect=[5.0, 0.3, 0.0]):
+            with pytest.raises(DeadlineExceededException):
+                client._make_request("https://example.test/radar", operation="radar")
+    assert mock_get.call_args.kwargs["timeout"] == 0.3
+    assert client.breakers["radar"].get_stats()["consecutive_failures"] == 0
+
+    with deadline_scope(Deadline(0)):
+        with pytest.raises(DeadlineExceededException):
+            client._make_request("https://example.test/radar", operation="radar")
+    assert mock_get.call_count == 1  # Never called once the deadline is gone
+    reset_breakers()
+
+def test_middleware_cancels_handler_on_disconnect():
+    """Test that a client disconnect cancels the deadline and the running handler"""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["deadline"] = current_deadline()
+        await receive()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            seen["cancelled"] = True
+            raise
+
+    async def main():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        middleware = DeadlineMiddleware(app, timeout=10)
+        scope = {"type": "http", "path": "/api/radar/vehicles", "method": "GET",
+                 "headers": [(b"x-request-timeout", b"3")]}
+        started = time.monotonic()
+        await middleware(scope, receive, Mock())
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 1
+    assert seen["cancelled"] is True
+    assert seen["deadline"].reason == DISCONNECTED
+    assert seen["deadline"].expires_at - time.monotonic() < 3
@@ -0,0 +1,80 @@
+"""
+Tests for departure timelines and since-based delta responses
+"""
+import copy
+from unittest.mock import patch
+
+from app.services.departure_timeline import DepartureTimeline, departure_key
+
+def test_timeline_delta():
+    """Test that a delta lists exactly what was added, changed and removed"""
+    timeline = DepartureTimeline()
+    v1 = timeline.update({"a": 1, "b": 2, "c": 3})
+    assert timeline.update({"a": 1, "b": 2, "c": 3}) == v1  # No change, no new version
+
+    v2 = timeline.update({"a": 1, "b": 20, "d": 4})
+    assert v2 > v1
+    assert timeline.delta(v1) == {"added": [4], "changed": [20], "removed": ["c"]}
+    assert timeline.delta(v2) == {"added": [], "changed": [], "removed": []}
+
+    timeline.update({"a": 1, "b": 20, "c": 3, "d": 4})  # Back again: added, no longer removed
+    assert timeline.delta(v2) == {"added": [3], "changed": [], "removed": []}
+    assert timeline.delta(12345) is None  # Unknown version: caller sends everything
+
+def test_old_versions_fall_back_to_full():
+    """Test that clients lagging more than the history get no delta"""
+    timeline = DepartureTimeline(history=3)
+    first = timeline.update({"a": 0})
+    for value in range(1, 4):
+        timeline.update({"a": value})
+    assert timeline.delta(first) is None
+
+def test_departure_key():
+    """Test that departures without a trip ID still get a stable key"""
+    assert departure_key({"tripId": "1|2345|0", "plannedWhen": "15:30", "when": "15:32"}) == "1|2345|0|15:30"
+    dep = {"line": {"name": "U2"}, "direction": "Pankow", "plannedWhen": "15:30", "when": "15:32"}
+    assert departure_key(dep) == departure_key({**dep, "when": "15:35"})
+
+@patch('app.services.bvg_client._bvg_client')
+def test_departures_since_returns_changes_only(mock_client, client, mock_bvg_departures_response):
+    """Test a full response, an incremental refresh and the fallback for unknown versions"""
+    mock_client.get_departures.return_value = mock_bvg_departures_response
+    full = client.get("/api/departures/900000100003?duration=30").json()
+    assert len(full["departures"]) == 2 and full["version"] is not None
+
+    refreshed = copy.deepcopy(mock_bvg_departures_response)
+    refreshed["departures"][0]["delay"] = 300
+    del refreshed["departures"][1]
+    mock_client.get_departures.return_value = refreshed
+    delta = client.get(f"/api/departures/900000100003?duration=30&since={full['version']}").json()
+    assert delta["since"] == full["version"] and delta["version"] > full["version"]
+    assert [d["delay"] for d in delta["changed"]] == [300]
+    assert delta["added"] == []
+    assert delta["removed"] == [full["departures"][1]["id"]]
+    assert "departures" not in delta
+
+    again = client.get("/api/departures/900000100003?duration=30&since=1").json()
+    assert len(again["departures"]) == 1  # Too old: full snapshot
+
+@patch('app.services.bvg_client._bvg_client')
+def test_ring_line_trip_passing_twice_keeps_both(mock_client, client):
+    """Test that one trip stopping twice in the window yields two departures, also in deltas"""
+    lap = {"tripId": "1|41|0", "line": {"name": "S41"}, "direction": "Ring", "delay": 0}
+    data = {
+        "stop": {"id": "900000058101", "name": "S Südkreuz"},
+        "departures": [
+            {**lap, "when": "2025-10-28T15:30:00+01:00", "plannedWhen": "2025-10-28T15:30:00+01:00"},
+            {**lap, "when": "2025-10-28T16:30:00+01:00", "plannedWhen": "2025-10-28T16:30:00+01:00"}
+        ]
+    }
+    mock_client.get_departures.return_value = data
+    full = client.get("/api/departures/900000058101?duration=120").json()
+    ids = [d["id"] for d in full["departures"]]
+    assert len(set(ids)) == 2
+
+    refreshed = copy.deepcopy(data)
+    refreshed["departures"][1]["delay"] = 120
+    mock_client.get_departures.return_value = refreshed
+    delta = client.get(f"/api/departures/900000058101?duration=120&since={full['version']}").json()
+    assert [d["id"] for d in delta["changed"]] == [ids[1]]
+    assert delta["added"] == [] and delta["removed"] == []
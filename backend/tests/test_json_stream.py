@@ -0,0 +1,150 @@
+"""
+Tests for incremental JSON parsing of upstream responses
+"""
+import io
+import json
+from unittest.mock import patch
+
+import requests
+from urllib3 import HTTPResponse
+
+from app.services.bvg_client import BVGClient, DEPARTURES_PROJECTION, RADAR_PROJECTION
+from app.utils.json_stream import Projection
+
+RADAR_BODY = {
+    "movements": [
+        {
+            "tripId": "1|1",
+            "direction": "Pankow",
+            "line": {"name": "U2", "product": "subway", "operator": {"name": "BVG"}},
+            "location": {"latitude": 52.52, "longitude": 13.41},
+            "nextStopovers": [{"stop": {"id": str(i)}} for i in range(6)],
+            "frames": [{"t": 0}]
+        },
+        {"tripId": "1|2", "direction": "Ruhleben", "location": None}
+    ],
+    "realtimeDataUpdatedAt": 1761663600
+}
+
+def streaming_client():
+    """A BVG client with incremental parsing switched on (it is opt-in)"""
+    client = BVGClient()
+    client.stream_parsing = True
+    return client
+
+def test_stream_parse_matches_full_parse():
+    """Test that streaming and full parsing produce the same trimmed payload"""
+    raw = json.dumps(RADAR_BODY).encode()
+    streamed = RADAR_PROJECTION.parse(io.BytesIO(raw))
+
+    assert streamed == RADAR_PROJECTION.apply(RADAR_BODY)
+    assert streamed["realtimeDataUpdatedAt"] == 1761663600
+    assert len(streamed["movements"]) == 1  # No location, dropped
+    movement = streamed["movements"][0]
+    assert len(movement["nextStopovers"]) == 3
+    assert "frames" not in movement
+    assert movement["line"] == {"name": "U2", "product": "subway"}
+
+def test_stream_parse_keeps_top_level_objects():
+    """Test that kept top-level objects survive and other sections are skipped"""
+    body = {
+        "stop": {"id": "900000100003", "name": "S+U Alexanderplatz"},
+        "departures": [{"when": "2025-10-28T15:30:00+01:00", "delay": 60, "remarks": [{"text": "x"}]}],
+        "extra": {"big": list(range(100))}
+    }
+    streamed = DEPARTURES_PROJECTION.parse(io.BytesIO(json.dumps(body).encode()))
+    assert streamed["stop"] == body["stop"]
+    assert "extra" not in streamed
+    assert streamed["departures"][0] == {"when": "2025-10-28T15:30:00+01:00", "delay": 60, "line": {}}
+
+def test_stream_parse_top_level_list():
+    """Test that a bare list response is projected element by element"""
+    projection = Projection("items", lambda item: item if item % 2 else None)
+    assert projection.parse(io.BytesIO(b"[1, 2, 3, 4, 5]")) == [1, 3, 5]
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_full_parse_by_default(mock_get):
+    """Test that projected bodies are parsed in full unless streaming is switched on"""
+    mock_get.return_value.json.return_value = RADAR_BODY
+    data = BVGClient()._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION)
+    assert mock_get.call_args.kwargs["stream"] is False
+    assert data == RADAR_PROJECTION.apply(RADAR_BODY)
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_make_request_streams_projected_body(mock_get):
+    """Test that a projected request reads the body from the stream"""
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(json.dumps(RADAR_BODY).encode()), preload_content=False)
+    mock_get.return_value = response
+
+    data = streaming_client()._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION)
+
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert [m["tripId"] for m in data["movements"]] == ["1|1"]
+
+def _streamed_response(body, status=200, **headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    response.raw = HTTPResponse(body=body, preload_content=False)
+    return response
+
+@patch('app.services.bvg_client.Projection.parse', autospec=True, side_effect=Projection.parse)
+@patch('app.services.bvg_client.requests.Session.get')
+def test_unsized_bodies_stream_only_past_the_threshold(mock_get, mock_parse):
+    """Test that bodies without Content-Length (gzip, chunked) are buffered when small"""
+    client = streaming_client()
+    mock_get.return_value = _streamed_response(io.BytesIO(json.dumps(RADAR_BODY).encode()))
+    small = client._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION)
+    assert mock_parse.call_count == 0
+
+    client.stream_min_bytes = 64
+    mock_get.return_value = _streamed_response(io.BytesIO(json.dumps(RADAR_BODY).encode()))
+    large = client._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION)
+    assert mock_parse.call_count == 1
+    assert small == large == RADAR_PROJECTION.apply(RADAR_BODY)
+
+class _StalledBody(io.RawIOBase):
+    """Body whose socket times out after the first bytes"""
+
+    def __init__(self):
+        self.sent = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.sent:
+            raise TimeoutError("read timed out")
+        self.sent = True
+        buffer[:1] = b"{"
+        return 1
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_stream_read_timeout_is_retried(mock_get):
+    """Test that a timeout mid-body takes the timeout retry path"""
+    client = streaming_client()
+    client.stream_min_bytes = 1
+    client.max_retries = 2
+    client.retry_delay = 0
+    stalled = _streamed_response(_StalledBody())
+    mock_get.side_effect = [
+        stalled,
+        _streamed_response(io.BytesIO(json.dumps(RADAR_BODY).encode()))
+    ]
+
+    data = client._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION)
+    assert mock_get.call_count == 2
+    assert [m["tripId"] for m in data["movements"]] == ["1|1"]
+    assert stalled.raw.closed
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_streamed_error_response_is_closed(mock_get):
+    """Test that an unread 5xx body is closed instead of left holding its connection"""
+    client = streaming_client()
+    response = _streamed_response(io.BytesIO(b"Bad Gateway"), status=502)
+    mock_get.return_value = response
+
+    assert client._make_request("https://bvg.test/radar", projection=RADAR_PROJECTION) is None
+    assert response.raw.closed
@@ -0,0 +1,77 @@
+"""
+Tests for background logging and rate-limited log call sites
+"""
+import json
+import logging
+import queue
+
+import pytest
+
+from app.utils.logging_utils import (
+    ColoredFormatter, NonBlockingQueueHandler, RateLimitFilter,
+    get_logging_stats, setup_logging, shutdown_logging
+)
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+def make_record(msg="Making request: %s", args=("url",), level=logging.INFO, lineno=10):
+    return logging.LogRecord("app.test", level, "/app/test.py", lineno, msg, args, None)
+
+def test_queued_records_are_written_by_the_listener(restore_root_logger, capsys):
+    """Test that records logged on the request path reach the output via the queue"""
+    setup_logging("INFO", use_json=True, use_queue=True)
+    logging.getLogger("app.test").info("Getting departures for station: %s (%d min)", "900000100003", 60)
+    shutdown_logging()
+
+    line = json.loads(capsys.readouterr().out.strip())
+    assert line["message"] == "Getting departures for station: 900000100003 (60 min)"
+    assert line["level"] == "INFO"
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that a full queue never blocks the caller"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+
+def test_rate_limit_per_call_site():
+    """Test that repetitive call sites are limited and the suppression is reported"""
+    limit = RateLimitFilter(burst=2, interval=60)
+    results = [limit.filter(make_record()) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+    assert limit.filter(make_record(lineno=11))  # Another call site
+    assert limit.filter(make_record(level=logging.ERROR))  # Errors always pass
+    assert limit.suppressed_total == 3
+
+    limit.interval = 0
+    record = make_record()
+    assert limit.filter(record)
+    assert record.getMessage() == "Making request: url (suppressed 3 similar messages)"
+
+def test_rate_limit_decides_once_per_record():
+    """Test that a filter shared by several handlers counts a record once"""
+    limit = RateLimitFilter(burst=1, interval=60)
+    record = make_record()
+    assert limit.filter(record) and limit.filter(record)
+    assert not limit.filter(make_record())
+
+def test_colored_formatter_leaves_record_untouched():
+    """Test that coloring for the console does not leak into other handlers"""
+    record = make_record()
+    assert "\033[" in ColoredFormatter("%(levelname)s %(message)s").format(record)
+    assert record.levelname == "INFO"
+
+def test_logging_stats(restore_root_logger):
+    """Test that the stats reflect the configured pipeline"""
+    setup_logging("INFO", use_queue=True, rate_limit_burst=5)
+    stats = get_logging_stats()
+    assert stats["queued"] is True
+    assert stats["dropped"] == 0
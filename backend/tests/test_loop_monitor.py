@@ -0,0 +1,45 @@
+"""
+Tests for the event-loop lag monitor
+"""
+import asyncio
+import time
+
+from app.utils.loop_monitor import LoopMonitor
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+def test_blocking_call_is_reported_with_its_stack():
+    """Test that a sync call blocking the loop is caught with a stack trace"""
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor.get_stats(include_reports=True)
+
+    stats = asyncio.run(scenario())
+
+    assert stats["stalls"] == 1
+    assert stats["lag_max_ms"] >= 250
+    report = stats["reports"][0]
+    assert not report["ongoing"] and report["blocked_ms"] >= 250
+    assert "block_the_loop" in report["site"]
+    assert any("time.sleep(seconds)" in line for line in report["stack"])
+    assert stats["blocking_sites"][0]["stalls"] == 1
+
+def test_idle_loop_has_no_stalls():
+    """Test that normal awaits are measured as lag but not reported"""
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["stalls"] == 0
+    assert stats["lag_p50_ms"] is not None and stats["lag_p50_ms"] < 100
@@ -0,0 +1,102 @@
+"""
+Tests for on-demand request profiling
+"""
+import os
+import pstats
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.deadline import run_with_deadline
+from app.utils.profiling import ProfilingMiddleware, RequestProfiler
+
+
+def make_client(tmp_path, **kwargs):
+    profiler = RequestProfiler(str(tmp_path), token="secret", **kwargs)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/api/departures/{station_id}")
+    async def departures(station_id: str, duration: int = 60):
+        return {"departures": [{"id": i, "line": str(i % 7)} for i in range(20000)]}
+
+    @app.get("/api/stations/{station_id}")
+    async def station(station_id: str):
+        return {"total": await run_with_deadline(transform_in_worker)}
+
+    return TestClient(app), profiler
+
+def transform_in_worker():
+    total = 0
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        total += sum(range(1000))
+    return total
+
+def test_token_header_profiles_request(tmp_path):
+    """Test that the admin header produces a collapsed-stack profile"""
+    client, profiler = make_client(tmp_path)
+    response = client.get("/api/departures/900000100003", headers={"X-Profile-Token": "secret"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    info = profiler.profiles[-1]
+    assert info["id"] == profile_id and info["status"] == 200
+    path = profiler.file_path(profile_id)
+    assert path.endswith(".collapsed") and os.path.exists(path)
+    assert info["samples"] > 0
+    for line in open(path):
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+def test_query_flag_and_cprofile_mode(tmp_path):
+    """Test the query flag, the deterministic mode, and that the token is not stored"""
+    client, profiler = make_client(tmp_path)
+    response = client.get(
+        "/api/departures/900000100003?duration=30&__profile=secret",
+        headers={"X-Profile-Mode": "cprofile"}
+    )
+
+    info = profiler.profiles[-1]
+    assert response.headers["x-profile-id"] == info["id"]
+    assert info["file"].endswith(".prof") and info["mode"] == "cprofile"
+    assert info["query"] == "duration=30"
+
+def test_worker_thread_is_profiled(tmp_path):
+    """Test that work handed to run_with_deadline shows up in the profile"""
+    client, profiler = make_client(tmp_path)
+    response = client.get("/api/stations/1", headers={"X-Profile-Token": "secret"})
+
+    assert response.status_code == 200
+    with open(profiler.file_path(response.headers["x-profile-id"])) as f:
+        assert "transform_in_worker" in f.read()
+
+    response = client.get(
+        "/api/stations/1", headers={"X-Profile-Token": "secret", "X-Profile-Mode": "cprofile"}
+    )
+    stats = pstats.Stats(profiler.file_path(response.headers["x-profile-id"]))
+    assert any(name == "transform_in_worker" for _, _, name in stats.stats)
+
+def test_wrong_token_and_sampling(tmp_path):
+    """Test that a wrong token is ignored and 1-in-N sampling picks requests"""
+    client, profiler = make_client(tmp_path)
+    response = client.get("/api/departures/1", headers={"X-Profile-Token": "guess"})
+    assert "x-profile-id" not in response.headers
+    assert not profiler.profiles
+
+    client, profiler = make_client(tmp_path, sample_rate=3)
+    profiled = ["x-profile-id" in client.get("/api/departures/1").headers for _ in range(6)]
+    assert profiled == [False, False, True, False, False, True]
+
+def test_old_profiles_are_pruned(tmp_path):
+    """Test that only the newest profiles are kept on disk"""
+    client, profiler = make_client(tmp_path, sample_rate=1, keep=2)
+    for _ in range(3):
+        client.get("/api/departures/1")
+    assert len(profiler.profiles) == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(info["file"] for info in profiler.profiles)
+
+def test_admin_endpoints_hidden_when_disabled(client):
+    """Test that profile listing is not exposed unless profiling is enabled"""
+    assert client.get("/api/admin/profiles").status_code == 404
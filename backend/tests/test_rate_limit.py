@@ -0,0 +1,110 @@
+"""
+Tests for outbound and inbound rate limiting
+"""
+import asyncio
+import pytest
+import threading
+import time
+from unittest.mock import patch
+
+from app.exceptions import UpstreamThrottledException
+from app.utils.rate_limit import TokenBucket, OutboundLimiter, InboundRateLimiter, Priority
+
+def test_token_bucket_burst_then_wait():
+    """Test that the bucket allows a burst and then asks callers to wait"""
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1
+
+def test_token_bucket_reserve_level():
+    """Test that low priority takes respect the reserved level"""
+    bucket = TokenBucket(rate=1, capacity=4)
+    assert bucket.try_acquire(min_level=2) == 0  # 4 -> 3
+    assert bucket.try_acquire(min_level=2) == 0  # 3 -> 2
+    assert bucket.try_acquire(min_level=2) > 0   # would drop below reserve
+    assert bucket.try_acquire() == 0             # interactive still served
+
+def test_outbound_limiter_throttles_after_deadline():
+    """Test that waiting callers fail once their deadline passes"""
+    limiter = OutboundLimiter(TokenBucket(rate=1, capacity=1), default_timeout=0.1)
+    limiter.acquire("departures")
+
+    with pytest.raises(UpstreamThrottledException) as exc_info:
+        limiter.acquire("departures")
+    assert exc_info.value.retry_after >= 1
+    assert limiter.get_stats()["throttled"]["interactive"] == 1
+
+def test_outbound_limiter_queues_until_slot():
+    """Test that callers queue for a slot instead of failing"""
+    limiter = OutboundLimiter(TokenBucket(rate=20, capacity=1), default_timeout=1.0)
+    limiter.acquire("departures")
+    waited = limiter.acquire("departures")
+    assert waited > 0
+
+def test_outbound_limiter_priority_order():
+    """Test that interactive calls are served before queued background calls"""
+    limiter = OutboundLimiter(TokenBucket(rate=10, capacity=1), default_timeout=2.0)
+    limiter.acquire("radar", Priority.INTERACTIVE)  # Drain the bucket
+    order = []
+
+    def call(operation, priority):
+        limiter.acquire(operation, priority)
+        order.append(operation)
+
+    background = threading.Thread(target=call, args=("radar", Priority.BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=("departures", Priority.INTERACTIVE))
+    interactive.start()
+    background.join()
+    interactive.join()
+
+    assert order == ["departures", "radar"]
+
+def test_outbound_limiter_never_waits_on_the_event_loop():
+    """Test that a call made on the event loop fails fast instead of blocking it"""
+    limiter = OutboundLimiter(TokenBucket(rate=0.1, capacity=1), default_timeout=2.0)
+
+    async def on_loop():
+        limiter.acquire("departures")
+        started = time.monotonic()
+        with pytest.raises(UpstreamThrottledException):
+            limiter.acquire("departures")
+        return time.monotonic() - started
+
+    assert asyncio.run(on_loop()) < 0.5
+
+def test_inbound_limiter_blocks_after_budget():
+    """Test per-client fixed window limiting"""
+    limiter = InboundRateLimiter(max_requests=2, window=60)
+    assert limiter.hit("a")[0] is True
+    assert limiter.hit("a")[0] is True
+    allowed, remaining, reset_after = limiter.hit("a")
+    assert allowed is False
+    assert remaining == 0
+    assert reset_after >= 1
+    assert limiter.hit("b")[0] is True
+
+def test_inbound_rate_limit_middleware(client):
+    """Test that API clients over budget get 429 with Retry-After"""
+    limiter = InboundRateLimiter(max_requests=1, window=60)
+    with patch('app.main.inbound_limiter', limiter):
+        assert client.get("/api/stations/featured").status_code == 200
+        response = client.get("/api/stations/featured")
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        # Pages and health checks are not limited
+        assert client.get("/health").status_code == 200
+
+def test_rate_limited_answers_are_readable_cross_origin(client):
+    """Test that preflights are not counted and a 429 still carries CORS headers"""
+    origin = {"Origin": "http://localhost:3001"}
+    preflight = {**origin, "Access-Control-Request-Method": "GET", "Access-Control-Request-Headers": "x-session-id"}
+    limiter = InboundRateLimiter(max_requests=1, window=60)
+    with patch('app.main.inbound_limiter', limiter):
+        assert client.options("/api/stations/featured", headers=preflight).status_code == 200
+        assert client.get("/api/stations/featured", headers=origin).status_code == 200
+        response = client.get("/api/stations/featured", headers=origin)
+        assert response.status_code == 429
+        assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:3001"
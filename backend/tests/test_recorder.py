@@ -0,0 +1,61 @@
+"""
+Tests for upstream response recording
+"""
+import os
+from unittest.mock import Mock, patch
+
+from app.services import recorder as recorder_module
+from app.services.bvg_client import BVGClient
+from app.services.recorder import ResponseRecorder, iter_recordings
+
+def test_recorder_rotates_and_reads_back(tmp_path):
+    """Test that records are written to rotated gzip segments and read back in order"""
+    recorder = ResponseRecorder(str(tmp_path), max_records_per_segment=2)
+    for i in range(5):
+        recorder.record(f"https://bvg.test/stops/{i}/departures?duration=60", 200, 12.5, {"n": i})
+    recorder.close()
+
+    segments = sorted(os.listdir(tmp_path))
+    assert len(segments) == 3
+
+    entries = list(iter_recordings(str(tmp_path)))
+    assert [e["body"]["n"] for e in entries] == [0, 1, 2, 3, 4]
+    assert entries[0]["path"] == "/stops/0/departures"
+    assert entries[0]["query"] == {"duration": "60"}
+    assert entries[0]["status"] == 200
+
+def test_truncated_segment_is_read_partially(tmp_path):
+    """Test that a segment cut off mid-write keeps its complete records and drops the cut one"""
+    recorder = ResponseRecorder(str(tmp_path))
+    for i in range(2):
+        recorder.record(f"https://bvg.test/locations?query={i}", 200, 1.0, [])
+    recorder._file.flush()  # Sync flush: both records are decodable from here on
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    complete = os.path.getsize(path)
+    recorder.record("https://bvg.test/locations?query=2", 200, 1.0, [os.urandom(64).hex() for _ in range(50)])
+    recorder.close()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:complete + 100])  # Crashed halfway through the third record
+
+    assert [e["query"]["query"] for e in iter_recordings(str(tmp_path))] == ["0", "1"]
+
+@patch('app.services.bvg_client.requests.Session.get')
+def test_client_records_upstream_responses(mock_get, tmp_path):
+    """Test that BVGClient writes responses while recording is enabled"""
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"test": "data"}
+    mock_response.raise_for_status = Mock()
+    mock_get.return_value = mock_response
+
+    recorder = ResponseRecorder(str(tmp_path))
+    with patch.object(recorder_module, '_recorder', recorder):
+        BVGClient()._make_request("https://bvg.test/radar?north=1")
+    recorder.close()
+
+    entries = list(iter_recordings(str(tmp_path)))
+    assert len(entries) == 1
+    assert entries[0]["body"] == {"test": "data"}
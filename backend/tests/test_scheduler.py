@@ -0,0 +1,69 @@
+"""
+Tests for the background maintenance scheduler
+"""
+import asyncio
+import time
+
+from app.utils.scheduler import Scheduler
+
+def test_jobs_run_periodically_and_stop_cleanly():
+    """Test that sync and async jobs run repeatedly until the scheduler stops"""
+    calls = {"sync": 0, "async": 0}
+
+    def sync_job():
+        calls["sync"] += 1
+
+    async def async_job():
+        calls["async"] += 1
+
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.register("sync", sync_job, interval=0.02, initial_delay=0)
+        scheduler.register("async", async_job, interval=0.02, initial_delay=0)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert calls["sync"] >= 3 and calls["async"] >= 3
+    assert stats["jobs"]["async"]["runs"] == calls["async"]
+    assert stats["jobs"]["sync"]["failures"] == 0
+
+def test_failures_and_timeouts_are_counted():
+    """Test that failing and hanging jobs are recorded without stopping the scheduler"""
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def hanging():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.register("failing", failing, interval=60)
+        scheduler.register("hanging", hanging, interval=60, timeout=0.05)
+        await scheduler.run_now("failing")
+        await scheduler.run_now("hanging")
+        return scheduler.get_stats()["jobs"]
+
+    jobs = asyncio.run(scenario())
+    assert jobs["failing"]["failures"] == 1
+    assert jobs["failing"]["last_error"] == "boom"
+    assert jobs["hanging"]["timeouts"] == 1
+
+def test_overlapping_runs_are_skipped():
+    """Test that a job still running is not started again"""
+    def slow_job():
+        time.sleep(0.15)
+
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.register("slow", slow_job, interval=0.03, jitter=0, initial_delay=0, timeout=0.05)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return scheduler.get_stats()["jobs"]["slow"]
+
+    stats = asyncio.run(scenario())
+    assert stats["skipped"] >= 1
+    assert stats["timeouts"] >= 1
@@ -0,0 +1,95 @@
+"""
+Tests for the shared-memory cache store
+"""
+import multiprocessing
+import time
+
+import pytest
+
+from app.utils.cache import SimpleCache
+from app.utils.shm_cache import SHM_AVAILABLE, SharedMemoryStore
+
+pytestmark = pytest.mark.skipif(not SHM_AVAILABLE, reason="needs fcntl")
+
+SIZE = 1024 * 1024
+SLOTS = 1024
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "cache.shm")
+
+def _fill_from_child(path):
+    store = SharedMemoryStore(path, SIZE, SLOTS)
+    store.set("departures:900000100003", {"departures": [{"tripId": "1"}]}, 60)
+    store.close()
+
+def test_values_are_shared_between_processes(store_path):
+    """Test that a value written by another process is a hit here"""
+    store = SharedMemoryStore(store_path, SIZE, SLOTS)
+    child = multiprocessing.get_context("fork").Process(target=_fill_from_child, args=(store_path,))
+    child.start()
+    child.join(10)
+
+    assert store.get("departures:900000100003") == {"departures": [{"tripId": "1"}]}
+    with store.view("departures:900000100003") as payload:
+        assert bytes(payload) == b'{"departures":[{"tripId":"1"}]}'
+    store.close()
+
+def test_expiry_delete_and_clear(store_path):
+    """Test TTLs and removals"""
+    store = SharedMemoryStore(store_path, SIZE, SLOTS)
+    other = SharedMemoryStore(store_path, SIZE, SLOTS)
+    store.set("short", 1, 0.05)
+    store.set("long", 2, 60)
+    store.set("gone", 3, 60)
+    time.sleep(0.1)
+
+    other.delete("gone")
+    assert store.get("short") is None
+    assert store.get("long") == 2
+    assert store.get("gone") is None
+
+    other.clear()
+    assert store.get("long") is None
+    store.close()
+    other.close()
+
+def test_compaction_keeps_longest_lived_entries(store_path):
+    """Test that filling the store compacts it instead of failing writes"""
+    store = SharedMemoryStore(store_path, SIZE, SLOTS)
+    store.set("keep", "x", 3600)
+    for i in range(3000):
+        assert store.set(f"key:{i}", "v" * 500, 60)
+
+    stats = store.get_stats()
+    assert stats["compactions"] > 0
+    assert stats["used_slots"] <= SLOTS * 0.75
+    assert store.get("keep") == "x"
+    assert store.get("key:2999") == "v" * 500
+    store.close()
+
+def test_oversized_values_are_rejected(store_path):
+    """Test that values too large to share are refused"""
+    store = SharedMemoryStore(store_path, SIZE, SLOTS)
+    assert not store.set("huge", "x" * SIZE, 60)
+    assert store.get_stats()["oversized"] == 1
+    store.close()
+
+def test_simple_caches_share_entries(store_path):
+    """Test that two workers' caches see each other's fills through the store"""
+    workers = []
+    for _ in range(2):
+        cache = SimpleCache()
+        cache._next_connect = float("inf")  # Stay off Redis
+        cache.attach_shared(SharedMemoryStore(store_path, SIZE, SLOTS))
+        workers.append(cache)
+
+    calls = []
+    workers[0].get_or_fill("stations:alex", lambda: calls.append(1) or [{"id": "1"}], 60)
+    assert workers[1].get_or_fill("stations:alex", lambda: calls.append(1) or [], 60) == [{"id": "1"}]
+    assert len(calls) == 1
+    assert workers[1]._cache == {}
+
+    for cache in workers:
+        cache.detach_shared()
@@ -0,0 +1,103 @@
+"""
+Tests for single-flight cache fills
+"""
+import threading
+import time
+
+from app.utils.single_flight import SingleFlight
+
+class FakeRedis:
+    """Just enough of a Redis client for leases (no pub/sub, so waiters poll)"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def set(self, key, value, nx=False, px=None):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value
+            return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def publish(self, channel, message):
+        return 0
+
+    def pubsub(self, **kwargs):
+        raise ConnectionError("no pub/sub")
+
+    def register_script(self, script):
+        def release(keys, args):
+            with self.lock:
+                if self.data.get(keys[0]) == args[0]:
+                    del self.data[keys[0]]
+                    return 1
+                return 0
+        return release
+
+def test_concurrent_local_misses_share_one_fill():
+    """Test that callers in one process wait for the in-flight fill"""
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def fill():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fill, lambda: None)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 5
+    assert flight.get_stats()["local_waits"] == 4
+
+def test_waiter_gets_value_filled_by_peer():
+    """Test that a worker finding a held lease waits for the peer's value"""
+    redis = FakeRedis()
+    flight = SingleFlight(redis, wait_timeout=2.0)
+    redis.set("lease:k", "peer-token")
+
+    def peer_fills():
+        time.sleep(0.1)
+        redis.data["k"] = "from-peer"
+        del redis.data["lease:k"]
+
+    threading.Thread(target=peer_fills).start()
+    value = flight.do("k", lambda: "ours", lambda: redis.get("k"))
+
+    assert value == "from-peer"
+    stats = flight.get_stats()
+    assert stats["lease_waits"] == 1
+    assert stats["filled_by_peer"] == 1
+    assert stats["leases_acquired"] == 0
+    assert stats["wait_ms"]["count"] == 1
+
+def test_stuck_lease_falls_back_to_own_fetch():
+    """Test that a lease held past the wait timeout does not block the caller"""
+    redis = FakeRedis()
+    flight = SingleFlight(redis, wait_timeout=0.2)
+    redis.set("lease:k", "stuck")
+
+    assert flight.do("k", lambda: "ours", lambda: None) == "ours"
+    assert flight.get_stats()["lease_expired"] == 1
+
+def test_lease_released_after_fill():
+    """Test that the lease holder releases its lease"""
+    redis = FakeRedis()
+    flight = SingleFlight(redis)
+
+    assert flight.do("k", lambda: "ours", lambda: None) == "ours"
+    assert "lease:k" not in redis.data
+    assert flight.get_stats()["leases_acquired"] == 1
@@ -0,0 +1,49 @@
+"""
+Tests for application startup cost
+"""
+import os
+import re
+import subprocess
+import sys
+from unittest.mock import patch
+
+import requests
+
+from app.services.bvg_client import BVGClient
+from app.utils.cache import SimpleCache
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import of the app must stay under this budget (override for slow machines)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+def test_app_import_time_within_budget():
+    """Test that `python -X importtime -c 'import app.main'` stays under budget"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    # Lines look like "import time:   self [us] | cumulative | name"
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*app\.main$", line)
+        if match:
+            cumulative_us = int(match.group(1))
+    assert cumulative_us is not None
+    assert cumulative_us / 1000 < IMPORT_BUDGET_MS
+
+def test_cache_does_not_connect_on_construction():
+    """Test that creating a cache never pings Redis"""
+    with patch("app.utils.cache.redis.Redis") as mock_redis:
+        SimpleCache()
+    mock_redis.assert_not_called()
+
+@patch('app.services.bvg_client.requests.Session.head')
+def test_prewarm_opens_connections(mock_head):
+    """Test that pre-warming issues one request per connection and tolerates failures"""
+    mock_head.side_effect = [None, requests.exceptions.ConnectionError("down")]
+    assert BVGClient().prewarm(2) == 1
+    assert mock_head.call_count == 2
+    assert BVGClient().prewarm(0) == 0
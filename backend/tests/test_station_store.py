@@ -0,0 +1,132 @@
+"""
+Tests for the persistent station metadata store
+"""
+import json
+import time
+
+import pytest
+
+from app.services import station_store
+from app.services.bvg_client import BVGClient
+from app.services.station_store import StationStore
+
+ALEXANDERPLATZ = {
+    "type": "stop",
+    "id": "900000100003",
+    "name": "S+U Alexanderplatz",
+    "location": {"type": "location", "latitude": 52.521508, "longitude": 13.411267},
+    "products": {"suburban": True, "subway": True, "tram": True, "bus": True, "ferry": False}
+}
+
+@pytest.fixture
+def store(monkeypatch):
+    """An in-memory store installed as the global one"""
+    store = StationStore(":memory:")
+    monkeypatch.setattr(station_store, "_station_store", store)
+    yield store
+    store.close()
+
+def test_upsert_merges_and_survives_restart(tmp_path):
+    """Test that partial updates keep known fields and data persists across reopening"""
+    path = str(tmp_path / "stations.db")
+    store = StationStore(path)
+    assert store.upsert([ALEXANDERPLATZ, {"id": "x"}]) == 1
+    # Departures only carry the name: location and products must be kept
+    assert store.upsert([{"id": "900000100003", "name": "S+U Alexanderplatz"}]) == 0
+    assert store.unchanged == 1
+    store.close()
+
+    reopened = StationStore(path)
+    found = reopened.get_many(["900000100003", "unknown"])
+    assert list(found) == ["900000100003"]
+    assert found["900000100003"]["location"] == {"latitude": 52.521508, "longitude": 13.411267}
+    assert found["900000100003"]["products"] == ["suburban", "subway", "tram", "bus"]
+
+    reopened.get_many(["900000100003", "unknown"])
+    assert reopened.hits == 2  # Second lookup, unknown ID included, stays in memory
+    reopened.close()
+
+def test_unknown_ids_expire(tmp_path):
+    """Test that a miss is only remembered briefly, so stations learnt by another worker show up"""
+    path = str(tmp_path / "stations.db")
+    store, other_worker = StationStore(path, miss_ttl=0.1), StationStore(path)
+    assert store.get("900000100003") is None
+
+    other_worker.upsert([ALEXANDERPLATZ])
+    assert store.get("900000100003") is None  # Miss still remembered
+    time.sleep(0.15)
+    assert store.get("900000100003")["name"] == "S+U Alexanderplatz"
+    store.close()
+    other_worker.close()
+
+def test_load_stops_files(tmp_path):
+    """Test bulk loading from GTFS stops.txt and JSON"""
+    gtfs = tmp_path / "stops.txt"
+    gtfs.write_text(
+        "stop_id,stop_name,stop_lat,stop_lon\n"
+        "900000003201,S+U Potsdamer Platz,52.509458,13.376461\n"
+        ",broken,,\n",
+        encoding="utf-8"
+    )
+    catalog = tmp_path / "stations.json"
+    catalog.write_text(json.dumps({"900000100003": ALEXANDERPLATZ}), encoding="utf-8")
+
+    store = StationStore(":memory:")
+    assert store.load_file(str(gtfs)) == 1
+    assert store.load_file(str(catalog)) == 1
+    assert store.load_file(str(tmp_path / "missing.csv")) == 0
+    assert store.get("900000003201")["location"]["longitude"] == 13.376461
+    assert store.get("900000100003")["name"] == "S+U Alexanderplatz"
+    assert store.count() == 2
+    store.close()
+
+def test_bulk_load_releases_the_lock_between_chunks(tmp_path, monkeypatch):
+    """Test that a large stops file is written in several transactions"""
+    monkeypatch.setattr(station_store, "LOAD_CHUNK", 2)
+    gtfs = tmp_path / "stops.txt"
+    gtfs.write_text(
+        "stop_id,stop_name,stop_lat,stop_lon\n"
+        + "".join(f"9000000{i:05d},Stop {i},52.5,13.4\n" for i in range(5)),
+        encoding="utf-8"
+    )
+    store = StationStore(":memory:")
+    assert store.get("900000000004") is None
+    writes = []
+    write = store._write
+    monkeypatch.setattr(store, "_write", lambda rows: writes.append(len(rows)) or write(rows))
+
+    assert store.load_file(str(gtfs)) == 5
+    assert writes == [2, 2, 1]
+    assert store.get("900000000004")["name"] == "Stop 4"  # Earlier miss forgotten
+    store.close()
+
+def test_departures_fill_the_store(store):
+    """Test that the station is learnt from the per-departure stop blocks, which are then dropped"""
+    platform = {"id": "de:11000:900100003:2", "name": "Alexanderplatz Gleis 2", "station": ALEXANDERPLATZ}
+    data = {"departures": [{"when": None, "line": {}, "stop": platform}, {"when": None, "line": {}, "stop": platform}]}
+
+    station = BVGClient()._departures_station(data, "900000100003")
+    BVGClient()._remember_stations([station])
+
+    assert all("stop" not in dep for dep in data["departures"])
+    assert store.get("900000100003")["products"] == ["suburban", "subway", "tram", "bus"]
+
+def test_station_endpoints_read_the_store(client, store):
+    """Test station info and batch lookup served from the store"""
+    store.upsert([ALEXANDERPLATZ])
+
+    response = client.get("/api/stations/900000100003")
+    assert response.status_code == 200
+    assert response.json()["name"] == "S+U Alexanderplatz"
+    assert response.json()["location"]["latitude"] == 52.521508
+    # Not seen yet: the placeholder, as without a store
+    response = client.get("/api/stations/900000000000")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Station 900000000000"
+
+    response = client.get("/api/stations/lookup?ids=900000100003,900000000000,900000100003")
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["id"] for s in data["stations"]] == ["900000100003"]
+    assert data["missing"] == ["900000000000"]
+    assert client.get("/api/stations/lookup?ids=,").status_code == 400
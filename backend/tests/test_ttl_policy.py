@@ -0,0 +1,61 @@
+"""
+Tests for adaptive cache TTL policies
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.config import get_settings
+from app.services.bvg_client import departure_timestamp
+from app.utils.ttl_policy import AdaptiveTTL, DeparturesTTL
+
+def departures_window(minutes_ahead, realtime_age=10, delay=0):
+    now = datetime.now(timezone.utc)
+    return {
+        "duration": 60,
+        "fetched_at": time.time(),
+        "data": {
+            "departures": [
+                {"tripId": str(m), "when": (now + timedelta(minutes=m)).isoformat(), "delay": delay}
+                for m in minutes_ahead
+            ],
+            "realtimeDataUpdatedAt": int(time.time()) - realtime_age
+        }
+    }
+
+def test_ttl_grows_while_unchanged_and_shrinks_on_change():
+    """Test that the TTL follows how often refreshes change the payload"""
+    policy = AdaptiveTTL(10, 100, initial=20)
+    assert policy("k", [1]) == 20
+    assert policy("k", [1]) == 30
+    assert policy("k", [1]) == 45
+    assert policy("k", [2]) == 22
+    for _ in range(10):
+        ttl = policy("k", [2])
+    assert ttl == 100  # Bounded above
+
+    stats = policy.get_stats()
+    assert stats["refreshes_changed"] == 1
+    assert stats["issued"] == 14
+
+def test_departures_ttl_capped_by_next_departure():
+    """Test that an entry never outlives the next departure"""
+    policy = DeparturesTTL(15, 180, departure_time=departure_timestamp, initial=60)
+    assert policy("a", departures_window([1, 30])) <= 60
+    assert policy("b", departures_window([0.1, 30])) == 15  # Bounded below
+    assert policy("c", departures_window([20])) == 60
+
+def test_departures_ttl_long_for_schedule_only_stops():
+    """Test that stops without fresh realtime data get the longest TTL"""
+    policy = DeparturesTTL(15, 180, departure_time=departure_timestamp, initial=60)
+    assert policy("quiet", departures_window([45], realtime_age=3600)) == 180
+    assert policy("empty", departures_window([], realtime_age=3600)) == 180
+
+def test_busy_board_not_refreshed_more_often_than_baseline():
+    """Test that a hub whose next departure is always seconds away keeps the old 60 s TTL"""
+    settings = get_settings()
+    policy = DeparturesTTL(settings.cache_ttl_departures_min, settings.cache_ttl_departures_max,
+                           departure_time=departure_timestamp, initial=60)
+    for refresh in range(10):
+        # Every refresh changes (delays move), next departure 20 s away
+        ttl = policy("hub", departures_window([0.33, 2, 4], delay=refresh))
+        assert ttl >= 60
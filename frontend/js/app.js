@@ -4,8 +4,18 @@ let map = null;
 let markers = [];
 let vehicleMarkers = [];
 let radarUpdateInterval = null;
+let radarRequest = null; // AbortController de la petición de radar en curso
 let isRadarActive = false;
 
+// Identificador de esta pestaña: el backend agrupa las búsquedas tecleadas en ella
+const SEARCH_SESSION_ID = sessionStorage.getItem('searchSessionId') || (() => {
+    const id = window.crypto && crypto.randomUUID
+        ? crypto.randomUUID()
+        : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem('searchSessionId', id);
+    return id;
+})();
+
 // Funciones para manejar favoritos
 function getFavorites() {
     const favorites = localStorage.getItem('favoriteStations');
@@ -262,7 +272,7 @@ async function searchStation(stationName) {
         const url = `${API_URL}/stations/search?q=${encodeURIComponent(stationName)}&results=15`;
         console.log('Realizando petición a:', url);
 
-        const response = await fetch(url);
+        const response = await fetch(url, { headers: { 'X-Session-Id': SEARCH_SESSION_ID } });
         if (!response.ok) {
             throw new Error(`Error del servidor: ${response.status} - ${response.statusText}`);
         }
@@ -270,6 +280,11 @@ async function searchStation(stationName) {
         const data = await response.json();
         console.log('Datos recibidos:', data);
         
+        // Ya hay una búsqueda más reciente en camino: ella pintará los resultados
+        if (data && data.superseded) {
+            return;
+        }
+        
         // El backend devuelve { stations: [...], query: "..." }
         let stations = [];
         
@@ -448,7 +463,8 @@ async function showDepartures(stationId, stationName = '', latitude = null, long
         const response = await fetch(`${API_URL}/departures/${stationId}`);
         if (!response.ok) {
             const errorData = await response.json().catch(() => null);
-            throw new Error(errorData?.detail || `Error ${response.status}: ${response.statusText}`);
+            // El código va en el mensaje para que el aviso de 503 (sobrecarga, BVG caído) se muestre
+            throw new Error(`Error ${response.status}: ${errorData?.detail || response.statusText}`);
         }
 
         const data = await response.json();
@@ -1010,9 +1026,16 @@ async function updateVehicleRadar() {
         const west = bounds.getWest();
         const east = bounds.getEast();
         
+        // Cancelar la petición anterior si sigue pendiente: el servidor deja de trabajar en ella
+        if (radarRequest) {
+            radarRequest.abort();
+        }
+        radarRequest = new AbortController();
+        
         // Llamar al API
         const response = await fetch(
-            `${API_URL}/radar/vehicles?north=${north}&south=${south}&west=${west}&east=${east}&duration=30&results=100`
+            `${API_URL}/radar/vehicles?north=${north}&south=${south}&west=${west}&east=${east}&duration=30&results=100`,
+            { signal: radarRequest.signal, headers: { 'X-Request-Timeout': '15' } }
         );
         
         if (!response.ok) {
@@ -1066,6 +1089,9 @@ async function updateVehicleRadar() {
         }
         
     } catch (error) {
+        if (error.name === 'AbortError') {
+            return;
+        }
         console.error('Error updating vehicle radar:', error);
     }
 }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+BVG stand-in server
+Replays upstream responses recorded by the backend (BVG_RECORD_DIR) with
+configurable latency, error rates and payload scaling, so the backend can be
+benchmarked offline against fixed, realistic traffic.
+
+Usage:
+    # 1. Record real traffic
+    BVG_RECORD_DIR=recordings uvicorn app.main:app --port 8000
+
+    # 2. Replay it
+    python scripts/bvg_standin.py --segments backend/recordings --port 9000 \\
+        --latency lognormal:80:0.6 --error-rate 0.02 --scale 2
+
+    # 3. Point the backend at the stand-in
+    BVG_API_BASE_URL=http://localhost:9000 uvicorn app.main:app --port 8000
+"""
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+from collections import defaultdict
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.services.recorder import iter_recordings
+
+# Keys holding the lists that grow with payload size
+SCALABLE_KEYS = ("departures", "arrivals", "movements")
+ID_SEGMENT = re.compile(r"^\d+$")
+
+
+def route_shape(path: str) -> str:
+    """Normalize a path so recordings for one station can serve another"""
+    return "/".join("{id}" if ID_SEGMENT.match(part) else part for part in path.split("/"))
+
+
+def query_key(query: dict) -> tuple:
+    return tuple(sorted(query.items()))
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec string
+
+    - fixed:MS
+    - uniform:MIN_MS:MAX_MS
+    - lognormal:MEDIAN_MS:SIGMA
+    - recorded[:MULTIPLIER]  (replay the latency seen while recording)
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        self.rng = rng
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(":") if v]
+        self.kind = kind
+        self.values = values
+
+        if kind == "fixed" and len(values) == 1:
+            return
+        if kind == "uniform" and len(values) == 2:
+            return
+        if kind == "lognormal" and len(values) == 2:
+            return
+        if kind == "recorded" and len(values) <= 1:
+            return
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample_ms(self, recorded_ms: float) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(self.values[0], self.values[1])
+        if self.kind == "lognormal":
+            median, sigma = self.values
+            return self.rng.lognormvariate(math.log(median), sigma)
+        multiplier = self.values[0] if self.values else 1.0
+        return recorded_ms * multiplier
+
+
+def scale_payload(body, factor: float):
+    """Grow or shrink the list parts of a payload by ``factor``"""
+    if factor == 1.0:
+        return body
+
+    def scale_list(items):
+        if not items:
+            return items
+        target = max(1, int(len(items) * factor))
+        scaled = []
+        for i in range(target):
+            item = items[i % len(items)]
+            copy_index = i // len(items)
+            if copy_index and isinstance(item, dict):
+                item = copy.deepcopy(item)
+                if item.get("tripId"):
+                    item["tripId"] = f"{item['tripId']}#{copy_index}"
+            scaled.append(item)
+        return scaled
+
+    if isinstance(body, list):
+        return scale_list(body)
+    if isinstance(body, dict):
+        body = dict(body)
+        for key in SCALABLE_KEYS:
+            if isinstance(body.get(key), list):
+                body[key] = scale_list(body[key])
+    return body
+
+
+class ReplayStore:
+    """Index of recorded exchanges, looked up from most to least specific"""
+
+    def __init__(self, directory: str):
+        self.exact = defaultdict(list)
+        self.by_path = defaultdict(list)
+        self.by_shape = defaultdict(list)
+        self._cursors = {}
+        self.count = 0
+
+        for entry in iter_recordings(directory):
+            path = entry["path"]
+            self.exact[(path, query_key(entry.get("query", {})))].append(entry)
+            self.by_path[path].append(entry)
+            self.by_shape[route_shape(path)].append(entry)
+            self.count += 1
+
+    def lookup(self, path: str, query: dict):
+        for index, key in ((self.exact, (path, query_key(query))),
+                           (self.by_path, path),
+                           (self.by_shape, route_shape(path))):
+            entries = index.get(key)
+            if entries:
+                # Round-robin so repeated calls see the recorded variation
+                cursor = self._cursors.setdefault((id(index), key), itertools.cycle(entries))
+                return next(cursor)
+        return None
+
+
+def create_app(args) -> FastAPI:
+    rng = random.Random(args.seed)
+    latency = LatencyModel(args.latency, rng)
+    store = ReplayStore(args.segments)
+    stats = defaultdict(int)
+
+    app = FastAPI(title="BVG stand-in", docs_url=None, redoc_url=None)
+    print(f"Loaded {store.count} recorded responses from {args.segments}")
+
+    @app.get("/__standin/stats")
+    async def standin_stats():
+        return dict(stats)
+
+    @app.get("/{path:path}")
+    async def replay(path: str, request: Request):
+        path = "/" + path
+        entry = store.lookup(path, dict(request.query_params))
+        stats["requests"] += 1
+
+        if rng.random() < args.timeout_rate:
+            stats["timeouts"] += 1
+            await asyncio.sleep(args.timeout_seconds)
+            return Response(status_code=504)
+
+        if entry is None:
+            stats["not_recorded"] += 1
+            return JSONResponse({"message": f"no recording for {path}"}, status_code=404)
+
+        await asyncio.sleep(latency.sample_ms(entry.get("elapsed_ms", 0.0)) / 1000)
+
+        if rng.random() < args.error_rate:
+            stats["injected_errors"] += 1
+            return JSONResponse({"message": "injected error"}, status_code=args.error_status)
+
+        stats["served"] += 1
+        body = entry["body"]
+        if isinstance(body, str):
+            return Response(body, status_code=entry["status"], media_type="text/plain")
+        return Response(
+            json.dumps(scale_payload(body, args.scale), separators=(",", ":")),
+            status_code=entry["status"],
+            media_type="application/json"
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded BVG responses")
+    parser.add_argument("--segments", required=True, help="Directory with bvg-*.ndjson.gz segments")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default="recorded",
+                        help="fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA | recorded[:MULT]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses replaced by errors")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code for injected errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--timeout-seconds", type=float, default=30.0, help="How long hanging requests hang")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply list sizes in payloads")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare BVG payloads with and without the lean query profiles
+Fetches the same departures, search and radar requests twice (BVG defaults
+vs. the backend's QUERY_PROFILES) and reports upstream bytes and JSON parse time.
+
+Usage:
+    python scripts/compare_profiles.py
+    python scripts/compare_profiles.py --base-url http://localhost:9000 --products subway,suburban
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from urllib.parse import urlencode
+
+import requests
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.bvg_client import PRODUCTS, QUERY_PROFILES
+
+STATIONS = ["900000100003", "900000003201", "900000024101"]
+QUERIES = ["Alexanderplatz", "Zoo", "Ostkreuz"]
+VIEWPORT = {"north": 52.55, "south": 52.48, "west": 13.35, "east": 13.45}
+
+
+def requests_for():
+    """(operation, path, params) for every sample request"""
+    samples = []
+    for station in STATIONS:
+        samples.append(("departures", f"/stops/{station}/departures", {"duration": 60}))
+    for query in QUERIES:
+        samples.append(("search", "/locations", {"query": query, "results": 10}))
+    samples.append(("radar", "/radar", {**VIEWPORT, "duration": 30, "frames": 1, "results": 50, "polylines": "false"}))
+    return samples
+
+
+def measure(session, url, repeats):
+    """Fetch a URL once and time json.loads over ``repeats`` runs"""
+    response = session.get(url, timeout=15)
+    response.raise_for_status()
+    body = response.content
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        json.loads(body)
+        timings.append((time.perf_counter() - started) * 1000)
+    return len(body), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure upstream savings of lean query profiles")
+    parser.add_argument("--base-url", default=os.getenv("BVG_API_BASE_URL", "https://v6.bvg.transport.rest"))
+    parser.add_argument("--products", default=None, help="Also apply a product filter, e.g. subway,tram")
+    parser.add_argument("--repeats", type=int, default=20, help="json.loads repetitions per payload")
+    args = parser.parse_args()
+
+    products = [p.strip() for p in args.products.split(",")] if args.products else []
+    session = requests.Session()
+    totals = {"default": [0, 0.0], "lean": [0, 0.0]}
+
+    print(f"{'operation':<12} {'default B':>11} {'lean B':>10} {'bytes':>7} {'default ms':>11} {'lean ms':>9}")
+    for operation, path, params in requests_for():
+        lean_params = {**params, **QUERY_PROFILES[operation]}
+        if products and operation != "search":
+            lean_params.update({p: "true" if p in products else "false" for p in PRODUCTS})
+        try:
+            default_bytes, default_ms = measure(session, f"{args.base_url}{path}?{urlencode(params)}", args.repeats)
+            lean_bytes, lean_ms = measure(session, f"{args.base_url}{path}?{urlencode(lean_params)}", args.repeats)
+        except requests.exceptions.RequestException as e:
+            print(f"{operation:<12} failed: {e}")
+            continue
+
+        totals["default"][0] += default_bytes
+        totals["default"][1] += default_ms
+        totals["lean"][0] += lean_bytes
+        totals["lean"][1] += lean_ms
+        saved = (1 - lean_bytes / default_bytes) * 100 if default_bytes else 0.0
+        print(f"{operation:<12} {default_bytes:>11,} {lean_bytes:>10,} {saved:>6.1f}% {default_ms:>11.3f} {lean_ms:>9.3f}")
+
+    default_bytes, default_ms = totals["default"]
+    lean_bytes, lean_ms = totals["lean"]
+    if default_bytes:
+        print(f"\nTotal: {default_bytes:,} -> {lean_bytes:,} bytes "
+              f"({(1 - lean_bytes / default_bytes) * 100:.1f}% less), "
+              f"parse {default_ms:.2f} -> {lean_ms:.2f} ms "
+              f"({(1 - lean_ms / default_ms) * 100 if default_ms else 0:.1f}% less)")
+
+
+if __name__ == "__main__":
+    main()
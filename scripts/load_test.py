@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for Berlin Transport App
+Replays a weighted request mix against a running backend and reports
+throughput, tail latency, error rates and cache hit ratios.
+
+All load comes from one client address, so start the backend with
+RATE_LIMIT_ENABLED=false or most requests will be answered with 429.
+
+Usage:
+    # Closed loop: 20 concurrent users for 60 s
+    python scripts/load_test.py --concurrency 20 --duration 60 --output run.json
+
+    # Open loop: 50 requests/s, compared against an earlier run
+    python scripts/load_test.py --rps 50 --duration 60 --output new.json \\
+        --compare run.json --max-regression 10 --budget p99=800
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+API_BASE = "http://localhost:8000"
+
+# Defaults when no station list / query log / viewport file is given
+DEFAULT_STATIONS = [
+    "900000100003",  # S+U Alexanderplatz
+    "900000003201",  # S+U Potsdamer Platz
+    "900000024101",  # S+U Friedrichstr.
+    "900000100001",  # S+U Zoologischer Garten
+    "900000100004",  # S Hackescher Markt
+]
+DEFAULT_QUERIES = ["Alexanderplatz", "Potsdamer", "Friedrichstr", "Zoo", "Hackescher", "Warschauer", "Ostkreuz"]
+DEFAULT_VIEWPORTS = [
+    {"north": 52.55, "south": 52.48, "west": 13.35, "east": 13.45},  # City centre
+    {"north": 52.53, "south": 52.50, "west": 13.38, "east": 13.42},  # Mitte
+    {"north": 52.52, "south": 52.49, "west": 13.43, "east": 13.47},  # Friedrichshain
+]
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def parse_pairs(spec, cast=float):
+    """Parse 'a=1,b=2' into a dict"""
+    pairs = {}
+    for item in spec.split(","):
+        if item.strip():
+            key, _, value = item.partition("=")
+            pairs[key.strip()] = cast(value)
+    return pairs
+
+
+def percentile(sorted_values, pct):
+    """Percentile with linear interpolation on pre-sorted values"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class RequestMix:
+    """Weighted request generator"""
+
+    def __init__(self, mix, stations, queries, viewports, zipf_s, rng):
+        self.rng = rng
+        self.kinds = list(mix)
+        self.kind_weights = [mix[k] for k in self.kinds]
+        self.stations = stations
+        # Zipf-like popularity: the n-th station is requested ~1/n^s as often
+        self.station_weights = [1 / (rank ** zipf_s) for rank in range(1, len(stations) + 1)]
+        self.queries = queries
+        self.viewports = viewports
+
+    def next(self):
+        kind = self.rng.choices(self.kinds, self.kind_weights)[0]
+        if kind == "departures":
+            station = self.rng.choices(self.stations, self.station_weights)[0]
+            return kind, f"/api/departures/{station}", {"duration": 60}
+        if kind == "search":
+            return kind, "/api/stations/search", {"q": self.rng.choice(self.queries), "limit": 10}
+        if kind == "radar":
+            return kind, "/api/radar/vehicles", dict(self.rng.choice(self.viewports), results=50)
+        if kind == "featured":
+            return kind, "/api/stations/featured", {}
+        raise ValueError(f"Unknown request kind: {kind}")
+
+
+class Recorder:
+    """Collects per-request outcomes"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def add(self, kind, latency_ms, status):
+        self.latencies[kind].append(latency_ms)
+        self.statuses[kind][str(status)] += 1
+        if status is None or status >= 500 or status == 429:
+            self.errors[kind] += 1
+
+
+async def send(client, mix, recorder, timeout):
+    kind, path, params = mix.next()
+    start = time.perf_counter()
+    status = None
+    try:
+        response = await client.get(path, params=params, timeout=timeout)
+        status = response.status_code
+    except httpx.HTTPError:
+        pass
+    recorder.add(kind, (time.perf_counter() - start) * 1000, status)
+
+
+async def run_closed_loop(client, mix, recorder, concurrency, duration, timeout):
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, mix, recorder, timeout)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def run_open_loop(client, mix, recorder, rps, duration, timeout, rng):
+    # Poisson arrivals at the target rate; latency does not slow the schedule
+    tasks = []
+    start = time.perf_counter()
+    next_at = start
+    while next_at - start < duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(client, mix, recorder, timeout)))
+        next_at += rng.expovariate(rps)
+    await asyncio.gather(*tasks)
+
+
+async def fetch_cache_stats(client):
+    try:
+        response = await client.get("/api/cache/stats", timeout=5)
+        return response.json().get("cache", {})
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+
+def summarize(recorder, elapsed, cache_before, cache_after, config):
+    endpoints = {}
+    all_latencies = []
+    total_errors = 0
+
+    for kind, values in sorted(recorder.latencies.items()):
+        values.sort()
+        all_latencies.extend(values)
+        total_errors += recorder.errors[kind]
+        endpoints[kind] = {
+            "requests": len(values),
+            "errors": recorder.errors[kind],
+            "error_rate": recorder.errors[kind] / len(values),
+            "statuses": dict(recorder.statuses[kind]),
+            "latency_ms": latency_summary(values)
+        }
+
+    all_latencies.sort()
+    hits = cache_after.get("hits", 0) - cache_before.get("hits", 0)
+    misses = cache_after.get("misses", 0) - cache_before.get("misses", 0)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": config,
+        "duration_s": round(elapsed, 2),
+        "requests": len(all_latencies),
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0,
+        "error_rate": total_errors / len(all_latencies) if all_latencies else 0,
+        "latency_ms": latency_summary(all_latencies),
+        "cache": {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None
+        },
+        "endpoints": endpoints
+    }
+
+
+def latency_summary(sorted_values):
+    summary = {f"p{p:g}": round(percentile(sorted_values, p), 2) if sorted_values else None for p in PERCENTILES}
+    summary["mean"] = round(sum(sorted_values) / len(sorted_values), 2) if sorted_values else None
+    summary["max"] = round(sorted_values[-1], 2) if sorted_values else None
+    return summary
+
+
+def print_report(result):
+    print("=" * 72)
+    print(f"Requests: {result['requests']}  Throughput: {result['throughput_rps']} req/s  "
+          f"Errors: {result['error_rate']:.2%}")
+    cache = result["cache"]
+    if cache["hit_ratio"] is not None:
+        print(f"Cache hit ratio: {cache['hit_ratio']:.2%} ({cache['hits']} hits, {cache['misses']} misses)")
+    print("-" * 72)
+    header = f"{'endpoint':<12}{'reqs':>7}{'err%':>8}" + "".join(f"{'p' + format(p, 'g'):>10}" for p in PERCENTILES)
+    print(header)
+    rows = list(result["endpoints"].items()) + [("ALL", {
+        "requests": result["requests"], "error_rate": result["error_rate"], "latency_ms": result["latency_ms"]
+    })]
+    for kind, data in rows:
+        latency = data["latency_ms"]
+        cells = "".join(f"{latency[f'p{p:g}'] or 0:>10.1f}" for p in PERCENTILES)
+        print(f"{kind:<12}{data['requests']:>7}{data['error_rate']:>8.2%}{cells}")
+    print("=" * 72)
+
+
+def check_regressions(result, baseline, budgets, max_regression, max_error_rate):
+    """Return a list of failure messages (empty when the run passes)"""
+    failures = []
+
+    for name, limit in budgets.items():
+        value = result["latency_ms"].get(name)
+        if value is not None and value > limit:
+            failures.append(f"{name} {value:.1f}ms exceeds budget {limit:.1f}ms")
+
+    if max_error_rate is not None and result["error_rate"] > max_error_rate:
+        failures.append(f"error rate {result['error_rate']:.2%} exceeds {max_error_rate:.2%}")
+
+    if baseline is not None:
+        print("\nComparison with baseline:")
+        for kind, data in [("ALL", result)] + list(result["endpoints"].items()):
+            base = baseline if kind == "ALL" else baseline.get("endpoints", {}).get(kind)
+            if not base:
+                continue
+            for name in (f"p{p:g}" for p in PERCENTILES):
+                new, old = data["latency_ms"].get(name), base["latency_ms"].get(name)
+                if not new or not old:
+                    continue
+                change = (new - old) / old * 100
+                print(f"  {kind:<12}{name:>7}: {old:>9.1f} -> {new:>9.1f} ms ({change:+.1f}%)")
+                if max_regression is not None and kind == "ALL" and change > max_regression:
+                    failures.append(f"{name} regressed {change:+.1f}% vs baseline")
+        old_rps, new_rps = baseline.get("throughput_rps"), result["throughput_rps"]
+        if old_rps:
+            print(f"  throughput: {old_rps} -> {new_rps} req/s ({(new_rps - old_rps) / old_rps * 100:+.1f}%)")
+
+    return failures
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    mix = RequestMix(
+        parse_pairs(args.mix),
+        read_lines(args.stations) if args.stations else DEFAULT_STATIONS,
+        read_lines(args.queries) if args.queries else DEFAULT_QUERIES,
+        json.load(open(args.viewports, encoding="utf-8")) if args.viewports else DEFAULT_VIEWPORTS,
+        args.zipf,
+        rng
+    )
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=max(args.concurrency, 100))
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        cache_before = await fetch_cache_stats(client)
+        start = time.perf_counter()
+        if args.rps:
+            await run_open_loop(client, mix, recorder, args.rps, args.duration, args.timeout, rng)
+        else:
+            await run_closed_loop(client, mix, recorder, args.concurrency, args.duration, args.timeout)
+        elapsed = time.perf_counter() - start
+        cache_after = await fetch_cache_stats(client)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    return summarize(recorder, elapsed, cache_before, cache_after, config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the backend")
+    parser.add_argument("--url", default=API_BASE)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=10, help="Closed loop: concurrent users")
+    mode.add_argument("--rps", type=float, help="Open loop: target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout in seconds")
+    parser.add_argument("--mix", default="departures=6,search=3,radar=1", help="Weighted request mix")
+    parser.add_argument("--stations", help="File with station IDs, most popular first")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Station popularity skew")
+    parser.add_argument("--queries", help="Search query log, one query per line")
+    parser.add_argument("--viewports", help="JSON file with a list of radar bounding boxes")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, help="Fail if overall percentiles regress more than N%%")
+    parser.add_argument("--budget", default="", help="Latency budgets, e.g. p95=300,p99=800")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if the error rate exceeds this fraction")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failures = check_regressions(result, baseline, parse_pairs(args.budget), args.max_regression, args.max_error_rate)
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nPASSED")
+
+
+if __name__ == "__main__":
+    main()